@@ -108,6 +108,47 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# The finance analytics endpoints cache their responses in the 'finance'
+# alias and invalidate them by bumping a version key on every write. The
+# default LocMemCache is per process: a bump in one worker never reaches the
+# others, so it is only correct with a single process (runserver, one
+# gunicorn worker). Multi-worker deployments must set FINANCE_CACHE_URL to a
+# shared backend, e.g. rediscache://127.0.0.1:6379/1 or
+# pymemcache://127.0.0.1:11211.
+
+FINANCE_CACHE = env.cache_url('FINANCE_CACHE_URL', default='locmemcache://finance-analytics')
+FINANCE_CACHE['TIMEOUT'] = 300
+if FINANCE_CACHE['BACKEND'].endswith('LocMemCache'):
+    # Evicts least recently used entries past this
+    FINANCE_CACHE['OPTIONS'] = {'MAX_ENTRIES': 1000}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'finance': FINANCE_CACHE,
+}
+
+
+# Background finance report generation (see finance_app.jobs). Set
+# FINANCE_REPORT_JOBS_IN_PROCESS to False when a dedicated
+# `manage.py run_report_worker` process drains the queue instead.
+FINANCE_REPORT_WORKERS = 2
+FINANCE_REPORT_JOBS_IN_PROCESS = True
+# Seconds without a heartbeat after which a job still marked running is
+# taken to belong to a process that died and is claimed again. The in-process
+# pool doesn't pick such jobs up itself; `manage.py run_report_worker --once`
+# (e.g. on deploy) finishes whatever a restart left behind.
+FINANCE_REPORT_JOB_TIMEOUT = 30 * 60
+
+# HR payroll runs (see hr_app.payroll) are generated in a background thread;
+# set to False when `manage.py run_payroll` processes pending runs instead
+HR_PAYROLL_RUNS_IN_PROCESS = True
+# Seconds after which a run still marked running is taken to belong to a
+# process that died; it can then be claimed again and finished
+HR_PAYROLL_RUN_TIMEOUT = 60 * 60
 
 
 # Password validation
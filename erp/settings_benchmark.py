@@ -0,0 +1,17 @@
+"""
+Settings for `manage.py benchmark_finance_endpoints`: the regular ERP
+settings on a local SQLite file, so seeding a million ledger rows never
+touches the MySQL database.
+"""
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'benchmark.sqlite3',
+        'TEST': {
+            # A file rather than :memory: so --keepdb can reuse a seeded run
+            'NAME': BASE_DIR / 'benchmark_test.sqlite3',
+        },
+    }
+}
@@ -1,5 +1,12 @@
 from django.contrib import admin
-from .models import Income, Expense, ReportHistory
+from .models import Income, Expense, Budget, RecurringExpense, FinanceAuditLog, FinanceCategory, ReportHistory
+
+@admin.register(FinanceCategory)
+class FinanceCategoryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'kind', 'parent')
+    list_filter = ('kind',)
+    search_fields = ('name', 'slug')
+    readonly_fields = ('slug',)
 
 @admin.register(Income)
 class IncomeAdmin(admin.ModelAdmin):
@@ -15,6 +22,36 @@ class ExpenseAdmin(admin.ModelAdmin):
     search_fields = ('payee', 'description')
     date_hierarchy = 'date'
 
+@admin.register(Budget)
+class BudgetAdmin(admin.ModelAdmin):
+    list_display = ('category', 'period', 'amount', 'actual_amount')
+    list_filter = ('category', 'period')
+    readonly_fields = ('actual_amount',)
+    date_hierarchy = 'period'
+
+@admin.register(RecurringExpense)
+class RecurringExpenseAdmin(admin.ModelAdmin):
+    list_display = ('payee', 'amount', 'category', 'frequency', 'interval', 'start_date', 'end_date', 'is_active', 'materialized_through')
+    list_filter = ('frequency', 'is_active', 'category')
+    search_fields = ('payee', 'description')
+    readonly_fields = ('materialized_through',)
+
+@admin.register(FinanceAuditLog)
+class FinanceAuditLogAdmin(admin.ModelAdmin):
+    list_display = ('entity', 'entity_id', 'action', 'timestamp')
+    list_filter = ('entity', 'action')
+    date_hierarchy = 'timestamp'
+
+    # Append-only: viewable, never edited or removed
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 @admin.register(ReportHistory)
 class ReportHistoryAdmin(admin.ModelAdmin):
     list_display = ('report_name', 'report_type', 'start_date', 'end_date', 'created_at')
@@ -9,4 +9,7 @@ from django.apps import AppConfig
 
 class FinanceAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'finance_app'
\ No newline at end of file
+    name = 'finance_app'
+
+    def ready(self):
+        from . import signals
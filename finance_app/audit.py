@@ -0,0 +1,132 @@
+import threading
+from contextlib import contextmanager
+
+from .models import Income, Expense, Budget, RecurringExpense, FinanceAuditLog
+
+AUDITED_MODELS = {
+    Income: 'income',
+    Expense: 'expense',
+    Budget: 'budget',
+    RecurringExpense: 'recurring_expense',
+}
+
+# Timestamps and values derived from other tables are not part of the history
+IGNORED_FIELDS = {'id', 'created_at', 'updated_at', 'actual_amount', 'materialized_through', 'category_ref'}
+
+_state = threading.local()
+_fields_cache = {}
+
+
+def audit_fields(model):
+    """Concrete (name, attname, field) triples whose changes are recorded."""
+    if model not in _fields_cache:
+        _fields_cache[model] = [
+            (field.name, field.attname, field)
+            for field in model._meta.concrete_fields
+            if field.name not in IGNORED_FIELDS
+        ]
+    return _fields_cache[model]
+
+
+def entity_for_model(model):
+    for audited_model, entity in AUDITED_MODELS.items():
+        if issubclass(model, audited_model):
+            return entity
+    return None
+
+
+@contextmanager
+def suspended():
+    """Skip audit entries for writes in this thread, e.g. fixture loading."""
+    previous = getattr(_state, 'suspended', False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def is_suspended():
+    return getattr(_state, 'suspended', False)
+
+
+def stored_row(model, pk, *extra):
+    """
+    The row as currently stored, keyed by attname, plus any extra attnames;
+    None if it doesn't exist.
+    """
+    return model.objects.filter(pk=pk).values(*[attname for _, attname, _ in audit_fields(model)], *extra).first()
+
+
+def _current(model, instance):
+    return {
+        attname: field.to_python(getattr(instance, attname))
+        for _, attname, field in audit_fields(model)
+    }
+
+
+def _values(model, row):
+    # Empty values are left out to keep create/delete entries compact
+    return {
+        name: row[attname]
+        for name, attname, _ in audit_fields(model)
+        if row[attname] not in (None, '')
+    }
+
+
+def _diff(model, before, after):
+    return {
+        name: [before[attname], after[attname]]
+        for name, attname, _ in audit_fields(model)
+        if before[attname] != after[attname]
+    }
+
+
+def record_save(model, instance, previous):
+    """previous is the stored row before the save (None for an insert)."""
+    if is_suspended():
+        return None
+    current = _current(model, instance)
+    if previous is None:
+        action, changes = FinanceAuditLog.ACTION_CREATE, _values(model, current)
+    else:
+        action, changes = FinanceAuditLog.ACTION_UPDATE, _diff(model, previous, current)
+        if not changes:
+            return None
+    return FinanceAuditLog.objects.create(
+        entity=entity_for_model(model), entity_id=instance.pk, action=action, changes=changes
+    )
+
+
+def record_delete(model, instance):
+    if is_suspended():
+        return None
+    return FinanceAuditLog.objects.create(
+        entity=entity_for_model(model),
+        entity_id=instance.pk,
+        action=FinanceAuditLog.ACTION_DELETE,
+        changes=_values(model, _current(model, instance))
+    )
+
+
+def record_bulk_create(model, objs):
+    """
+    Audit rows inserted by bulk_create. Rows without a primary key can't be
+    tied to an entity id and are skipped; insert through
+    signals.bulk_insert() so every backend hands the ids back.
+    """
+    if is_suspended():
+        return 0
+    entity = entity_for_model(model)
+    entries = [
+        FinanceAuditLog(
+            entity=entity,
+            entity_id=obj.pk,
+            action=FinanceAuditLog.ACTION_CREATE,
+            changes=_values(model, _current(model, obj))
+        )
+        for obj in objs
+        if obj.pk is not None
+    ]
+    FinanceAuditLog.objects.bulk_create(entries, batch_size=1000)
+    return len(entries)
@@ -0,0 +1,238 @@
+import json
+import math
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from . import audit
+from .budgets import refresh_budget_actuals
+from .cache import bump_data_version
+from .models import (
+    Income, Expense, Budget, RecurringExpense, FinanceCategory, ReportHistory, ReportJob, BalanceSnapshot
+)
+from .rollups import KIND_INCOME, KIND_EXPENSE, rebuild_rollups
+from .snapshots import fill_snapshots
+
+SEED_SIZES = (10_000, 100_000, 1_000_000)
+SEED_DAYS = 730
+SEED_BATCH_SIZE = 5000
+
+BUDGET_FILE = Path(__file__).with_name('query_budget.json')
+API_PREFIX = '/api/finance/'
+
+INCOME_CATEGORIES = ['sales', 'services', 'consulting', 'interest', 'rental', 'other']
+EXPENSE_CATEGORIES = [
+    'rent', 'payroll', 'utilities', 'office_supplies', 'travel', 'marketing',
+    'software', 'insurance', 'maintenance', 'taxes', 'training', 'other',
+]
+
+# url name -> (path relative to the finance API, query params). Paths may
+# use {income}, {expense}, {budget}, {recurring}, {category}, {report} and
+# {job}, filled in with rows created by seed_ledger.
+ENDPOINTS = {
+    'income-list-create': ('incomes/', {'limit': 50}),
+    'income-export': ('incomes/export/', {'start_date': '{month_start}'}),
+    'income-detail': ('incomes/{income}/', {}),
+    'income-history': ('incomes/{income}/history/', {}),
+    'expense-list-create': ('expenses/', {'limit': 50}),
+    'expense-export': ('expenses/export/', {'start_date': '{month_start}'}),
+    'expense-detail': ('expenses/{expense}/', {}),
+    'expense-history': ('expenses/{expense}/history/', {}),
+    'financial-summary': ('summary/', {'timeRange': '1year'}),
+    'finance-dashboard': ('dashboard/', {'timeRange': '1year'}),
+    'cash-flow': ('cash-flow/', {'timeRange': '1year'}),
+    'cash-flow-forecast': ('cash-flow/forecast/', {'method': 'seasonal_naive'}),
+    'balance-sheet': ('balance-sheet/', {}),
+    'financial-reports': ('reports/', {'type': 'comparative_income_statement', 'start_date': '{year_start}'}),
+    'report-history': ('report-history/', {'limit': 50}),
+    'report-history-detail': ('report-history/{report}/', {}),
+    'report-job-detail': ('report-jobs/{job}/', {}),
+    'category-list-create': ('categories/', {'kind': 'expense'}),
+    'category-rollup': ('categories/rollup/', {'kind': 'expense', 'timeRange': '1year'}),
+    'category-detail': ('categories/{category}/', {}),
+    'budget-list-create': ('budgets/', {}),
+    'budget-vs-actual': ('budgets/vs-actual/', {'start_date': '{year_start}'}),
+    'budget-detail': ('budgets/{budget}/', {}),
+    'budget-history': ('budgets/{budget}/history/', {}),
+    'recurring-expense-list-create': ('recurring-expenses/', {}),
+    'recurring-expense-detail': ('recurring-expenses/{recurring}/', {}),
+    'recurring-expense-history': ('recurring-expenses/{recurring}/history/', {}),
+    'reconciliation-matches': ('reconciliation/', {'kind': 'expense'}),
+    'finance-cache-stats': ('cache-stats/', {}),
+    'test-api': ('test/', {}),
+}
+
+# Routes that only accept writes; measuring them would change the data set
+WRITE_ONLY_ENDPOINTS = {
+    'income-import', 'expense-import', 'report-jobs', 'recurring-expense-materialize',
+}
+
+
+def finance_url_names():
+    from . import urls
+    return {pattern.name for pattern in urls.urlpatterns}
+
+
+def seed_ledger(rows, seed=0, today=None):
+    """
+    Insert rows Income/Expense entries (one third income) spread over the last
+    SEED_DAYS days, plus one of each supporting record the detail endpoints
+    need. Inserts go through bulk_create with auditing suspended and the
+    derived tables are rebuilt once at the end, as the importer does.
+    Returns benchmark_context().
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    first_day = today - timedelta(days=SEED_DAYS - 1)
+    income_ids = FinanceCategory.objects.ids_for(KIND_INCOME, INCOME_CATEGORIES)
+    expense_ids = FinanceCategory.objects.ids_for(KIND_EXPENSE, EXPENSE_CATEGORIES)
+    parties = [f'Party {i:04d}' for i in range(500)]
+
+    def income(i):
+        category = rng.choice(INCOME_CATEGORIES)
+        return Income(
+            source=rng.choice(parties),
+            amount=Decimal(rng.randint(1000, 500000)) / 100,
+            date=first_day + timedelta(days=rng.randrange(SEED_DAYS)),
+            category=category,
+            category_ref_id=income_ids[category],
+            reference_number=f'INV-{seed}-{i}'
+        )
+
+    def expense(i):
+        category = rng.choice(EXPENSE_CATEGORIES)
+        return Expense(
+            payee=rng.choice(parties),
+            amount=Decimal(rng.randint(100, 200000)) / 100,
+            date=first_day + timedelta(days=rng.randrange(SEED_DAYS)),
+            category=category,
+            category_ref_id=expense_ids[category],
+            payment_method=rng.choice(['cash', 'card', 'transfer'])
+        )
+
+    with audit.suspended(), transaction.atomic():
+        for offset in range(0, rows, SEED_BATCH_SIZE):
+            count = min(SEED_BATCH_SIZE, rows - offset)
+            incomes = [income(offset + i) for i in range(count) if (offset + i) % 3 == 0]
+            expenses = [expense(offset + i) for i in range(count) if (offset + i) % 3 != 0]
+            Income.objects.bulk_create(incomes)
+            Expense.objects.bulk_create(expenses)
+        rebuild_rollups()
+        BalanceSnapshot.objects.all().delete()
+        fill_snapshots()
+
+        month_start = today.replace(day=1)
+        for category in EXPENSE_CATEGORIES:
+            Budget.objects.get_or_create(
+                category=category, period=month_start, defaults={'amount': Decimal('10000.00')}
+            )
+        refresh_budget_actuals()
+        RecurringExpense.objects.get_or_create(
+            payee='Landlord', category='rent', frequency='monthly',
+            defaults={'amount': Decimal('2500.00'), 'start_date': first_day, 'materialized_through': today}
+        )
+        report, _ = ReportHistory.objects.get_or_create(
+            report_name='Benchmark report', report_type='income_statement',
+            start_date=month_start, end_date=today,
+        )
+        ReportJob.objects.get_or_create(
+            report_name='Benchmark job', start_date=month_start, end_date=today,
+            defaults={'status': ReportJob.STATUS_COMPLETED, 'report': report}
+        )
+    bump_data_version()
+    return benchmark_context(today)
+
+
+def seeded_rows():
+    return Income.objects.count() + Expense.objects.count()
+
+
+def benchmark_context(today=None):
+    """The {placeholder: value} map used to fill in ENDPOINTS paths and params."""
+    today = today or date.today()
+    return {
+        'income': Income.objects.order_by('-id').values_list('id', flat=True).first(),
+        'expense': Expense.objects.order_by('-id').values_list('id', flat=True).first(),
+        'budget': Budget.objects.order_by('id').values_list('id', flat=True).first(),
+        'recurring': RecurringExpense.objects.filter(payee='Landlord').values_list('id', flat=True).first(),
+        'category': FinanceCategory.objects.filter(kind=KIND_EXPENSE, slug='office_supplies').values_list('id', flat=True).first(),
+        'report': ReportHistory.objects.filter(report_name='Benchmark report').values_list('id', flat=True).first(),
+        'job': ReportJob.objects.filter(report_name='Benchmark job').values_list('id', flat=True).first(),
+        'month_start': today.replace(day=1).isoformat(),
+        'year_start': (today - timedelta(days=365)).isoformat(),
+    }
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def _request(client, path, params):
+    response = client.get(path, params)
+    if response.streaming:
+        # Exports run their queries while the body is consumed
+        b''.join(response.streaming_content)
+    return response
+
+
+def measure_endpoint(client, path, params, repeat=10):
+    """
+    Latency samples (ms) and the highest SQL query count over repeat cold
+    requests. The analytics cache is invalidated before each request so the
+    numbers reflect the work an endpoint does rather than a cache hit. One
+    unmeasured request goes first so lazily filled tables (balance
+    snapshots) don't make the counts depend on which endpoint ran first.
+    """
+    _request(client, path, params)
+    latencies = []
+    max_queries = 0
+    for _ in range(repeat):
+        bump_data_version()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = _request(client, path, params)
+            elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise RuntimeError(f"GET {path} returned {response.status_code}")
+        latencies.append(elapsed * 1000)
+        max_queries = max(max_queries, len(queries))
+    return {
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'queries': max_queries,
+    }
+
+
+def run_benchmarks(context, repeat=10, names=None):
+    """{url name: measurements} for every benchmarked finance endpoint."""
+    client = APIClient()
+    results = {}
+    for name, (path, params) in ENDPOINTS.items():
+        if names and name not in names:
+            continue
+        url = API_PREFIX + path.format(**context)
+        query = {key: str(value).format(**context) for key, value in params.items()}
+        results[name] = measure_endpoint(client, url, query, repeat)
+    return results
+
+
+def load_query_budget(path=BUDGET_FILE):
+    with open(path) as budget_file:
+        return json.load(budget_file)
+
+
+def over_budget(results, budget):
+    """(name, queries, allowed) for every endpoint above its query budget."""
+    return [
+        (name, result['queries'], budget.get(name))
+        for name, result in results.items()
+        if budget.get(name) is None or result['queries'] > budget[name]
+    ]
@@ -0,0 +1,153 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import TruncMonth
+
+from .models import Budget, DailyFinanceRollup
+from .rollups import KIND_EXPENSE, category_slugs
+
+ZERO = Decimal('0.00')
+PERCENT = Decimal('0.01')
+UPDATE_CHUNK_SIZE = 500
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def expense_actual(category, period):
+    """Expenses booked against category in the month starting at period."""
+    period = month_start(period)
+    return (
+        DailyFinanceRollup.objects.filter(
+            kind=KIND_EXPENSE,
+            category_ref__slug=category,
+            day__gte=period,
+            day__lte=period + relativedelta(months=1) - timedelta(days=1)
+        ).aggregate(total=Sum('total'))['total'] or ZERO
+    )
+
+
+def _add_to_actuals(increments):
+    """increments: {budget id: amount}; one UPDATE per chunk of budgets."""
+    ids = list(increments)
+    for start in range(0, len(ids), UPDATE_CHUNK_SIZE):
+        chunk = ids[start:start + UPDATE_CHUNK_SIZE]
+        Budget.objects.filter(pk__in=chunk).update(
+            actual_amount=F('actual_amount') + Case(
+                *[When(pk=pk, then=Value(increments[pk])) for pk in chunk],
+                output_field=DecimalField(max_digits=18, decimal_places=2)
+            )
+        )
+
+
+def apply_expense_deltas(deltas):
+    """
+    Fold daily expense deltas {(day, category id): [amount, count]} into
+    monthly ones and add them to the budgets they fall in. Budgets name
+    their category by slug.
+    """
+    changed = {key: amount for key, (amount, _) in deltas.items() if amount}
+    if not changed:
+        return
+    slugs = category_slugs(category_id for _, category_id in changed)
+    monthly = defaultdict(Decimal)
+    for (day, category_id), amount in changed.items():
+        monthly[(month_start(day), slugs[category_id])] += amount
+
+    budgets = Budget.objects.filter(
+        period__in={period for period, _ in monthly},
+        category__in={category for _, category in monthly}
+    ).values_list('pk', 'period', 'category')
+    increments = {
+        pk: monthly[(period, category)]
+        for pk, period, category in budgets
+        if monthly.get((period, category))
+    }
+    if increments:
+        with transaction.atomic():
+            _add_to_actuals(increments)
+
+
+def refresh_budget_actuals(budgets=None):
+    """Recompute actuals from the rollup, e.g. after rebuild_finance_rollups."""
+    budgets = Budget.objects.all() if budgets is None else budgets
+    rows = list(budgets.values_list('pk', 'period', 'category', 'actual_amount'))
+    if not rows:
+        return 0
+    actuals = {
+        (row['month'], row['category']): row['total']
+        for row in DailyFinanceRollup.objects.filter(
+            kind=KIND_EXPENSE,
+            day__gte=min(period for _, period, _, _ in rows),
+            day__lt=max(period for _, period, _, _ in rows) + relativedelta(months=1),
+            category_ref__slug__in={category for _, _, category, _ in rows}
+        )
+        .annotate(month=TruncMonth('day'), category=F('category_ref__slug'))
+        .values('month', 'category')
+        .annotate(total=Sum('total'))
+        .order_by()
+    }
+    corrections = {}
+    for pk, period, category, current in rows:
+        difference = actuals.get((period, category), ZERO) - current
+        if difference:
+            corrections[pk] = difference
+    with transaction.atomic():
+        _add_to_actuals(corrections)
+    return len(corrections)
+
+
+def _utilization(actual, budget):
+    if not budget:
+        return None
+    return (actual / budget * 100).quantize(PERCENT, rounding=ROUND_HALF_UP)
+
+
+def _line(budget, actual):
+    return {
+        'budget': budget,
+        'actual': actual,
+        'variance': budget - actual,
+        'utilization': _utilization(actual, budget),
+    }
+
+
+def budget_vs_actual(start_date, end_date, categories=None):
+    """
+    Budget, actual and variance per (category, month), per category and
+    overall, read from the maintained actuals in a single query.
+    """
+    budgets = Budget.objects.filter(period__gte=month_start(start_date), period__lte=end_date)
+    if categories:
+        budgets = budgets.filter(category__in=categories)
+    rows = budgets.order_by('category', 'period').values_list('category', 'period', 'amount', 'actual_amount')
+
+    lines = []
+    by_category = {}
+    total_budget = ZERO
+    total_actual = ZERO
+    for category, period, amount, actual in rows:
+        line = {'category': category, 'period': period.isoformat()}
+        line.update(_line(amount, actual))
+        lines.append(line)
+        category_totals = by_category.setdefault(category, [ZERO, ZERO])
+        category_totals[0] += amount
+        category_totals[1] += actual
+        total_budget += amount
+        total_actual += actual
+
+    return {
+        'startDate': month_start(start_date).isoformat(),
+        'endDate': end_date.isoformat(),
+        'rows': lines,
+        'categories': [
+            dict(category=category, **_line(budget, actual))
+            for category, (budget, actual) in by_category.items()
+        ],
+        'totals': _line(total_budget, total_actual),
+    }
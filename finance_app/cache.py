@@ -0,0 +1,116 @@
+import hashlib
+import time
+from datetime import date
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'finance:data-version'
+STATS_KEYS = {
+    'hits': 'finance:stats:hits',
+    'misses': 'finance:stats:misses',
+}
+
+
+def get_cache():
+    alias = getattr(settings, 'FINANCE_CACHE_ALIAS', 'finance')
+    try:
+        return caches[alias]
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def data_version():
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed with a clock value rather than 1 so that a version key lost to
+        # eviction or a restart can never line up with old entries again
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_data_version():
+    """Called on every Income/Expense write; orphans all cached answers."""
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def bump_data_version_on_commit():
+    """
+    Bump once the writer's transaction commits (right away outside one).
+    Bumping earlier would let a read that lands before the commit cache the
+    old rows under the new version.
+    """
+    transaction.on_commit(bump_data_version)
+
+
+def _count(stat):
+    cache = get_cache()
+    key = STATS_KEYS[stat]
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def cache_stats():
+    cache = get_cache()
+    hits = cache.get(STATS_KEYS['hits']) or 0
+    misses = cache.get(STATS_KEYS['misses']) or 0
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hitRate': round(hits / lookups, 4) if lookups else 0,
+        'dataVersion': data_version(),
+        'backend': f"{cache.__class__.__module__}.{cache.__class__.__name__}"
+    }
+
+
+def cache_key(endpoint, params):
+    # Relative ranges such as timeRange=30days move with the calendar, so the
+    # current date is part of the key alongside the normalized params
+    normalized = sorted(
+        (name, value)
+        for name, values in params.lists()
+        for value in values
+        if value != ''
+    )
+    digest = hashlib.md5(urlencode(normalized).encode()).hexdigest()
+    return f"finance:{endpoint}:{data_version()}:{date.today().isoformat()}:{digest}"
+
+
+def cached_response(endpoint):
+    """
+    Cache successful GET responses of an analytics view by endpoint and
+    normalized query params. Eviction and TTL come from the cache backend.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            cache = get_cache()
+            key = cache_key(endpoint, request.query_params)
+            data = cache.get(key)
+            if data is not None:
+                _count('hits')
+                return Response(data)
+
+            _count('misses')
+            response = view(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(key, response.data)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,130 @@
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth, TruncQuarter, TruncYear
+
+from .models import DailyFinanceRollup
+from .pagination import InvalidQuery, parse_date_param
+from .rollups import KIND_INCOME, KIND_EXPENSE
+
+TIME_RANGE_DAYS = {
+    '30days': 30,
+    '3months': 90,
+    '6months': 180,
+    '1year': 365,
+}
+
+MAX_BUCKETS = 5000
+
+
+def _week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def _quarter_start(day):
+    return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+
+
+# period -> (database truncation, python truncation, bucket step, label)
+CASH_FLOW_PERIODS = {
+    'daily': (
+        TruncDay, lambda d: d, relativedelta(days=1),
+        lambda d: d.strftime('%b %d, %Y'),
+    ),
+    'weekly': (
+        TruncWeek, _week_start, relativedelta(weeks=1),
+        lambda d: f"Week of {d.strftime('%b %d, %Y')}",
+    ),
+    'monthly': (
+        TruncMonth, lambda d: d.replace(day=1), relativedelta(months=1),
+        lambda d: d.strftime('%b %Y'),
+    ),
+    'quarterly': (
+        TruncQuarter, _quarter_start, relativedelta(months=3),
+        lambda d: f"Q{(d.month - 1) // 3 + 1} {d.year}",
+    ),
+    'yearly': (
+        TruncYear, lambda d: d.replace(month=1, day=1), relativedelta(years=1),
+        lambda d: str(d.year),
+    ),
+}
+
+
+def resolve_date_range(params, default_days=90):
+    """
+    Explicit start_date/end_date win over the dashboard's timeRange shortcut.
+    """
+    today = date.today()
+    end_date = parse_date_param(params, 'end_date') or today
+    start_date = parse_date_param(params, 'start_date')
+    if start_date is None:
+        days = TIME_RANGE_DAYS.get(params.get('timeRange'), default_days)
+        start_date = end_date - timedelta(days=days)
+    if start_date > end_date:
+        raise InvalidQuery("start_date must be on or before end_date")
+    return start_date, end_date
+
+
+def bucket_starts(period, start_date, end_date):
+    _, truncate, step, _ = CASH_FLOW_PERIODS[period]
+    buckets = []
+    bucket = truncate(start_date)
+    while bucket <= end_date:
+        buckets.append(bucket)
+        if len(buckets) > MAX_BUCKETS:
+            raise InvalidQuery(f"Date range produces more than {MAX_BUCKETS} {period} buckets")
+        bucket = bucket + step
+    return buckets
+
+
+def build_cash_flow(period, start_date, end_date):
+    """
+    Income, expenses and net per bucket from one conditional-aggregation
+    query over the daily rollup, zero-filled and in chronological order.
+    """
+    buckets = cash_flow_buckets(period, start_date, end_date)
+    trunc = CASH_FLOW_PERIODS[period][0]
+    rows = (
+        DailyFinanceRollup.objects.filter(day__gte=start_date, day__lte=end_date)
+        .annotate(bucket=trunc('day'))
+        .values('bucket')
+        .annotate(
+            income=Sum('total', filter=Q(kind=KIND_INCOME)),
+            expenses=Sum('total', filter=Q(kind=KIND_EXPENSE))
+        )
+        .order_by('bucket')
+    )
+    return cash_flow_series(period, buckets, start_date, end_date, {row['bucket']: row for row in rows})
+
+
+def cash_flow_buckets(period, start_date, end_date):
+    """Validate period and the range before anything is queried."""
+    if period not in CASH_FLOW_PERIODS:
+        raise InvalidQuery("Invalid period parameter")
+    return bucket_starts(period, start_date, end_date)
+
+
+def cash_flow_series(period, buckets, start_date, end_date, totals):
+    """The cash_flow payload from {bucket: {'income': ..., 'expenses': ...}}."""
+    label = CASH_FLOW_PERIODS[period][3]
+    income_values = []
+    expense_values = []
+    net_values = []
+    for bucket in buckets:
+        row = totals.get(bucket, {})
+        income = float(row.get('income') or 0)
+        expenses = float(row.get('expenses') or 0)
+        income_values.append(income)
+        expense_values.append(expenses)
+        net_values.append(income - expenses)
+
+    return {
+        'labels': [label(bucket) for bucket in buckets],
+        'bucketStarts': [bucket.isoformat() for bucket in buckets],
+        'incomeData': income_values,
+        'expensesData': expense_values,
+        'netData': net_values,
+        'startDate': start_date.isoformat(),
+        'endDate': end_date.isoformat()
+    }
@@ -0,0 +1,55 @@
+from decimal import Decimal
+
+from django.db.models import F, Q, Sum
+
+from .models import DailyFinanceRollup, FinanceCategory, UNCATEGORIZED_SLUG
+
+ZERO = Decimal('0.00')
+
+
+def category_tree_totals(kind, start_date, end_date):
+    """
+    Totals per category including all of its subcategories. Each rollup row
+    joins to its category's ancestors through the closure table and the sums
+    are grouped on the ancestor id, so any depth is one non-recursive query.
+    """
+    rows = (
+        DailyFinanceRollup.objects.filter(kind=kind, day__gte=start_date, day__lte=end_date)
+        .values(node=F('category_ref__ancestor_links__ancestor'))
+        .annotate(
+            tree_total=Sum('total'),
+            own_total=Sum('total', filter=Q(category_ref__ancestor_links__depth=0))
+        )
+        .order_by()
+    )
+    totals = {row['node']: (row['tree_total'], row['own_total'] or ZERO) for row in rows}
+
+    nodes = {}
+    roots = []
+    # Rows without a category stay out of the tree, as they always have
+    categories = (
+        FinanceCategory.objects.filter(kind=kind).exclude(slug=UNCATEGORIZED_SLUG)
+        .order_by('name').values('id', 'name', 'slug', 'parent_id')
+    )
+    for category in categories:
+        total, own_total = totals.get(category['id'], (ZERO, ZERO))
+        nodes[category['id']] = {
+            'id': category['id'],
+            'name': category['name'],
+            'slug': category['slug'],
+            'parentId': category['parent_id'],
+            'total': total,
+            'ownTotal': own_total,
+            'children': [],
+        }
+    for node in nodes.values():
+        parent = nodes.get(node['parentId'])
+        (parent['children'] if parent else roots).append(node)
+
+    return {
+        'kind': kind,
+        'startDate': start_date.isoformat(),
+        'endDate': end_date.isoformat(),
+        'total': sum((node['total'] for node in roots), ZERO),
+        'categories': roots,
+    }
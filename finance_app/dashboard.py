@@ -0,0 +1,50 @@
+from collections import defaultdict
+from datetime import date
+
+from django.db.models import Q, Sum
+
+from .cashflow import CASH_FLOW_PERIODS, cash_flow_buckets, cash_flow_series, resolve_date_range
+from .models import DailyFinanceRollup
+from .rollups import KIND_INCOME
+from .snapshots import build_balance_sheet
+from .summary import period_sums, summarize, summary_range, with_range
+
+
+def build_dashboard(params):
+    """
+    The summary, cash_flow and balance_sheet payloads for one timeRange.
+    The summary (category breakdowns included) and the cash-flow series are
+    folded from one rollup query grouped by kind, category and cash-flow
+    bucket, so together they cost a single scan; the balance sheet reads
+    its month-end snapshot.
+    """
+    time_range = params.get('timeRange', '3months')
+    period = params.get('period', 'monthly')
+    start_date, end_date = resolve_date_range(params)
+    buckets = cash_flow_buckets(period, start_date, end_date)
+    summary_start, summary_end, prev_start, prev_end = summary_range(time_range)
+
+    periods, sums = period_sums(summary_start, summary_end, prev_start, prev_end)
+    flow = Q(day__gte=start_date, day__lte=end_date)
+    rows = list(
+        DailyFinanceRollup.objects
+        .filter(periods | flow)
+        .annotate(bucket=CASH_FLOW_PERIODS[period][0]('day'))
+        .values('kind', 'category_ref_id', 'bucket')
+        .annotate(flow=Sum('total', filter=flow), **sums)
+        .order_by()
+    )
+
+    flow_totals = defaultdict(lambda: {'income': 0, 'expenses': 0})
+    for row in rows:
+        if row['flow']:
+            flow_totals[row['bucket']]['income' if row['kind'] == KIND_INCOME else 'expenses'] += row['flow']
+
+    data = {
+        'summary': with_range(summarize(rows), time_range, summary_start, summary_end),
+        'cashFlow': cash_flow_series(period, buckets, start_date, end_date, flow_totals),
+        'balanceSheet': build_balance_sheet(date.today()),
+    }
+    data['cashFlow'].update({'period': period, 'timeRange': time_range})
+    data['timeRange'] = time_range
+    return data
@@ -0,0 +1,64 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_FIELDS = {
+    'income': ['id', 'source', 'amount', 'date', 'category', 'reference_number', 'description', 'created_at', 'updated_at'],
+    'expense': ['id', 'payee', 'amount', 'date', 'category', 'expense_type', 'payment_method', 'description', 'created_at', 'updated_at'],
+}
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object that hands back what csv.writer writes to it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(queryset, fields, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    buffer = []
+    for row in queryset.values_list(*fields).iterator(chunk_size=chunk_size):
+        buffer.append(writer.writerow([_csv_value(value) for value in row]))
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_ndjson(queryset, fields, chunk_size=CHUNK_SIZE):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    buffer = []
+    for row in queryset.values_list(*fields).iterator(chunk_size=chunk_size):
+        buffer.append(encoder.encode(dict(zip(fields, row))) + '\n')
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_ledger(queryset, kind, file_format):
+    """Rows are pulled from the database one chunk at a time as the client reads."""
+    fields = EXPORT_FIELDS[kind]
+    if file_format == 'ndjson':
+        return stream_ndjson(queryset, fields)
+    return stream_csv(queryset, fields)
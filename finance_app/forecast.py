@@ -0,0 +1,138 @@
+from datetime import date
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+from .models import DailyFinanceRollup
+from .pagination import InvalidQuery
+from .rollups import KIND_INCOME, KIND_EXPENSE, category_slugs
+
+DEFAULT_HORIZON = 6
+MAX_HORIZON = 36
+DEFAULT_HISTORY = 24
+MAX_HISTORY = 120
+DEFAULT_WINDOW = 3
+SEASON_LENGTH = 12
+
+
+def monthly_matrix(start_month, months):
+    """
+    One grouped query over the daily rollup (the same data cash_flow reads),
+    pivoted into a (series, month) float matrix. Series are (kind, category
+    id).
+    """
+    end_month = start_month + relativedelta(months=months)
+    rows = (
+        DailyFinanceRollup.objects.filter(day__gte=start_month, day__lt=end_month)
+        .annotate(month=TruncMonth('day'))
+        .values('kind', 'category_ref_id', 'month')
+        .annotate(total=Sum('total'))
+        .order_by()
+    )
+    rows = list(rows)
+    series = sorted({(row['kind'], row['category_ref_id']) for row in rows}, key=lambda key: (key[0], key[1] or 0))
+    row_of = {key: index for index, key in enumerate(series)}
+    matrix = np.zeros((len(series), months))
+    for row in rows:
+        column = (row['month'].year - start_month.year) * 12 + row['month'].month - start_month.month
+        matrix[row_of[(row['kind'], row['category_ref_id'])], column] = float(row['total'])
+    return series, matrix
+
+
+def moving_average(history, horizon, window=DEFAULT_WINDOW):
+    """Mean of the last window months, carried flat across the horizon."""
+    window = max(1, min(window, history.shape[1]))
+    level = history[:, -window:].mean(axis=1)
+    return np.repeat(level[:, None], horizon, axis=1)
+
+
+def linear_trend(history, horizon, window=None):
+    """Least-squares line per series, fitted for every series at once."""
+    months = history.shape[1]
+    t = np.arange(months, dtype=float)
+    t_centered = t - t.mean()
+    denominator = (t_centered ** 2).sum()
+    slope = history @ t_centered / denominator if denominator else np.zeros(history.shape[0])
+    intercept = history.mean(axis=1) - slope * t.mean()
+    future = np.arange(months, months + horizon, dtype=float)
+    return np.clip(intercept[:, None] + slope[:, None] * future[None, :], 0, None)
+
+
+def seasonal_naive(history, horizon, window=None):
+    """Each future month repeats the same month of the last observed season."""
+    if history.shape[1] < SEASON_LENGTH:
+        raise InvalidQuery(f"seasonal_naive needs at least {SEASON_LENGTH} months of history")
+    last_season = history[:, -SEASON_LENGTH:]
+    return last_season[:, np.arange(horizon) % SEASON_LENGTH]
+
+
+FORECAST_METHODS = {
+    'moving_average': moving_average,
+    'linear': linear_trend,
+    'seasonal_naive': seasonal_naive,
+}
+
+
+def _rounded(values):
+    return [round(float(value), 2) for value in values]
+
+
+def build_forecast(method='linear', horizon=DEFAULT_HORIZON, history_months=DEFAULT_HISTORY,
+                   window=DEFAULT_WINDOW, today=None):
+    """
+    Project income, expenses and net for the next horizon months from the
+    last history_months complete months. Every category is projected in a
+    single vectorized call; totals are the column sums of those projections.
+    """
+    if method not in FORECAST_METHODS:
+        raise InvalidQuery("Invalid forecast method")
+    if not 1 <= horizon <= MAX_HORIZON:
+        raise InvalidQuery(f"horizon must be between 1 and {MAX_HORIZON}")
+    if not 1 <= history_months <= MAX_HISTORY:
+        raise InvalidQuery(f"history must be between 1 and {MAX_HISTORY}")
+
+    # The running month is incomplete, so it is the first forecast month
+    current_month = (today or date.today()).replace(day=1)
+    start_month = current_month - relativedelta(months=history_months)
+    series, history = monthly_matrix(start_month, history_months)
+    projection = FORECAST_METHODS[method](history, horizon, window)
+
+    income_rows = np.array([kind == KIND_INCOME for kind, _ in series], dtype=bool)
+    expense_rows = np.array([kind == KIND_EXPENSE for kind, _ in series], dtype=bool)
+    history_income = history[income_rows].sum(axis=0)
+    history_expenses = history[expense_rows].sum(axis=0)
+    forecast_income = projection[income_rows].sum(axis=0)
+    forecast_expenses = projection[expense_rows].sum(axis=0)
+
+    history_months_list = [start_month + relativedelta(months=i) for i in range(history_months)]
+    forecast_months = [current_month + relativedelta(months=i) for i in range(horizon)]
+
+    slugs = category_slugs(category_id for _, category_id in series)
+    categories = {KIND_INCOME: [], KIND_EXPENSE: []}
+    for (kind, category_id), values in zip(series, projection):
+        categories[kind].append({'category': slugs[category_id], 'values': _rounded(values)})
+    for lines in categories.values():
+        lines.sort(key=lambda line: line['category'])
+
+    return {
+        'method': method,
+        'horizon': horizon,
+        'history': {
+            'labels': [month.strftime('%b %Y') for month in history_months_list],
+            'monthStarts': [month.isoformat() for month in history_months_list],
+            'incomeData': _rounded(history_income),
+            'expensesData': _rounded(history_expenses),
+            'netData': _rounded(history_income - history_expenses),
+        },
+        'forecast': {
+            'labels': [month.strftime('%b %Y') for month in forecast_months],
+            'monthStarts': [month.isoformat() for month in forecast_months],
+            'incomeData': _rounded(forecast_income),
+            'expensesData': _rounded(forecast_expenses),
+            'netData': _rounded(forecast_income - forecast_expenses),
+        },
+        'incomeByCategory': categories[KIND_INCOME],
+        'expensesByCategory': categories[KIND_EXPENSE],
+    }
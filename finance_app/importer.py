@@ -0,0 +1,144 @@
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import FinanceCategory
+from .rollups import LEDGER_MODELS, kind_for_model
+from .signals import bulk_insert
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+# Same defaults income_list_create/expense_list_create apply to a single POST
+IMPORT_FIELDS = {
+    'income': {
+        'source': 'Unknown',
+        'amount': None,
+        'date': None,
+        'description': '',
+        'category': 'other_income',
+        'reference_number': '',
+    },
+    'expense': {
+        'payee': 'Unknown',
+        'amount': None,
+        'date': None,
+        'description': '',
+        'category': 'operational_expenses',
+        'payment_method': '',
+        'expense_type': '',
+    },
+}
+
+FORMATS = ('csv', 'ndjson')
+
+
+def detect_format(name_or_content_type, default='csv'):
+    value = (name_or_content_type or '').lower()
+    if 'ndjson' in value or 'jsonl' in value:
+        return 'ndjson'
+    if 'csv' in value:
+        return 'csv'
+    return default
+
+
+def decode_lines(byte_lines):
+    first = True
+    for line in byte_lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if first:
+            line = line.lstrip('\ufeff')
+            first = False
+        yield line
+
+
+def read_rows(lines, file_format):
+    """Yield a dict per record, or a ValueError for records that cannot be parsed."""
+    if file_format == 'csv':
+        for row in csv.DictReader(lines):
+            yield row
+    elif file_format == 'ndjson':
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield ValueError("Invalid JSON")
+                continue
+            yield row if isinstance(row, dict) else ValueError("Each line must be a JSON object")
+    else:
+        raise ValueError(f"Unsupported format: {file_format}")
+
+
+def clean_row(model, defaults, raw):
+    values = {}
+    errors = {}
+    for name, default in defaults.items():
+        field = model._meta.get_field(name)
+        value = raw.get(name)
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, ''):
+            value = default
+        if value is None:
+            errors[name] = ["This field is required."]
+            continue
+        try:
+            values[name] = field.clean(value, None)
+        except ValidationError as e:
+            errors[name] = e.messages
+    if errors:
+        return None, errors
+    return model(**values), None
+
+
+def _flush(model, batch):
+    with transaction.atomic():
+        FinanceCategory.objects.assign(kind_for_model(model), batch)
+        bulk_insert(model, batch, batch_size=len(batch))
+
+
+def import_ledger(kind, rows, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Validate and insert ledger rows in batches. Invalid rows are reported
+    and skipped; every full batch is committed in its own transaction.
+    """
+    model = LEDGER_MODELS[kind]
+    defaults = IMPORT_FIELDS[kind]
+    created = 0
+    failed = 0
+    errors = []
+    batch = []
+
+    for row_number, raw in enumerate(rows, start=1):
+        if isinstance(raw, Exception):
+            obj, row_errors = None, {'non_field_errors': [str(raw)]}
+        else:
+            obj, row_errors = clean_row(model, defaults, raw)
+
+        if row_errors:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({'row': row_number, 'errors': row_errors})
+            continue
+
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            _flush(model, batch)
+            created += len(batch)
+            batch = []
+
+    if batch:
+        _flush(model, batch)
+        created += len(batch)
+
+    return {
+        'created': created,
+        'failed': failed,
+        'errors': errors,
+        'errorsTruncated': failed > len(errors)
+    }
@@ -0,0 +1,188 @@
+import json
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ReportHistory, ReportJob
+from .reports import REPORT_BUILDERS
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'FINANCE_REPORT_WORKERS', 2),
+                thread_name_prefix='finance-report'
+            )
+        return _executor
+
+
+def job_timeout():
+    return timedelta(seconds=getattr(settings, 'FINANCE_REPORT_JOB_TIMEOUT', 1800))
+
+
+def claimable_jobs():
+    """
+    Queued jobs, plus running ones whose heartbeat (started_at, refreshed
+    while the report is built) is older than FINANCE_REPORT_JOB_TIMEOUT
+    seconds: their process died and nothing else will ever finish them.
+    """
+    stale_before = timezone.now() - job_timeout()
+    return ReportJob.objects.filter(
+        Q(status=ReportJob.STATUS_QUEUED) |
+        Q(status=ReportJob.STATUS_RUNNING, started_at__lt=stale_before)
+    )
+
+
+def claim_job(job_id):
+    """Move a claimable job to running; only one worker can win the update."""
+    return claimable_jobs().filter(pk=job_id).update(
+        status=ReportJob.STATUS_RUNNING,
+        started_at=timezone.now()
+    ) == 1
+
+
+def claim_next_job():
+    while True:
+        job_id = claimable_jobs().order_by('created_at').values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+        if claim_job(job_id):
+            return job_id
+
+
+def touch_job(job_id):
+    """Refresh a running job's heartbeat."""
+    return ReportJob.objects.filter(pk=job_id, status=ReportJob.STATUS_RUNNING).update(started_at=timezone.now())
+
+
+@contextmanager
+def _heartbeat(job_id):
+    """
+    Touch the job from a side thread every third of the timeout while the
+    body runs, so a report that takes longer than the timeout isn't claimed
+    and built a second time.
+    """
+    stop = threading.Event()
+    interval = job_timeout().total_seconds() / 3
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                touch_job(job_id)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, name=f'finance-report-heartbeat-{job_id}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _summary(data):
+    if 'netIncome' in data:
+        return f"Revenue {data['totalRevenue']}, expenses {data['totalExpenses']}, net income {data['netIncome']}"
+    return ''
+
+
+def execute_job(job_id):
+    """Generate the report for a job that has already been claimed."""
+    job = ReportJob.objects.get(pk=job_id)
+    try:
+        builder = REPORT_BUILDERS[job.report_type]
+        with _heartbeat(job_id):
+            # Round-trip through JSON so Decimals/dates are stored as plain values
+            data = json.loads(json.dumps(builder(job.start_date, job.end_date), cls=DjangoJSONEncoder))
+        with transaction.atomic():
+            job.report = ReportHistory.objects.create(
+                report_name=job.report_name or f"{job.report_type} {job.start_date} to {job.end_date}",
+                report_type=job.report_type,
+                start_date=job.start_date,
+                end_date=job.end_date,
+                report_summary=_summary(data),
+                report_data=data
+            )
+            job.status = ReportJob.STATUS_COMPLETED
+            job.finished_at = timezone.now()
+            job.save(update_fields=['report', 'status', 'finished_at'])
+    except Exception as e:
+        traceback.print_exc()
+        job.status = ReportJob.STATUS_FAILED
+        job.error = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+
+
+def run_job(job_id):
+    if claim_job(job_id):
+        execute_job(job_id)
+
+
+def _run_in_worker(job_id):
+    close_old_connections()
+    try:
+        run_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def enqueue_report(report_type, start_date, end_date, report_name=''):
+    """
+    Persist a queued job. The in-process pool picks it up once the row is
+    committed; a separate run_report_worker process can drain it instead.
+    """
+    job = ReportJob.objects.create(
+        report_type=report_type,
+        report_name=report_name,
+        start_date=start_date,
+        end_date=end_date
+    )
+    if getattr(settings, 'FINANCE_REPORT_JOBS_IN_PROCESS', True):
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_worker, job.pk))
+    return job
+
+
+def run_worker(max_workers, stop_when_idle=False, poll_interval=2.0, stop_event=None):
+    """
+    Drain the queue with a pool of worker threads until stopped. Jobs a
+    dead process left queued or running are claimable too, so this also
+    finishes what a restart of the in-process pool orphaned.
+    """
+    stop_event = stop_event or threading.Event()
+
+    def worker():
+        while not stop_event.is_set():
+            close_old_connections()
+            job_id = claim_next_job()
+            if job_id is None:
+                if stop_when_idle:
+                    break
+                stop_event.wait(poll_interval)
+                continue
+            execute_job(job_id)
+        close_old_connections()
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='finance-report')
+    futures = [pool.submit(worker) for _ in range(max_workers)]
+    try:
+        for future in futures:
+            future.result()
+    except KeyboardInterrupt:
+        stop_event.set()
+    finally:
+        pool.shutdown(wait=True)
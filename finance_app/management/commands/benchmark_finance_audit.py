@@ -0,0 +1,64 @@
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from finance_app import audit
+from finance_app.models import Expense
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Measure the audit log's per-mutation overhead on expense create/update/delete (changes are rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500)
+        parser.add_argument('--budget-ms', type=float, default=1.0,
+                            help="Fail if the overhead per mutation exceeds this")
+
+    def _mutations(self, iterations):
+        """Seconds spent on iterations x (create, update, delete)."""
+        started = time.perf_counter()
+        for i in range(iterations):
+            expense = Expense.objects.create(
+                payee=f'Benchmark {i}', amount=Decimal('10.00'), date=date(2000, 1, 1), category='benchmark'
+            )
+            expense.amount = Decimal('12.50')
+            expense.save()
+            expense.delete()
+        return time.perf_counter() - started
+
+    def _timed(self, iterations, suspended):
+        try:
+            with transaction.atomic():
+                if suspended:
+                    with audit.suspended():
+                        elapsed = self._mutations(iterations)
+                else:
+                    elapsed = self._mutations(iterations)
+                raise _Rollback
+        except _Rollback:
+            return elapsed
+
+    def handle(self, *args, **options):
+        iterations = max(1, options['iterations'])
+        mutations = iterations * 3
+        # Warm up connections and caches before measuring
+        self._timed(min(iterations, 20), suspended=False)
+
+        without_audit = self._timed(iterations, suspended=True)
+        with_audit = self._timed(iterations, suspended=False)
+        overhead_ms = (with_audit - without_audit) / mutations * 1000
+
+        self.stdout.write(f"Mutations:        {mutations}")
+        self.stdout.write(f"Without audit:    {without_audit / mutations * 1000:.3f} ms/mutation")
+        self.stdout.write(f"With audit:       {with_audit / mutations * 1000:.3f} ms/mutation")
+        message = f"Audit overhead:   {overhead_ms:.3f} ms/mutation (budget {options['budget_ms']} ms)"
+        if overhead_ms > options['budget_ms']:
+            raise CommandError(message)
+        self.stdout.write(self.style.SUCCESS(message))
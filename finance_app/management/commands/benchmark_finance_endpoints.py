@@ -0,0 +1,93 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from finance_app.benchmark import (
+    BUDGET_FILE, ENDPOINTS, SEED_SIZES, benchmark_context, load_query_budget, over_budget,
+    run_benchmarks, seed_ledger, seeded_rows
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway SQLite database with N ledger rows and report p50/p95 latency and SQL "
+        "query counts for every finance endpoint. Run with --settings=erp.settings_benchmark"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[SEED_SIZES[0]],
+                            help=f"Ledger sizes to seed, e.g. {' '.join(str(size) for size in SEED_SIZES)}")
+        parser.add_argument('--repeat', type=int, default=10, help="Requests per endpoint")
+        parser.add_argument('--endpoint', action='append', choices=sorted(ENDPOINTS), dest='endpoints',
+                            help="Only measure this url name (repeatable)")
+        parser.add_argument('--check', action='store_true',
+                            help=f"Fail if a query count exceeds {BUDGET_FILE.name}")
+        parser.add_argument('--update-budget', action='store_true',
+                            help=f"Write the measured query counts to {BUDGET_FILE.name}")
+        parser.add_argument('--output', help="Also write the measurements to this JSON file")
+        parser.add_argument('--keepdb', action='store_true',
+                            help="Keep the seeded database and reuse it when the row count matches")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("Benchmarks seed a throwaway SQLite database; use --settings=erp.settings_benchmark")
+        repeat = max(1, options['repeat'])
+
+        results = {}
+        for rows in options['rows']:
+            results[rows] = self._run(rows, repeat, options['endpoints'], options['keepdb'])
+            self._print(rows, results[rows])
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({str(rows): measured for rows, measured in results.items()}, output, indent=2)
+
+        # Query counts must not depend on the data size, so the worst one is what counts
+        worst = {}
+        for measured in results.values():
+            for name, result in measured.items():
+                worst[name] = max(worst.get(name, 0), result['queries'])
+
+        if options['update_budget']:
+            budget = load_query_budget() if BUDGET_FILE.exists() else {}
+            budget.update(worst)
+            with open(BUDGET_FILE, 'w') as budget_file:
+                json.dump(dict(sorted(budget.items())), budget_file, indent=2)
+                budget_file.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Updated {BUDGET_FILE}"))
+
+        if options['check']:
+            failures = over_budget({name: {'queries': queries} for name, queries in worst.items()}, load_query_budget())
+            if failures:
+                raise CommandError("Query budget exceeded: " + ', '.join(
+                    f"{name} {queries} > {allowed}" for name, queries, allowed in failures
+                ))
+            self.stdout.write(self.style.SUCCESS("All endpoints are within the query budget"))
+
+    def _run(self, rows, repeat, endpoints, keepdb):
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+        try:
+            if keepdb and seeded_rows() == rows:
+                context = benchmark_context()
+                self.stdout.write(f"Reusing {rows} seeded rows")
+            else:
+                if seeded_rows():
+                    raise CommandError("The kept benchmark database holds a different row count; rerun without --keepdb")
+                started = time.perf_counter()
+                context = seed_ledger(rows)
+                self.stdout.write(f"Seeded {rows} rows in {time.perf_counter() - started:.1f}s")
+            return run_benchmarks(context, repeat, endpoints)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+            teardown_test_environment()
+
+    def _print(self, rows, measured):
+        self.stdout.write(f"\n{rows} rows")
+        self.stdout.write(f"{'endpoint':<32}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}")
+        for name, result in measured.items():
+            self.stdout.write(f"{name:<32}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['queries']:>9}")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from finance_app.importer import DEFAULT_BATCH_SIZE, FORMATS, decode_lines, detect_format, import_ledger, read_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import incomes or expenses from a CSV or NDJSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or NDJSON file to import")
+        parser.add_argument('--kind', choices=['income', 'expense'], required=True)
+        parser.add_argument('--format', dest='file_format', choices=FORMATS,
+                            help="Defaults to the file extension, then csv")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        file_format = options['file_format'] or detect_format(options['path'])
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as handle:
+                result = import_ledger(
+                    options['kind'],
+                    read_rows(decode_lines(handle), file_format),
+                    batch_size=max(1, options['batch_size'])
+                )
+        except (OSError, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+
+        for error in result['errors'][:20]:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        if result['failed'] > 20:
+            self.stderr.write(f"... {result['failed'] - 20} more rows failed")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['created']} {options['kind']} rows, {result['failed']} failed"
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from finance_app.recurring import materialize_recurring_expenses
+
+
+class Command(BaseCommand):
+    help = "Create the expenses that recurring templates have due (run daily, e.g. from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', help="Materialize occurrences up to this date (YYYY-MM-DD), default today")
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options['as_of']:
+            as_of = parse_date(options['as_of'])
+            if as_of is None:
+                raise CommandError("--as-of must be a date in YYYY-MM-DD format")
+
+        result = materialize_recurring_expenses(as_of)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['created']} expenses from {result['templates']} recurring templates"
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from finance_app.budgets import refresh_budget_actuals
+from finance_app.models import BalanceSnapshot
+from finance_app.rollups import rebuild_rollups
+from finance_app.snapshots import fill_snapshots
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily income/expense rollup table (and budget actuals) from the raw ledger"
+
+    def handle(self, *args, **options):
+        created = rebuild_rollups()
+        # Snapshots are derived from the rollups; reads never fill them
+        BalanceSnapshot.objects.all().delete()
+        fill_snapshots()
+        corrected = refresh_budget_actuals()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {created} daily rollup rows, corrected {corrected} budget actuals"
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from finance_app.jobs import run_worker
+
+
+class Command(BaseCommand):
+    help = "Generate queued finance report jobs using a pool of worker threads"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--poll-interval', type=float, default=2.0)
+        parser.add_argument('--once', action='store_true',
+                            help="Exit when the queue is empty instead of polling")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Processing report jobs with {options['workers']} workers")
+        run_worker(
+            max(1, options['workers']),
+            stop_when_idle=options['once'],
+            poll_interval=options['poll_interval']
+        )
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:49
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_rollups(apps, schema_editor):
+    DailyFinanceRollup = apps.get_model('finance_app', 'DailyFinanceRollup')
+    for kind, model_name in (('income', 'Income'), ('expense', 'Expense')):
+        model = apps.get_model('finance_app', model_name)
+        rows = (
+            model.objects.values('date', 'category')
+            .annotate(total=Sum('amount'), entry_count=Count('id'))
+            .order_by()
+        )
+        DailyFinanceRollup.objects.bulk_create([
+            DailyFinanceRollup(
+                kind=kind,
+                day=row['date'],
+                category=row['category'],
+                total=row['total'],
+                entry_count=row['entry_count']
+            )
+            for row in rows
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_app', '0003_reporthistory_expense_expense_type_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyFinanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('kind', models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], max_length=10)),
+                ('category', models.CharField(max_length=100)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('entry_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['day'],
+                'unique_together': {('kind', 'day', 'category')},
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_app', '0004_dailyfinancerollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_end', models.DateField(unique=True)),
+                ('total_income', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('total_expenses', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-period_end'],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:56
+
+import hashlib
+import json
+import zlib
+
+import django.db.models.deletion
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+
+
+def move_report_data_to_payloads(apps, schema_editor):
+    ReportHistory = apps.get_model('finance_app', 'ReportHistory')
+    ReportPayload = apps.get_model('finance_app', 'ReportPayload')
+    for report in ReportHistory.objects.all().iterator():
+        canonical = json.dumps(report.report_data or {}, sort_keys=True, separators=(',', ':'), cls=DjangoJSONEncoder).encode()
+        digest = hashlib.sha256(canonical).hexdigest()
+        payload, _ = ReportPayload.objects.get_or_create(
+            digest=digest,
+            defaults={'data': zlib.compress(canonical, 6), 'size': len(canonical)}
+        )
+        report.payload = payload
+        report.save(update_fields=['payload'])
+
+
+def restore_report_data(apps, schema_editor):
+    ReportHistory = apps.get_model('finance_app', 'ReportHistory')
+    for report in ReportHistory.objects.exclude(payload=None).select_related('payload').iterator():
+        report.report_data = json.loads(zlib.decompress(report.payload.data))
+        report.save(update_fields=['report_data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_app', '0006_reportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportPayload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='reporthistory',
+            name='payload',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='reports', to='finance_app.reportpayload'),
+        ),
+        migrations.RunPython(move_report_data_to_payloads, restore_report_data),
+        migrations.RemoveField(
+            model_name='reporthistory',
+            name='report_data',
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_app', '0008_ledger_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Budget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=100)),
+                ('period', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('actual_amount', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['period', 'category'],
+                'unique_together': {('period', 'category')},
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_app', '0009_budget'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringExpense',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payee', models.CharField(max_length=255)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('category', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('expense_type', models.CharField(blank=True, max_length=100, null=True)),
+                ('payment_method', models.CharField(blank=True, max_length=100, null=True)),
+                ('frequency', models.CharField(choices=[('daily', 'Daily'), ('weekly', 'Weekly'), ('monthly', 'Monthly'), ('quarterly', 'Quarterly'), ('yearly', 'Yearly')], default='monthly', max_length=20)),
+                ('interval', models.PositiveIntegerField(default=1)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('materialized_through', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['payee'],
+            },
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='recurring_template',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='finance_app.recurringexpense'),
+        ),
+        migrations.AddConstraint(
+            model_name='expense',
+            constraint=models.UniqueConstraint(fields=('recurring_template', 'date'), name='fin_expense_recurring_once'),
+        ),
+    ]
@@ -0,0 +1,139 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:09
+
+import re
+from collections import defaultdict
+from datetime import timedelta
+
+import django.db.models.deletion
+from dateutil.relativedelta import relativedelta
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+# Frozen copy of finance_app.models.normalize_category
+_CATEGORY_SEPARATORS = re.compile(r'[\s\-]+')
+
+
+def _normalize(value):
+    return _CATEGORY_SEPARATORS.sub('_', (value or '').strip().lower())
+
+
+def normalize_categories(apps, schema_editor):
+    FinanceCategory = apps.get_model('finance_app', 'FinanceCategory')
+    FinanceCategoryClosure = apps.get_model('finance_app', 'FinanceCategoryClosure')
+    DailyFinanceRollup = apps.get_model('finance_app', 'DailyFinanceRollup')
+    Budget = apps.get_model('finance_app', 'Budget')
+    RecurringExpense = apps.get_model('finance_app', 'RecurringExpense')
+
+    ledgers = (('income', apps.get_model('finance_app', 'Income')), ('expense', apps.get_model('finance_app', 'Expense')))
+    for kind, model in ledgers:
+        # Most common spelling first, so it becomes the display name
+        raw_values = list(
+            model.objects.values('category').annotate(entries=Count('id'))
+            .order_by('-entries', 'category').values_list('category', flat=True)
+        )
+        if kind == 'expense':
+            raw_values += list(Budget.objects.values_list('category', flat=True).distinct())
+            raw_values += list(RecurringExpense.objects.values_list('category', flat=True).distinct())
+        names = {}
+        for raw in raw_values:
+            if _normalize(raw):
+                names.setdefault(_normalize(raw), raw.strip())
+        for slug, name in names.items():
+            category = FinanceCategory.objects.create(kind=kind, slug=slug, name=name)
+            FinanceCategoryClosure.objects.create(ancestor=category, descendant=category, depth=0)
+        ids = dict(FinanceCategory.objects.filter(kind=kind).values_list('slug', 'id'))
+        for raw in set(raw_values):
+            slug = _normalize(raw)
+            model.objects.filter(category=raw).update(category=slug, category_ref_id=ids.get(slug))
+
+        # Variants of one category now share a key, so rebuild the rollup rows
+        DailyFinanceRollup.objects.filter(kind=kind).delete()
+        rows = (
+            model.objects.values('date', 'category', 'category_ref')
+            .annotate(total=Sum('amount'), entry_count=Count('id'))
+            .order_by()
+        )
+        DailyFinanceRollup.objects.bulk_create([
+            DailyFinanceRollup(
+                kind=kind,
+                day=row['date'],
+                category=row['category'],
+                category_ref_id=row['category_ref'],
+                total=row['total'],
+                entry_count=row['entry_count']
+            )
+            for row in rows
+        ], batch_size=1000)
+
+    for raw in set(RecurringExpense.objects.values_list('category', flat=True)):
+        RecurringExpense.objects.filter(category=raw).update(category=_normalize(raw))
+
+    # Budgets whose categories collapse into one key are merged
+    merged = defaultdict(list)
+    for budget in Budget.objects.order_by('pk'):
+        merged[(budget.period, _normalize(budget.category))].append(budget)
+    for (period, slug), budgets in merged.items():
+        keep = budgets[0]
+        keep.amount = sum(budget.amount for budget in budgets)
+        Budget.objects.filter(pk__in=[budget.pk for budget in budgets[1:]]).delete()
+        keep.category = slug
+        keep.actual_amount = DailyFinanceRollup.objects.filter(
+            kind='expense', category=slug,
+            day__gte=period, day__lte=period + relativedelta(months=1) - timedelta(days=1)
+        ).aggregate(total=Sum('total'))['total'] or 0
+        keep.save(update_fields=['amount', 'category', 'actual_amount'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_app', '0011_financeauditlog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinanceCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], max_length=10)),
+                ('slug', models.CharField(max_length=100)),
+                ('name', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='children', to='finance_app.financecategory')),
+            ],
+            options={
+                'verbose_name_plural': 'finance categories',
+                'ordering': ['kind', 'name'],
+                'unique_together': {('kind', 'slug')},
+            },
+        ),
+        migrations.AddField(
+            model_name='dailyfinancerollup',
+            name='category_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='rollups', to='finance_app.financecategory'),
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='category_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='expenses', to='finance_app.financecategory'),
+        ),
+        migrations.AddField(
+            model_name='income',
+            name='category_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='incomes', to='finance_app.financecategory'),
+        ),
+        migrations.CreateModel(
+            name='FinanceCategoryClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='finance_app.financecategory')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='finance_app.financecategory')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'ancestor'], name='fin_category_closure_desc_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.RunPython(normalize_categories, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_app', '0012_financecategory'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='dailyfinancerollup',
+            unique_together={('kind', 'day', 'category_ref')},
+        ),
+        migrations.RemoveField(
+            model_name='dailyfinancerollup',
+            name='category',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_app', '0013_rollup_category_ref_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailyfinancerollup',
+            index=models.Index(fields=['day', 'kind', 'category_ref', 'total'], name='fin_rollup_day_idx'),
+        ),
+    ]
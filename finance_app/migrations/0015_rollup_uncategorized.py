@@ -0,0 +1,52 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def file_uncategorized_rollups(apps, schema_editor):
+    FinanceCategory = apps.get_model('finance_app', 'FinanceCategory')
+    FinanceCategoryClosure = apps.get_model('finance_app', 'FinanceCategoryClosure')
+    DailyFinanceRollup = apps.get_model('finance_app', 'DailyFinanceRollup')
+
+    for kind in ('income', 'expense'):
+        category, _ = FinanceCategory.objects.get_or_create(kind=kind, slug='', defaults={'name': 'Uncategorized'})
+        FinanceCategoryClosure.objects.get_or_create(ancestor=category, descendant=category, defaults={'depth': 0})
+
+        # NULL never collided in the unique key, so one day may have several
+        # uncategorized rows; they are merged into one
+        uncategorized = DailyFinanceRollup.objects.filter(kind=kind, category_ref__isnull=True)
+        rows = list(
+            uncategorized.values('day')
+            .annotate(total=Sum('total'), entry_count=Sum('entry_count'))
+            .order_by()
+        )
+        uncategorized.delete()
+        DailyFinanceRollup.objects.bulk_create([
+            DailyFinanceRollup(
+                kind=kind,
+                day=row['day'],
+                category_ref=category,
+                total=row['total'],
+                entry_count=row['entry_count']
+            )
+            for row in rows
+            if row['entry_count'] > 0
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_app', '0014_rollup_day_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(file_uncategorized_rollups, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='dailyfinancerollup',
+            name='category_ref',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='rollups', to='finance_app.financecategory'),
+        ),
+    ]
@@ -1,5 +1,156 @@
 # models.py
-from django.db import models
+import hashlib
+import json
+import re
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+_CATEGORY_SEPARATORS = re.compile(r'[\s\-]+')
+
+# Slug of each kind's catch-all category, which daily rollups file ledger
+# rows without a category under (see FinanceCategoryManager.uncategorized_id)
+UNCATEGORIZED_SLUG = ''
+
+
+def normalize_category(value):
+    """
+    'Office Supplies', ' office-supplies ' and 'office_supplies' are one
+    category. Income/Expense.category is stored in this form, so a submitted
+    'Office Supplies' reads back as 'office_supplies'; category_ref is the
+    FinanceCategory it resolves to.
+    """
+    return _CATEGORY_SEPARATORS.sub('_', (value or '').strip().lower())
+
+
+class FinanceCategoryManager(models.Manager):
+    def ids_for(self, kind, names, create=True):
+        """
+        Map category strings to FinanceCategory ids for one kind in a single
+        lookup, creating the missing categories when create is set.
+        """
+        slugs = {normalize_category(name): name for name in names if name}
+        ids = dict(self.filter(kind=kind, slug__in=slugs).values_list('slug', 'id'))
+        missing = [slug for slug in slugs if slug not in ids]
+        if missing and create:
+            self.bulk_create(
+                [FinanceCategory(kind=kind, slug=slug, name=slugs[slug].strip()) for slug in missing],
+                ignore_conflicts=True
+            )
+            created = self.filter(kind=kind, slug__in=missing)
+            FinanceCategoryClosure.objects.bulk_create(
+                [FinanceCategoryClosure(ancestor=category, descendant=category, depth=0) for category in created],
+                ignore_conflicts=True
+            )
+            ids.update(created.values_list('slug', 'id'))
+        return {name: ids.get(normalize_category(name)) for name in names if name}
+
+    def uncategorized_id(self, kind):
+        """
+        Id of the kind's catch-all category. A NULL category_ref would never
+        collide in the rollup's (kind, day, category_ref) key, so rollups use
+        this one instead.
+        """
+        category_id = self.filter(kind=kind, slug=UNCATEGORIZED_SLUG).values_list('id', flat=True).first()
+        if category_id is None:
+            # Normally created by migration 0015; save() would derive the
+            # slug from the name
+            self.bulk_create(
+                [FinanceCategory(kind=kind, slug=UNCATEGORIZED_SLUG, name='Uncategorized')], ignore_conflicts=True
+            )
+            category_id = self.filter(kind=kind, slug=UNCATEGORIZED_SLUG).values_list('id', flat=True).get()
+            FinanceCategoryClosure.objects.bulk_create(
+                [FinanceCategoryClosure(ancestor_id=category_id, descendant_id=category_id, depth=0)],
+                ignore_conflicts=True
+            )
+        return category_id
+
+    def assign(self, kind, entries):
+        """Normalize .category and set .category_ref_id on unsaved ledger rows."""
+        ids = self.ids_for(kind, {entry.category for entry in entries})
+        for entry in entries:
+            entry.category_ref_id = ids.get(entry.category)
+            entry.category = normalize_category(entry.category)
+
+
+class FinanceCategory(models.Model):
+    KIND_CHOICES = [
+        ('income', 'Income'),
+        ('expense', 'Expense'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Normalized key stored in Income/Expense.category for API compatibility
+    slug = models.CharField(max_length=100)
+    name = models.CharField(max_length=100)
+    parent = models.ForeignKey('self', on_delete=models.PROTECT, null=True, blank=True, related_name='children')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = FinanceCategoryManager()
+
+    class Meta:
+        ordering = ['kind', 'name']
+        unique_together = ('kind', 'slug')
+        verbose_name_plural = 'finance categories'
+
+    def save(self, *args, **kwargs):
+        self.slug = normalize_category(self.slug or self.name)
+        if self.parent_id:
+            if self.parent.kind != self.kind:
+                raise ValueError("A category's parent must be of the same kind")
+            if self.pk and FinanceCategoryClosure.objects.filter(ancestor_id=self.pk, descendant_id=self.parent_id).exists():
+                raise ValueError("A category cannot be moved under itself or one of its subcategories")
+
+        with transaction.atomic():
+            previous_parent = None
+            is_new = self.pk is None
+            if not is_new:
+                previous_parent = FinanceCategory.objects.filter(pk=self.pk).values_list('parent_id', flat=True).first()
+            super().save(*args, **kwargs)
+            if is_new:
+                FinanceCategoryClosure.objects.create(ancestor=self, descendant=self, depth=0)
+                self._link_subtree()
+            elif previous_parent != self.parent_id:
+                self._unlink_subtree()
+                self._link_subtree()
+
+    def _unlink_subtree(self):
+        """Drop links from this node's former ancestors into its subtree."""
+        subtree = FinanceCategoryClosure.objects.filter(ancestor=self).values('descendant')
+        FinanceCategoryClosure.objects.filter(descendant__in=subtree).exclude(ancestor__in=subtree).delete()
+
+    def _link_subtree(self):
+        """Link every ancestor of the parent to every node of this subtree."""
+        if not self.parent_id:
+            return
+        ancestors = list(FinanceCategoryClosure.objects.filter(descendant_id=self.parent_id).values_list('ancestor_id', 'depth'))
+        subtree = list(FinanceCategoryClosure.objects.filter(ancestor=self).values_list('descendant_id', 'depth'))
+        FinanceCategoryClosure.objects.bulk_create([
+            FinanceCategoryClosure(ancestor_id=ancestor, descendant_id=descendant, depth=up + down + 1)
+            for ancestor, up in ancestors
+            for descendant, down in subtree
+        ])
+
+    def __str__(self):
+        return f"{self.name} ({self.kind})"
+
+
+class FinanceCategoryClosure(models.Model):
+    """One row per (ancestor, descendant) pair, including each node with itself."""
+    ancestor = models.ForeignKey(FinanceCategory, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(FinanceCategory, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('ancestor', 'descendant')
+        indexes = [
+            models.Index(fields=['descendant', 'ancestor'], name='fin_category_closure_desc_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
 
 class Income(models.Model):
     source = models.CharField(max_length=255)
@@ -7,12 +158,20 @@ class Income(models.Model):
     date = models.DateField()
     description = models.TextField(blank=True, null=True)
     category = models.CharField(max_length=100)
+    category_ref = models.ForeignKey(FinanceCategory, on_delete=models.PROTECT, null=True, blank=True, related_name='incomes')
     reference_number = models.CharField(max_length=100, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-date']
+        indexes = [
+            # Date-range scans that group by category and sum amounts never touch the table
+            models.Index(fields=['date', 'category', 'amount'], name='fin_income_date_cat_amt_idx'),
+            # Category-filtered listings and keyset pagination on (-date, -id)
+            models.Index(fields=['category', 'date'], name='fin_income_cat_date_idx'),
+            models.Index(fields=['date', 'id'], name='fin_income_date_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.source} - ${self.amount}"
@@ -23,17 +182,68 @@ class Expense(models.Model):
     date = models.DateField()
     description = models.TextField(blank=True, null=True)
     category = models.CharField(max_length=100)
+    category_ref = models.ForeignKey(FinanceCategory, on_delete=models.PROTECT, null=True, blank=True, related_name='expenses')
     expense_type = models.CharField(max_length=100, blank=True, null=True)
     payment_method = models.CharField(max_length=100, blank=True, null=True)
+    # Set on rows materialized from a RecurringExpense template
+    recurring_template = models.ForeignKey(
+        'RecurringExpense', on_delete=models.SET_NULL, null=True, blank=True, related_name='occurrences'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-date']
+        indexes = [
+            # Date-range scans that group by category and sum amounts never touch the table
+            models.Index(fields=['date', 'category', 'amount'], name='fin_expense_date_cat_amt_idx'),
+            # Category-filtered listings and keyset pagination on (-date, -id)
+            models.Index(fields=['category', 'date'], name='fin_expense_cat_date_idx'),
+            models.Index(fields=['date', 'id'], name='fin_expense_date_id_idx'),
+        ]
+        constraints = [
+            # A template produces at most one expense per occurrence date
+            models.UniqueConstraint(fields=['recurring_template', 'date'], name='fin_expense_recurring_once'),
+        ]
     
     def __str__(self):
         return f"{self.payee} - ${self.amount}"
 
+class ReportPayloadManager(models.Manager):
+    def store(self, data):
+        """Return the payload row for data, creating it only if no identical payload exists."""
+        canonical = canonical_report_json(data)
+        digest = hashlib.sha256(canonical).hexdigest()
+        payload = self.filter(digest=digest).first()
+        if payload:
+            return payload
+        try:
+            with transaction.atomic():
+                return self.create(digest=digest, data=zlib.compress(canonical, 6), size=len(canonical))
+        except IntegrityError:
+            return self.get(digest=digest)
+
+
+def canonical_report_json(data):
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), cls=DjangoJSONEncoder).encode()
+
+
+class ReportPayload(models.Model):
+    # Content-addressed, zlib-compressed report JSON shared by identical reports
+    digest = models.CharField(max_length=64, unique=True)
+    data = models.BinaryField()
+    size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ReportPayloadManager()
+
+    def load(self):
+        return json.loads(zlib.decompress(self.data))
+
+    def __str__(self):
+        return f"Report payload {self.digest[:12]} ({self.size} bytes)"
+
+
 class ReportHistory(models.Model):
     report_name = models.CharField(max_length=255)
     report_type = models.CharField(max_length=100)
@@ -41,10 +251,208 @@ class ReportHistory(models.Model):
     end_date = models.DateField()
     created_at = models.DateTimeField(auto_now_add=True)
     report_summary = models.TextField(blank=True, null=True)
-    report_data = models.JSONField(default=dict, blank=True)
+    payload = models.ForeignKey(ReportPayload, on_delete=models.PROTECT, null=True, blank=True, related_name='reports')
     
     class Meta:
         ordering = ['-created_at']
+
+    @property
+    def report_data(self):
+        pending = getattr(self, '_pending_report_data', None)
+        if pending is not None:
+            return pending
+        return self.payload.load() if self.payload_id else {}
+
+    @report_data.setter
+    def report_data(self, value):
+        self._pending_report_data = value if value is not None else {}
+
+    def save(self, *args, **kwargs):
+        pending = getattr(self, '_pending_report_data', None)
+        if pending is not None:
+            self.payload = ReportPayload.objects.store(pending)
+            self._pending_report_data = None
+        super().save(*args, **kwargs)
     
     def __str__(self):
-        return f"{self.report_name} ({self.start_date} to {self.end_date})"
\ No newline at end of file
+        return f"{self.report_name} ({self.start_date} to {self.end_date})"
+
+class DailyFinanceRollup(models.Model):
+    KIND_CHOICES = [
+        ('income', 'Income'),
+        ('expense', 'Expense'),
+    ]
+
+    day = models.DateField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Grouped on the integer id; the slug is looked up once per response.
+    # Ledger rows without a category roll up under the kind's uncategorized
+    # category, so the column is never NULL and the key stays unique
+    category_ref = models.ForeignKey(FinanceCategory, on_delete=models.PROTECT, related_name='rollups')
+    total = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    entry_count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['day']
+        unique_together = ('kind', 'day', 'category_ref')
+        indexes = [
+            # Summary, cash flow, forecast and reports read both kinds over a
+            # day range; covering, so they never touch the table rows
+            models.Index(fields=['day', 'kind', 'category_ref', 'total'], name='fin_rollup_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.kind} {self.category_ref_id}: {self.total}"
+
+
+class BalanceSnapshot(models.Model):
+    # Cumulative ledger totals for every entry dated on or before period_end
+    period_end = models.DateField(unique=True)
+    total_income = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    total_expenses = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-period_end']
+
+    def __str__(self):
+        return f"Balance as of {self.period_end}"
+
+
+class ReportJob(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    report_name = models.CharField(max_length=255, blank=True)
+    report_type = models.CharField(max_length=100, default='income_statement')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    error = models.TextField(blank=True, null=True)
+    report = models.ForeignKey(ReportHistory, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.report_type} job #{self.pk} ({self.status})"
+
+
+class Budget(models.Model):
+    category = models.CharField(max_length=100)
+    # First day of the budgeted month
+    period = models.DateField()
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    # Expenses booked against category in the period, kept current by finance_app.signals
+    actual_amount = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['period', 'category']
+        unique_together = ('period', 'category')
+
+    def save(self, *args, **kwargs):
+        if self.period:
+            self.period = self._meta.get_field('period').to_python(self.period).replace(day=1)
+        self.category = normalize_category(self.category)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.category} {self.period:%b %Y}: ${self.amount}"
+
+
+class RecurringExpense(models.Model):
+    FREQUENCY_CHOICES = [
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+        ('quarterly', 'Quarterly'),
+        ('yearly', 'Yearly'),
+    ]
+
+    payee = models.CharField(max_length=255)
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    category = models.CharField(max_length=100)
+    description = models.TextField(blank=True, null=True)
+    expense_type = models.CharField(max_length=100, blank=True, null=True)
+    payment_method = models.CharField(max_length=100, blank=True, null=True)
+    frequency = models.CharField(max_length=20, choices=FREQUENCY_CHOICES, default='monthly')
+    # Every `interval` frequency units, e.g. monthly with interval 2 is bi-monthly
+    interval = models.PositiveIntegerField(default=1)
+    start_date = models.DateField()
+    end_date = models.DateField(blank=True, null=True)
+    is_active = models.BooleanField(default=True)
+    # Occurrences up to this date have been materialized into Expense
+    materialized_through = models.DateField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['payee']
+
+    def save(self, *args, **kwargs):
+        self.category = normalize_category(self.category)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.payee} - ${self.amount} ({self.frequency})"
+
+
+class FinanceAuditLogQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        raise TypeError("Finance audit log entries are append-only")
+
+    def delete(self):
+        raise TypeError("Finance audit log entries are append-only")
+
+
+class FinanceAuditLog(models.Model):
+    ACTION_CREATE = 'create'
+    ACTION_UPDATE = 'update'
+    ACTION_DELETE = 'delete'
+    ACTION_CHOICES = [
+        (ACTION_CREATE, 'Create'),
+        (ACTION_UPDATE, 'Update'),
+        (ACTION_DELETE, 'Delete'),
+    ]
+
+    entity = models.CharField(max_length=50)
+    entity_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # create: {field: value}, update: {field: [before, after]}, delete: {field: value}
+    changes = models.JSONField(encoder=DjangoJSONEncoder, default=dict)
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    objects = FinanceAuditLogQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-timestamp', '-id']
+        indexes = [
+            models.Index(fields=['entity', 'entity_id', 'timestamp'], name='fin_audit_entity_time_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise TypeError("Finance audit log entries are append-only")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise TypeError("Finance audit log entries are append-only")
+
+    def __str__(self):
+        return f"{self.action} {self.entity} #{self.entity_id} at {self.timestamp}"
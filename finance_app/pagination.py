@@ -0,0 +1,130 @@
+import base64
+import binascii
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidQuery(ValueError):
+    """Raised when list/filter query params cannot be applied."""
+
+
+def parse_date_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise InvalidQuery(f"{name} must be a date in YYYY-MM-DD format")
+    return parsed
+
+
+def _parse_amount_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise InvalidQuery(f"{name} must be a valid number")
+
+
+def filter_ledger(queryset, params, party_field):
+    """
+    Apply the shared ledger filters (date range, category, payee/source and
+    amount range) to an Income or Expense queryset.
+    """
+    start_date = parse_date_param(params, 'start_date')
+    end_date = parse_date_param(params, 'end_date')
+    min_amount = _parse_amount_param(params, 'min_amount')
+    max_amount = _parse_amount_param(params, 'max_amount')
+
+    if start_date:
+        queryset = queryset.filter(date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(date__lte=end_date)
+    if min_amount is not None:
+        queryset = queryset.filter(amount__gte=min_amount)
+    if max_amount is not None:
+        queryset = queryset.filter(amount__lte=max_amount)
+
+    # Several categories can be requested as a comma separated list
+    category = params.get('category')
+    if category:
+        categories = [c.strip() for c in category.split(',') if c.strip()]
+        queryset = queryset.filter(category__in=categories)
+
+    party = params.get(party_field)
+    if party:
+        queryset = queryset.filter(**{f'{party_field}__icontains': party})
+
+    return queryset
+
+
+def wants_page(params):
+    """Pagination is opt-in so existing clients keep receiving a plain list."""
+    return 'limit' in params or 'cursor' in params
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidQuery("Invalid cursor")
+    if not isinstance(values, list) or len(values) != 2:
+        raise InvalidQuery("Invalid cursor")
+    return values
+
+
+def paginate_keyset(queryset, params, order_field='date'):
+    """
+    Keyset pagination ordered on (-order_field, -id).
+
+    The cursor carries the (order_field, id) of the last row on the previous
+    page, so every page is a single index range scan regardless of depth.
+    Returns (rows, next_cursor, limit).
+    """
+    try:
+        limit = int(params.get('limit') or DEFAULT_PAGE_SIZE)
+    except ValueError:
+        raise InvalidQuery("limit must be an integer")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    queryset = queryset.order_by(f'-{order_field}', '-id')
+
+    token = params.get('cursor')
+    if token:
+        raw_value, last_id = decode_cursor(token)
+        field = queryset.model._meta.get_field(order_field)
+        try:
+            last_value = field.to_python(raw_value)
+            last_id = int(last_id)
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidQuery("Invalid cursor")
+        queryset = queryset.filter(
+            Q(**{f'{order_field}__lt': last_value}) |
+            Q(**{order_field: last_value, 'id__lt': last_id})
+        )
+
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, order_field).isoformat(), last.pk])
+    return rows, next_cursor, limit
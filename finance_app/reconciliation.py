@@ -0,0 +1,111 @@
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+from functools import lru_cache
+
+from .rollups import LEDGER_MODELS
+
+DEFAULT_WINDOW_DAYS = 3
+MAX_WINDOW_DAYS = 31
+
+PARTY_FIELDS = {
+    'income': 'source',
+    'expense': 'payee',
+}
+
+# Legal-form suffixes that bank feeds add or drop at will
+_PARTY_NOISE = {'inc', 'incorporated', 'llc', 'ltd', 'limited', 'co', 'corp', 'corporation', 'company', 'plc', 'the'}
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+MATCH_REFERENCE = 'reference'
+MATCH_AMOUNT_PARTY_DATE = 'amount_party_date'
+
+
+@lru_cache(maxsize=65536)
+def normalize_party(value):
+    """'ACME, Inc.' and 'acme inc' both become 'acme'."""
+    tokens = _NON_ALNUM.sub(' ', (value or '').lower()).split()
+    return ' '.join(token for token in tokens if token not in _PARTY_NOISE)
+
+
+def _normalize_reference(value):
+    return _NON_ALNUM.sub('', (value or '').lower())
+
+
+class _Bucket:
+    """Rows sharing a hash key, sorted by date for window lookups."""
+
+    def __init__(self):
+        self.rows = []
+        self.dates = None
+
+    def add(self, row):
+        self.rows.append(row)
+
+    def freeze(self):
+        self.rows.sort(key=lambda row: (row[1], row[0]))
+        self.dates = [row[1] for row in self.rows]
+
+    def near(self, day, window):
+        last = day + window
+        for index in range(bisect_left(self.dates, day - window), len(self.rows)):
+            if self.dates[index] > last:
+                break
+            yield self.rows[index]
+
+
+def find_duplicate_pairs(kind, start_date, end_date, window_days=DEFAULT_WINDOW_DAYS, created_since=None):
+    """
+    Candidate duplicates among entries dated in [start_date, end_date]
+    (optionally only those created since a given time, e.g. one import
+    batch). Rows are matched against every entry within window_days by
+    hashing them into (amount, normalized party) and (amount, reference)
+    buckets, so the work grows with the number of rows, not with pairs.
+
+    Returns (pairs, candidate_count); each pair is
+    (first_id, second_id, match, day_difference) with first_id < second_id.
+    """
+    model = LEDGER_MODELS[kind]
+    party_field = PARTY_FIELDS[kind]
+    has_reference = any(field.name == 'reference_number' for field in model._meta.fields)
+    window = timedelta(days=window_days)
+
+    fields = ['id', 'date', 'amount', party_field, 'created_at']
+    if has_reference:
+        fields.append('reference_number')
+    rows = model.objects.filter(
+        date__gte=start_date - window, date__lte=end_date + window
+    ).values_list(*fields).order_by()
+
+    by_party = defaultdict(_Bucket)
+    by_reference = defaultdict(_Bucket)
+    candidates = []
+    for values in rows.iterator(chunk_size=5000):
+        pk, day, amount, party, created_at = values[:5]
+        row = (pk, day)
+        party = normalize_party(party)
+        by_party[(amount, party)].add(row)
+        reference = _normalize_reference(values[5]) if has_reference else ''
+        if reference:
+            by_reference[(amount, reference)].add(row)
+        if start_date <= day <= end_date and (created_since is None or created_at >= created_since):
+            candidates.append((pk, day, amount, party, reference))
+
+    for bucket in list(by_party.values()) + list(by_reference.values()):
+        bucket.freeze()
+
+    pairs = {}
+    for pk, day, amount, party, reference in candidates:
+        if reference:
+            for other_pk, other_day in by_reference[(amount, reference)].near(day, window):
+                if other_pk != pk:
+                    key = (min(pk, other_pk), max(pk, other_pk))
+                    pairs[key] = (MATCH_REFERENCE, abs((other_day - day).days))
+        for other_pk, other_day in by_party[(amount, party)].near(day, window):
+            key = (min(pk, other_pk), max(pk, other_pk))
+            if other_pk != pk and key not in pairs:
+                pairs[key] = (MATCH_AMOUNT_PARTY_DATE, abs((other_day - day).days))
+
+    ordered = sorted(pairs.items(), key=lambda item: (item[0][1], item[0][0]), reverse=True)
+    return [(first, second, match, days) for (first, second), (match, days) in ordered], len(candidates)
@@ -0,0 +1,121 @@
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Expense, FinanceCategory, RecurringExpense
+from .rollups import KIND_EXPENSE
+from .signals import bulk_insert
+
+FREQUENCY_STEPS = {
+    'daily': lambda n: timedelta(days=n),
+    'weekly': lambda n: timedelta(weeks=n),
+    'monthly': lambda n: relativedelta(months=n),
+    'quarterly': lambda n: relativedelta(months=3 * n),
+    'yearly': lambda n: relativedelta(years=n),
+}
+
+
+def _months_between(start, day):
+    return (day.year - start.year) * 12 + day.month - start.month
+
+
+# Whole frequency units from start to day, counted on the calendar
+ELAPSED_UNITS = {
+    'daily': lambda start, day: (day - start).days,
+    'weekly': lambda start, day: (day - start).days // 7,
+    'monthly': _months_between,
+    'quarterly': lambda start, day: _months_between(start, day) // 3,
+    'yearly': lambda start, day: day.year - start.year,
+}
+
+BATCH_SIZE = 1000
+
+
+def _first_index(template, after_date):
+    """
+    An occurrence index at or before the first one past after_date. The
+    calendar estimate is stepped back once, which keeps it on or before
+    after_date however month lengths fall; the caller walks forward.
+    """
+    if after_date is None:
+        return 0
+    elapsed = ELAPSED_UNITS[template.frequency](template.start_date, after_date)
+    return max(elapsed // template.interval - 1, 0)
+
+
+def occurrence_dates(template, after_date, through_date):
+    """
+    Occurrence dates in (after_date, through_date]. Each one is computed from
+    start_date rather than the previous occurrence, so month-end schedules
+    don't drift (Jan 31 -> Feb 29 -> Mar 31); occurrences up to after_date
+    are skipped rather than generated.
+    """
+    step = FREQUENCY_STEPS[template.frequency]
+    last = through_date if template.end_date is None else min(through_date, template.end_date)
+    dates = []
+    index = _first_index(template, after_date)
+    while True:
+        occurrence = template.start_date + step(index * template.interval)
+        if occurrence > last:
+            return dates
+        if after_date is None or occurrence > after_date:
+            dates.append(occurrence)
+        index += 1
+
+
+def _occurrence(template, occurrence_date):
+    return Expense(
+        payee=template.payee,
+        amount=template.amount,
+        date=occurrence_date,
+        description=template.description or '',
+        category=template.category,
+        expense_type=template.expense_type or '',
+        payment_method=template.payment_method or '',
+        recurring_template=template
+    )
+
+
+def materialize_recurring_expenses(as_of=None, templates=None):
+    """
+    Create every due occurrence of the active templates up to as_of in one
+    transaction and one bulk_create. Occurrences that already exist are
+    skipped, so running it twice (or after downtime) is safe.
+    """
+    as_of = as_of or date.today()
+    templates = RecurringExpense.objects.all() if templates is None else templates
+
+    with transaction.atomic():
+        # Locking the templates serializes concurrent runs
+        due = list(
+            templates.select_for_update()
+            .filter(is_active=True, start_date__lte=as_of)
+            .filter(Q(materialized_through__isnull=True) | Q(materialized_through__lt=as_of))
+            .order_by('pk')
+        )
+        if not due:
+            return {'created': 0, 'templates': 0}
+
+        wanted = {
+            template.pk: occurrence_dates(template, template.materialized_through, as_of)
+            for template in due
+        }
+        first_date = min((dates[0] for dates in wanted.values() if dates), default=as_of)
+        existing = set(
+            Expense.objects.filter(recurring_template__in=wanted.keys(), date__gte=first_date)
+            .values_list('recurring_template_id', 'date')
+        )
+        expenses = [
+            _occurrence(template, occurrence_date)
+            for template in due
+            for occurrence_date in wanted[template.pk]
+            if (template.pk, occurrence_date) not in existing
+        ]
+
+        FinanceCategory.objects.assign(KIND_EXPENSE, expenses)
+        bulk_insert(Expense, expenses, batch_size=BATCH_SIZE)
+        RecurringExpense.objects.filter(pk__in=wanted.keys()).update(materialized_through=as_of)
+
+    return {'created': len(expenses), 'templates': len(due)}
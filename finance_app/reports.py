@@ -0,0 +1,241 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db.models import Case, IntegerField, Q, Sum, Value, When
+from django.utils.dateparse import parse_date
+
+from .cashflow import CASH_FLOW_PERIODS, bucket_starts
+from .models import DailyFinanceRollup
+from .pagination import InvalidQuery
+from .rollups import KIND_INCOME, KIND_EXPENSE, category_slugs, rollup_by_category
+from .summary import percent_change
+
+MAX_COMPARATIVE_PERIODS = 60
+
+ZERO = Decimal('0.00')
+
+
+def build_income_statement(start_date, end_date):
+    revenue_list = [
+        {'category': item['category'], 'amount': item['total']}
+        for item in rollup_by_category(KIND_INCOME, start_date, end_date)
+    ]
+    expense_list = [
+        {'category': item['category'], 'amount': item['total']}
+        for item in rollup_by_category(KIND_EXPENSE, start_date, end_date)
+    ]
+
+    total_revenue = sum(item['amount'] for item in revenue_list)
+    total_expenses = sum(item['amount'] for item in expense_list)
+
+    return {
+        'reportType': 'Income Statement',
+        'startDate': start_date.isoformat(),
+        'endDate': end_date.isoformat(),
+        'revenues': revenue_list,
+        'expenses': expense_list,
+        'totalRevenue': total_revenue,
+        'totalExpenses': total_expenses,
+        'netIncome': total_revenue - total_expenses,
+        'generatedAt': datetime.now().isoformat()
+    }
+
+
+def granular_periods(granularity, start_date, end_date):
+    """Split [start_date, end_date] into calendar buckets, clipped to the range."""
+    if granularity not in CASH_FLOW_PERIODS:
+        raise InvalidQuery("Invalid granularity parameter")
+    _, _, step, label = CASH_FLOW_PERIODS[granularity]
+    buckets = bucket_starts(granularity, start_date, end_date)
+    if len(buckets) > MAX_COMPARATIVE_PERIODS:
+        raise InvalidQuery(f"A comparative report covers at most {MAX_COMPARATIVE_PERIODS} periods")
+    return [
+        {
+            'label': label(bucket),
+            'start': max(bucket, start_date),
+            'end': min(bucket + step - timedelta(days=1), end_date),
+            'bucket': bucket,
+        }
+        for bucket in buckets
+    ]
+
+
+def _ordered_periods(periods):
+    if not periods:
+        raise InvalidQuery("At least one period is required")
+    if len(periods) > MAX_COMPARATIVE_PERIODS:
+        raise InvalidQuery(f"A comparative report covers at most {MAX_COMPARATIVE_PERIODS} periods")
+    for period in periods:
+        if period['start'] > period['end']:
+            raise InvalidQuery("Each period must start on or before its end")
+    ranges = sorted((period['start'], period['end']) for period in periods)
+    for (_, previous_end), (start, _) in zip(ranges, ranges[1:]):
+        if start <= previous_end:
+            raise InvalidQuery("Periods must not overlap")
+    return periods
+
+
+def _period_totals(periods, granularity):
+    """
+    One grouped query returning {(kind, category id, period index): total}.
+    Calendar buckets group on the truncated day; explicit periods are mapped
+    to their index with a CASE over the (non-overlapping) ranges.
+    """
+    start_date = min(period['start'] for period in periods)
+    end_date = max(period['end'] for period in periods)
+    queryset = DailyFinanceRollup.objects.filter(day__gte=start_date, day__lte=end_date)
+
+    if granularity:
+        trunc = CASH_FLOW_PERIODS[granularity][0]
+        index_of = {period['bucket']: index for index, period in enumerate(periods)}
+        rows = (
+            queryset.annotate(period=trunc('day'))
+            .values('kind', 'category_ref_id', 'period')
+            .annotate(amount=Sum('total'))
+            .order_by()
+        )
+        return {
+            (row['kind'], row['category_ref_id'], index_of[row['period']]): row['amount']
+            for row in rows
+            if row['period'] in index_of
+        }
+
+    in_periods = Q()
+    whens = []
+    for index, period in enumerate(periods):
+        in_periods |= Q(day__gte=period['start'], day__lte=period['end'])
+        whens.append(When(day__gte=period['start'], day__lte=period['end'], then=Value(index)))
+    rows = (
+        queryset.filter(in_periods)
+        .annotate(period=Case(*whens, output_field=IntegerField()))
+        .values('kind', 'category_ref_id', 'period')
+        .annotate(amount=Sum('total'))
+        .order_by()
+    )
+    return {(row['kind'], row['category_ref_id'], row['period']): row['amount'] for row in rows}
+
+
+def _matrix(totals, slugs, kind, period_count, include_totals, include_variance):
+    category_ids = sorted({category_id for row_kind, category_id, _ in totals if row_kind == kind}, key=slugs.get)
+    lines = []
+    for category_id in category_ids:
+        amounts = [totals.get((kind, category_id, index)) or ZERO for index in range(period_count)]
+        line = {'category': slugs[category_id], 'amounts': amounts}
+        if include_totals:
+            line['total'] = sum(amounts, ZERO)
+        if include_variance:
+            line.update(_variance(amounts))
+        lines.append(line)
+    lines.sort(key=lambda line: -sum(line['amounts'], ZERO))
+    return lines
+
+
+def _variance(amounts):
+    """Change against the previous column; the first column has nothing to compare to."""
+    return {
+        'variance': [None] + [current - previous for previous, current in zip(amounts, amounts[1:])],
+        'variancePercent': [None] + [
+            percent_change(current, previous) for previous, current in zip(amounts, amounts[1:])
+        ],
+    }
+
+
+def build_comparative_income_statement(start_date, end_date, granularity='monthly', periods=None,
+                                       include_totals=True, include_variance=True):
+    """
+    Category x period income statement. Pass either a range split by
+    granularity or an explicit list of {'start', 'end', 'label'} periods.
+    """
+    if periods:
+        periods = _ordered_periods(periods)
+        granularity = None
+    else:
+        if start_date > end_date:
+            raise InvalidQuery("start_date must be on or before end_date")
+        periods = granular_periods(granularity, start_date, end_date)
+
+    totals = _period_totals(periods, granularity)
+    slugs = category_slugs(category_id for _, category_id, _ in totals)
+    revenues = _matrix(totals, slugs, KIND_INCOME, len(periods), include_totals, include_variance)
+    expenses = _matrix(totals, slugs, KIND_EXPENSE, len(periods), include_totals, include_variance)
+
+    revenue_by_period = [sum((line['amounts'][i] for line in revenues), ZERO) for i in range(len(periods))]
+    expenses_by_period = [sum((line['amounts'][i] for line in expenses), ZERO) for i in range(len(periods))]
+    net_by_period = [revenue - expense for revenue, expense in zip(revenue_by_period, expenses_by_period)]
+    total_revenue = sum(revenue_by_period, ZERO)
+    total_expenses = sum(expenses_by_period, ZERO)
+
+    data = {
+        'reportType': 'Comparative Income Statement',
+        'granularity': granularity or 'custom',
+        'startDate': min(period['start'] for period in periods).isoformat(),
+        'endDate': max(period['end'] for period in periods).isoformat(),
+        'periods': [
+            {
+                'label': period.get('label') or f"{period['start'].isoformat()} to {period['end'].isoformat()}",
+                'startDate': period['start'].isoformat(),
+                'endDate': period['end'].isoformat(),
+            }
+            for period in periods
+        ],
+        'revenues': revenues,
+        'expenses': expenses,
+        'totalRevenue': total_revenue,
+        'totalExpenses': total_expenses,
+        'netIncome': total_revenue - total_expenses,
+        'generatedAt': datetime.now().isoformat()
+    }
+    if include_totals:
+        data['totals'] = {
+            'revenue': revenue_by_period,
+            'expenses': expenses_by_period,
+            'netIncome': net_by_period,
+        }
+        if include_variance:
+            data['totals']['netIncomeVariance'] = _variance(net_by_period)
+    return data
+
+
+def _parse_flag(params, name, default=True):
+    value = params.get(name)
+    if value in (None, ''):
+        return default
+    return value.lower() not in ('0', 'false', 'no')
+
+
+def _parse_periods(value):
+    """periods=2024-01-01:2024-01-31,2023-01-01:2023-01-31"""
+    periods = []
+    for item in value.split(','):
+        bounds = item.strip().split(':')
+        try:
+            start, end = (parse_date(bound.strip()) for bound in bounds)
+        except ValueError:
+            start = end = None
+        if start is None or end is None:
+            raise InvalidQuery("periods must be a comma-separated list of YYYY-MM-DD:YYYY-MM-DD ranges")
+        periods.append({'start': start, 'end': end})
+    return periods
+
+
+def comparative_options(params):
+    """Keyword arguments for build_comparative_income_statement from query params."""
+    periods = params.get('periods')
+    return {
+        'granularity': params.get('granularity', 'monthly'),
+        'periods': _parse_periods(periods) if periods else None,
+        'include_totals': _parse_flag(params, 'totals'),
+        'include_variance': _parse_flag(params, 'variance'),
+    }
+
+
+# Builders take (start_date, end_date); REPORT_OPTIONS parses any extra
+# query params a report type accepts
+REPORT_OPTIONS = {
+    'comparative_income_statement': comparative_options,
+}
+
+REPORT_BUILDERS = {
+    'income_statement': build_income_statement,
+    'comparative_income_statement': build_comparative_income_statement,
+}
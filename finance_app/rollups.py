@@ -0,0 +1,185 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import Income, Expense, DailyFinanceRollup, FinanceCategory, UNCATEGORIZED_SLUG
+
+KIND_INCOME = 'income'
+KIND_EXPENSE = 'expense'
+
+# Above this many (day, category) keys a write is applied set-based
+BULK_DELTA_THRESHOLD = 20
+
+LEDGER_MODELS = {
+    KIND_INCOME: Income,
+    KIND_EXPENSE: Expense,
+}
+
+
+def kind_for_model(model):
+    for kind, ledger_model in LEDGER_MODELS.items():
+        if issubclass(model, ledger_model):
+            return kind
+    return None
+
+
+def entry_key(model, day, category_id, amount):
+    """Normalize raw attribute values (strings, floats) into a rollup key."""
+    day = model._meta.get_field('date').to_python(day)
+    amount = model._meta.get_field('amount').to_python(amount) or Decimal('0')
+    return day, category_id, amount
+
+
+def collect_deltas(entries, sign=1, deltas=None):
+    """
+    Fold (day, category id, amount) entries into
+    {(day, category id): [amount, count]}.
+    """
+    if deltas is None:
+        deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for day, category_id, amount in entries:
+        delta = deltas[(day, category_id)]
+        delta[0] += sign * amount
+        delta[1] += sign
+    return deltas
+
+
+def _apply_delta(kind, day, category_id, amount, count):
+    lookup = {'kind': kind, 'day': day, 'category_ref_id': category_id}
+    changes = {'total': F('total') + amount, 'entry_count': F('entry_count') + count}
+
+    updated = DailyFinanceRollup.objects.filter(**lookup).update(**changes)
+    if not updated:
+        try:
+            with transaction.atomic():
+                DailyFinanceRollup.objects.create(total=amount, entry_count=count, **lookup)
+        except IntegrityError:
+            # Another writer created the row first
+            DailyFinanceRollup.objects.filter(**lookup).update(**changes)
+
+    if count < 0:
+        DailyFinanceRollup.objects.filter(entry_count__lte=0, **lookup).delete()
+
+
+def _apply_deltas_in_bulk(kind, deltas):
+    """
+    Lock just the rollup rows the deltas touch, update them in place and
+    insert the keys that don't exist yet.
+    """
+    days = {day for day, _ in deltas}
+    category_ids = {category_id for _, category_id in deltas}
+    existing = {
+        (row.day, row.category_ref_id): row
+        for row in DailyFinanceRollup.objects.select_for_update().filter(
+            kind=kind, day__in=days, category_ref_id__in=category_ids
+        ).order_by('pk')
+    }
+
+    changed, created, emptied = [], [], []
+    for key, (amount, count) in deltas.items():
+        row = existing.get(key)
+        if row is None:
+            created.append(DailyFinanceRollup(
+                kind=kind, day=key[0], category_ref_id=key[1], total=amount, entry_count=count
+            ))
+            continue
+        row.total += amount
+        row.entry_count += count
+        (emptied if row.entry_count <= 0 else changed).append(row)
+
+    DailyFinanceRollup.objects.bulk_update(changed, ['total', 'entry_count'], batch_size=500)
+    stale = [row.pk for row in emptied]
+    for start in range(0, len(stale), 500):
+        DailyFinanceRollup.objects.filter(pk__in=stale[start:start + 500]).delete()
+    try:
+        with transaction.atomic():
+            DailyFinanceRollup.objects.bulk_create(created, batch_size=500)
+    except IntegrityError:
+        # Keys created concurrently since the locking read; fall back to upserts
+        for row in created:
+            _apply_delta(kind, row.day, row.category_ref_id, row.total, row.entry_count)
+
+
+def _file_uncategorized(kind, deltas):
+    """Move the deltas of rows without a category onto the uncategorized one."""
+    if all(category_id is not None for _, category_id in deltas):
+        return deltas
+    uncategorized_id = FinanceCategory.objects.uncategorized_id(kind)
+    filed = defaultdict(lambda: [Decimal('0'), 0])
+    for (day, category_id), (amount, count) in deltas.items():
+        delta = filed[(day, uncategorized_id if category_id is None else category_id)]
+        delta[0] += amount
+        delta[1] += count
+    return filed
+
+
+def apply_deltas(kind, deltas):
+    with transaction.atomic():
+        deltas = {key: delta for key, delta in _file_uncategorized(kind, deltas).items() if delta[0] or delta[1]}
+        if len(deltas) > BULK_DELTA_THRESHOLD:
+            _apply_deltas_in_bulk(kind, deltas)
+            return
+        for (day, category_id), (amount, count) in sorted(deltas.items()):
+            _apply_delta(kind, day, category_id, amount, count)
+
+
+def rebuild_rollups():
+    """Recompute the whole rollup table from the raw Income/Expense rows."""
+    with transaction.atomic():
+        DailyFinanceRollup.objects.all().delete()
+        created = 0
+        for kind, model in LEDGER_MODELS.items():
+            rows = (
+                model.objects.values('date', 'category_ref')
+                .annotate(total=Sum('amount'), entry_count=Count('id'))
+                .order_by()
+            )
+            deltas = defaultdict(lambda: [Decimal('0'), 0])
+            for row in rows.iterator():
+                delta = deltas[(row['date'], row['category_ref'])]
+                delta[0] += row['total']
+                delta[1] += row['entry_count']
+            rollups = [
+                DailyFinanceRollup(kind=kind, day=day, category_ref_id=category_id, total=total, entry_count=count)
+                for (day, category_id), (total, count) in _file_uncategorized(kind, deltas).items()
+            ]
+            DailyFinanceRollup.objects.bulk_create(rollups, batch_size=1000)
+            created += len(rollups)
+    return created
+
+
+def rollup_queryset(kind, start_date=None, end_date=None):
+    queryset = DailyFinanceRollup.objects.filter(kind=kind)
+    if start_date:
+        queryset = queryset.filter(day__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(day__lte=end_date)
+    return queryset
+
+
+def rollup_total(kind, start_date=None, end_date=None):
+    return rollup_queryset(kind, start_date, end_date).aggregate(total=Sum('total'))['total'] or 0
+
+
+def category_slugs(category_ids):
+    """{category id: slug} for the ids a grouped rollup query returned, in one lookup."""
+    ids = {category_id for category_id in category_ids if category_id is not None}
+    slugs = dict(FinanceCategory.objects.filter(pk__in=ids).order_by().values_list('id', 'slug')) if ids else {}
+    # Ledger deltas without a category are keyed on None until rollups file
+    # them under the uncategorized category
+    slugs[None] = UNCATEGORIZED_SLUG
+    return slugs
+
+
+def rollup_by_category(kind, start_date=None, end_date=None):
+    """[{'category': slug, 'total': amount}], largest first."""
+    rows = list(
+        rollup_queryset(kind, start_date, end_date)
+        .values('category_ref_id')
+        .annotate(total=Sum('total'))
+        .order_by('-total')
+    )
+    slugs = category_slugs(row['category_ref_id'] for row in rows)
+    return [{'category': slugs[row['category_ref_id']], 'total': row['total']} for row in rows]
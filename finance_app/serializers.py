@@ -1,22 +1,101 @@
 from rest_framework import serializers
-from .models import Income, Expense, ReportHistory
+from .models import Income, Expense, Budget, RecurringExpense, FinanceAuditLog, FinanceCategory, ReportHistory, ReportJob, normalize_category
+
+class FinanceCategorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FinanceCategory
+        fields = ('id', 'kind', 'slug', 'name', 'parent', 'created_at')
+        # The slug is what Income/Expense.category stores, so it never changes
+        read_only_fields = ('slug', 'created_at')
+
+    def validate(self, data):
+        kind = data.get('kind', getattr(self.instance, 'kind', None))
+        if self.instance and kind != self.instance.kind:
+            raise serializers.ValidationError({'kind': "The kind of an existing category cannot change."})
+        parent = data.get('parent')
+        if parent and parent.kind != kind:
+            raise serializers.ValidationError({'parent': "The parent must be a category of the same kind."})
+        if self.instance is None:
+            # The slug is derived from the name; check it here so a second
+            # spelling of an existing category is a 400, not an IntegrityError
+            data['slug'] = normalize_category(data.get('name'))
+            if FinanceCategory.objects.filter(kind=kind, slug=data['slug']).exists():
+                raise serializers.ValidationError({'name': "A category with this name already exists."})
+        return data
+
 
 class IncomeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Income
         fields = '__all__'
-        read_only_fields = ('created_at', 'updated_at')
+        read_only_fields = ('category_ref', 'created_at', 'updated_at')
 
 
 class ExpenseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Expense
         fields = '__all__'
-        read_only_fields = ('created_at', 'updated_at')
+        read_only_fields = ('category_ref', 'recurring_template', 'created_at', 'updated_at')
+
+
+class RecurringExpenseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RecurringExpense
+        fields = '__all__'
+        read_only_fields = ('materialized_through', 'created_at', 'updated_at')
+
+    def validate(self, data):
+        start_date = data.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = data.get('end_date', getattr(self.instance, 'end_date', None))
+        if start_date and end_date and end_date < start_date:
+            raise serializers.ValidationError({'end_date': "End date must be on or after the start date."})
+        if data.get('interval') == 0:
+            raise serializers.ValidationError({'interval': "Interval must be at least 1."})
+        return data
+
+
+class BudgetSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Budget
+        fields = '__all__'
+        read_only_fields = ('actual_amount', 'created_at', 'updated_at')
+
+    def validate_period(self, value):
+        # Budgets are monthly; any day in the month selects that month
+        return value.replace(day=1)
+
+    def validate_category(self, value):
+        # Normalized here rather than in save() so the (period, category)
+        # uniqueness check sees the value that will be stored
+        return normalize_category(value)
 
 
 class ReportHistorySerializer(serializers.ModelSerializer):
+    # Stored compressed in ReportPayload; decompressed only when serialized here
+    report_data = serializers.JSONField(required=False)
+
+    class Meta:
+        model = ReportHistory
+        fields = ('id', 'report_name', 'report_type', 'start_date', 'end_date', 'created_at', 'report_summary', 'report_data')
+        read_only_fields = ('created_at',)
+
+
+class ReportHistorySummarySerializer(serializers.ModelSerializer):
     class Meta:
         model = ReportHistory
+        fields = ('id', 'report_name', 'report_type', 'start_date', 'end_date', 'created_at', 'report_summary')
+        read_only_fields = fields
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReportJob
         fields = '__all__'
-        read_only_fields = ('created_at',)
\ No newline at end of file
+        read_only_fields = ('status', 'error', 'report', 'created_at', 'started_at', 'finished_at')
+
+
+class FinanceAuditLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FinanceAuditLog
+        fields = ('id', 'entity', 'entity_id', 'action', 'changes', 'timestamp')
+        read_only_fields = fields
@@ -0,0 +1,162 @@
+from collections import defaultdict, deque
+
+from django.db import connection
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Income, Expense, Budget, RecurringExpense, FinanceCategory, ReportHistory, ReportPayload, normalize_category
+from . import audit, budgets, rollups, snapshots
+from .cache import bump_data_version_on_commit
+
+
+def sync_ledger(kind, deltas):
+    """Propagate folded ledger deltas to every derived finance table."""
+    changed_days = [day for (day, _), (amount, count) in deltas.items() if amount or count]
+    if not changed_days:
+        return
+    rollups.apply_deltas(kind, deltas)
+    if kind == rollups.KIND_EXPENSE:
+        budgets.apply_expense_deltas(deltas)
+    snapshots.invalidate_snapshots(min(changed_days))
+    bump_data_version_on_commit()
+
+
+def sync_bulk_create(model, objs):
+    """
+    bulk_create() does not send save signals, so bulk writers call this
+    with the rows they inserted.
+    """
+    kind = rollups.kind_for_model(model)
+    entries = [rollups.entry_key(model, obj.date, obj.category_ref_id, obj.amount) for obj in objs]
+    if entries:
+        sync_ledger(kind, rollups.collect_deltas(entries))
+        audit.record_bulk_create(model, objs)
+
+
+def bulk_insert(model, objs, batch_size):
+    """
+    bulk_create() objs, then sync_bulk_create() them. MySQL can't hand back
+    primary keys from a multi-row INSERT and rows without one can't be
+    audited, so there the new ids are read back in one query afterwards.
+    """
+    model.objects.bulk_create(objs, batch_size=batch_size)
+    if objs and objs[0].pk is None:
+        _read_back_ids(model, objs)
+    sync_bulk_create(model, objs)
+
+
+def _read_back_ids(model, objs):
+    # created_at was stamped on every obj before the INSERT, so the batch
+    # lies within that range; matching on the stored values as well tells
+    # it apart from rows another writer added in the same instant
+    fields = [(attname, field) for _, attname, field in audit.audit_fields(model)]
+    fields.append(('created_at', model._meta.get_field('created_at')))
+    stamps = [obj.created_at for obj in objs]
+    rows = (
+        model.objects
+        .filter(created_at__range=(min(stamps), max(stamps)))
+        .order_by('pk')
+        .values_list('pk', *[attname for attname, _ in fields])
+    )
+    inserted = defaultdict(deque)
+    for pk, *values in rows:
+        inserted[tuple(values)].append(pk)
+    for obj in objs:
+        ids = inserted[tuple(field.to_python(getattr(obj, attname)) for attname, field in fields)]
+        if ids:
+            obj.pk = ids.popleft()
+            obj._state.adding = False
+            obj._state.db = connection.alias
+
+
+# Registered first so every receiver below can read the row being
+# overwritten without querying it again
+@receiver(pre_save, sender=Income)
+@receiver(pre_save, sender=Expense)
+@receiver(pre_save, sender=Budget)
+@receiver(pre_save, sender=RecurringExpense)
+def remember_stored_row(sender, instance, **kwargs):
+    # The ledger receivers also need the category id the rollup is keyed on
+    extra = ('category_ref_id',) if rollups.kind_for_model(sender) else ()
+    instance._stored_row = audit.stored_row(sender, instance.pk, *extra) if instance.pk else None
+
+
+@receiver(pre_save, sender=Income)
+@receiver(pre_save, sender=Expense)
+def assign_category(sender, instance, **kwargs):
+    stored = getattr(instance, '_stored_row', None)
+    if stored and instance.category_ref_id and stored['category'] == normalize_category(instance.category):
+        # Category untouched; skip the lookup
+        instance.category = stored['category']
+        return
+    FinanceCategory.objects.assign(rollups.kind_for_model(sender), [instance])
+
+
+@receiver(post_save, sender=Income)
+@receiver(post_save, sender=Expense)
+@receiver(post_save, sender=Budget)
+@receiver(post_save, sender=RecurringExpense)
+def audit_saved(sender, instance, **kwargs):
+    audit.record_save(sender, instance, getattr(instance, '_stored_row', None))
+
+
+@receiver(post_delete, sender=Income)
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=Budget)
+@receiver(post_delete, sender=RecurringExpense)
+def audit_deleted(sender, instance, **kwargs):
+    audit.record_delete(sender, instance)
+
+
+@receiver(post_save, sender=Income)
+@receiver(post_save, sender=Expense)
+def ledger_entry_saved(sender, instance, **kwargs):
+    deltas = rollups.collect_deltas([
+        rollups.entry_key(sender, instance.date, instance.category_ref_id, instance.amount)
+    ])
+    previous = getattr(instance, '_stored_row', None)
+    if previous:
+        rollups.collect_deltas([
+            (previous['date'], previous['category_ref_id'], previous['amount'])
+        ], sign=-1, deltas=deltas)
+    sync_ledger(rollups.kind_for_model(sender), deltas)
+
+
+@receiver(post_delete, sender=Income)
+@receiver(post_delete, sender=Expense)
+def ledger_entry_deleted(sender, instance, **kwargs):
+    deltas = rollups.collect_deltas([
+        rollups.entry_key(sender, instance.date, instance.category_ref_id, instance.amount)
+    ], sign=-1)
+    sync_ledger(rollups.kind_for_model(sender), deltas)
+
+
+@receiver(pre_save, sender=Budget)
+def seed_budget_actual(sender, instance, **kwargs):
+    # Later expense writes adjust actual_amount incrementally; it only needs
+    # computing when a budget starts tracking a new (period, category)
+    stored = getattr(instance, '_stored_row', None)
+    previous = (stored['period'], stored['category']) if stored else None
+    # Budget.save() has already moved period to the first of the month
+    if previous != (instance.period, instance.category):
+        instance.actual_amount = budgets.expense_actual(instance.category, instance.period)
+
+
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+def budget_changed(sender, instance, **kwargs):
+    bump_data_version_on_commit()
+
+
+@receiver(post_save, sender=FinanceCategory)
+@receiver(post_delete, sender=FinanceCategory)
+def category_changed(sender, instance, **kwargs):
+    # Re-parenting changes hierarchy rollups without touching the ledger
+    bump_data_version_on_commit()
+
+
+@receiver(post_delete, sender=ReportHistory)
+def release_report_payload(sender, instance, **kwargs):
+    # Payloads are shared between identical reports; drop the last reference only
+    if instance.payload_id:
+        ReportPayload.objects.filter(pk=instance.payload_id, reports__isnull=True).delete()
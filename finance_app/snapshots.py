@@ -0,0 +1,156 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db import connection, transaction
+from django.db.models import Min, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import BalanceSnapshot, DailyFinanceRollup
+from .rollups import KIND_INCOME, KIND_EXPENSE
+
+
+def month_end(day):
+    return day.replace(day=1) + relativedelta(months=1) - timedelta(days=1)
+
+
+def last_complete_month_end(day):
+    if day == month_end(day):
+        return day
+    return day.replace(day=1) - timedelta(days=1)
+
+
+def _ledger_totals(after_date, end_date):
+    queryset = DailyFinanceRollup.objects.filter(day__lte=end_date)
+    if after_date:
+        queryset = queryset.filter(day__gt=after_date)
+    totals = queryset.aggregate(
+        income=Sum('total', filter=Q(kind=KIND_INCOME)),
+        expenses=Sum('total', filter=Q(kind=KIND_EXPENSE))
+    )
+    return totals['income'] or Decimal('0'), totals['expenses'] or Decimal('0')
+
+
+def fill_snapshots(from_date=None):
+    """
+    Recompute the month-end snapshots from from_date's month (or from the
+    first missing month, if earlier) through the last month complete today,
+    and return how many were written. Only writers and the rebuild command
+    call this, never a read: snapshots are upserted under a lock on the
+    latest one, in their own transaction, so a fill that started before a
+    back-dated write can't leave its stale values behind.
+    """
+    through = last_complete_month_end(date.today())
+    with transaction.atomic():
+        latest = (
+            BalanceSnapshot.objects.select_for_update()
+            .filter(period_end__lte=through)
+            .order_by('-period_end')
+            .first()
+        )
+        start = latest.period_end + timedelta(days=1) if latest else None
+        if from_date and (start is None or from_date < start):
+            start = from_date.replace(day=1)
+        if start is None:
+            start = DailyFinanceRollup.objects.aggregate(first=Min('day'))['first']
+        if start is None or start > through:
+            return 0
+
+        anchor = BalanceSnapshot.objects.filter(period_end__lt=start).order_by('-period_end').first()
+        if anchor:
+            income, expenses = anchor.total_income, anchor.total_expenses
+        else:
+            income, expenses = _ledger_totals(None, start - timedelta(days=1))
+
+        monthly = {
+            row['month']: row
+            for row in (
+                DailyFinanceRollup.objects.filter(day__gte=start, day__lte=through)
+                .annotate(month=TruncMonth('day'))
+                .values('month')
+                .annotate(
+                    income=Sum('total', filter=Q(kind=KIND_INCOME)),
+                    expenses=Sum('total', filter=Q(kind=KIND_EXPENSE))
+                )
+            )
+        }
+
+        snapshots = []
+        month = start.replace(day=1)
+        while month <= through:
+            row = monthly.get(month, {})
+            income += row.get('income') or 0
+            expenses += row.get('expenses') or 0
+            snapshots.append(BalanceSnapshot(
+                period_end=month_end(month),
+                total_income=income,
+                total_expenses=expenses
+            ))
+            month += relativedelta(months=1)
+
+        # MySQL upserts on any unique key and rejects an explicit conflict target
+        unique_fields = ['period_end'] if connection.features.supports_update_conflicts_with_target else None
+        BalanceSnapshot.objects.bulk_create(
+            snapshots, batch_size=500, update_conflicts=True,
+            unique_fields=unique_fields, update_fields=['total_income', 'total_expenses']
+        )
+    return len(snapshots)
+
+
+def fill_snapshots_on_commit(from_date):
+    """
+    Refill from from_date once the writer's transaction commits, so the fill
+    reads the committed ledger in a fresh transaction of its own.
+    """
+    transaction.on_commit(lambda: fill_snapshots(from_date))
+
+
+def balance_as_of(as_of_date):
+    """
+    Cumulative (income, expenses) on as_of_date: nearest month-end snapshot
+    plus a delta scan of the days after it. Read-only; months without a
+    snapshot yet are covered by the delta scan.
+    """
+    snapshot = BalanceSnapshot.objects.filter(period_end__lte=as_of_date).order_by('-period_end').first()
+    if snapshot is None:
+        return _ledger_totals(None, as_of_date)
+    income, expenses = _ledger_totals(snapshot.period_end, as_of_date)
+    return snapshot.total_income + income, snapshot.total_expenses + expenses
+
+
+def invalidate_snapshots(from_date):
+    """
+    A write dated from_date changes every snapshot at or after it. They are
+    dropped in the writer's transaction and refilled after it commits.
+    """
+    BalanceSnapshot.objects.filter(period_end__gte=from_date).delete()
+    fill_snapshots_on_commit(from_date)
+
+
+def build_balance_sheet(as_of_date):
+    """The balance_sheet payload as of a date."""
+    # Assets (all income) and liabilities (all expenses) up to the date,
+    # read from the nearest month-end snapshot plus the partial month
+    total_assets, total_liabilities = balance_as_of(as_of_date)
+    total_equity = total_assets - total_liabilities
+    return {
+        'assets': {
+            'total': total_assets,
+            'breakdown': [
+                {'category': 'Cash & Equivalents', 'amount': total_assets}
+            ]
+        },
+        'liabilities': {
+            'total': total_liabilities,
+            'breakdown': [
+                {'category': 'Accounts Payable', 'amount': total_liabilities}
+            ]
+        },
+        'equity': {
+            'total': total_equity,
+            'breakdown': [
+                {'category': 'Retained Earnings', 'amount': total_equity}
+            ]
+        },
+        'asOfDate': as_of_date.isoformat()
+    }
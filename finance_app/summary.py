@@ -0,0 +1,129 @@
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import DailyFinanceRollup
+from .rollups import KIND_INCOME, KIND_EXPENSE, category_slugs
+
+ZERO = Decimal('0.00')
+PERCENT = Decimal('0.01')
+
+
+def percent_change(current, previous):
+    """Change relative to the previous period, rounded to 0.01% in Decimal."""
+    if not previous:
+        return ZERO
+    return ((current - previous) / previous * 100).quantize(PERCENT, rounding=ROUND_HALF_UP)
+
+
+def period_sums(start_date, end_date, prev_start_date, prev_end_date):
+    """
+    The filter covering both periods and the current/previous rollup sums,
+    for a query grouped by at least kind and category_ref_id.
+    """
+    amount = DecimalField(max_digits=18, decimal_places=2)
+    current = Q(day__gte=start_date, day__lte=end_date)
+    previous = Q(day__gte=prev_start_date, day__lte=prev_end_date)
+    return current | previous, {
+        'current': Coalesce(Sum('total', filter=current), Value(ZERO), output_field=amount),
+        'previous': Coalesce(Sum('total', filter=previous), Value(ZERO), output_field=amount),
+    }
+
+
+def summarize(rows):
+    """
+    Fold rows of kind, category_ref_id, current and previous (more than one
+    per category is fine) into totals, breakdowns and changes without
+    leaving Decimal; the category slugs are looked up once.
+    """
+    totals = {KIND_INCOME: [ZERO, ZERO], KIND_EXPENSE: [ZERO, ZERO]}
+    by_category = {KIND_INCOME: {}, KIND_EXPENSE: {}}
+    for row in rows:
+        kind_totals = totals[row['kind']]
+        kind_totals[0] += row['current']
+        kind_totals[1] += row['previous']
+        if row['current']:
+            amounts = by_category[row['kind']]
+            amounts[row['category_ref_id']] = amounts.get(row['category_ref_id'], ZERO) + row['current']
+
+    slugs = category_slugs(category for amounts in by_category.values() for category in amounts)
+    categories = {}
+    for kind, amounts in by_category.items():
+        categories[kind] = sorted(
+            ({'category': slugs[category], 'amount': amount} for category, amount in amounts.items()),
+            key=lambda item: (-item['amount'], item['category'])
+        )
+
+    total_income, prev_income = totals[KIND_INCOME]
+    total_expenses, prev_expenses = totals[KIND_EXPENSE]
+    net_income = total_income - total_expenses
+    prev_profit = prev_income - prev_expenses
+
+    return {
+        'totalIncome': total_income,
+        'totalExpenses': total_expenses,
+        'netIncome': net_income,
+        'incomeByCategory': categories[KIND_INCOME],
+        'expensesByCategory': categories[KIND_EXPENSE],
+        'comparisonToPreviousPeriod': {
+            'income': percent_change(total_income, prev_income),
+            'expenses': percent_change(total_expenses, prev_expenses),
+            'profit': percent_change(net_income, prev_profit)
+        },
+    }
+
+
+def build_summary(start_date, end_date, prev_start_date, prev_end_date):
+    """
+    Current and previous period totals for both ledgers, grouped by kind and
+    category id, come back from a single query and are folded by
+    summarize().
+    """
+    periods, sums = period_sums(start_date, end_date, prev_start_date, prev_end_date)
+    rows = (
+        DailyFinanceRollup.objects
+        .filter(periods)
+        .values('kind', 'category_ref_id')
+        .annotate(**sums)
+        .order_by()
+    )
+    return summarize(rows)
+
+
+def summary_range(time_range, today=None):
+    """(start, end, previous start, previous end) for a dashboard timeRange."""
+    today = today or date.today()
+    if time_range == '30days':
+        start_date = today - timedelta(days=30)
+    elif time_range == '3months':
+        start_date = today - timedelta(days=90)
+    elif time_range == '6months':
+        start_date = today - timedelta(days=180)
+    elif time_range == '1year':
+        start_date = today - timedelta(days=365)
+    else:
+        # Default to current month
+        start_date = today.replace(day=1)
+    end_date = today
+
+    # The previous period is the same length, ending the day before
+    period_length = (end_date - start_date).days
+    return start_date, end_date, start_date - timedelta(days=period_length), start_date - timedelta(days=1)
+
+
+def build_period_summary(time_range):
+    """The financial_summary payload for a timeRange."""
+    start_date, end_date, prev_start_date, prev_end_date = summary_range(time_range)
+    return with_range(build_summary(start_date, end_date, prev_start_date, prev_end_date), time_range, start_date, end_date)
+
+
+def with_range(data, time_range, start_date, end_date):
+    """Add the range a summary covers to its payload."""
+    data.update({
+        'timeRange': time_range,
+        'startDate': start_date.isoformat(),
+        'endDate': end_date.isoformat()
+    })
+    return data
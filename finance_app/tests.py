@@ -1,3 +1,1073 @@
-from django.test import TestCase
+import json
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from dateutil.relativedelta import relativedelta
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from .models import Income, Expense, Budget, RecurringExpense, FinanceAuditLog, FinanceCategory, FinanceCategoryClosure, DailyFinanceRollup, BalanceSnapshot, ReportHistory, ReportPayload, ReportJob
+from . import rollups
+from .rollups import rebuild_rollups
+from .cashflow import build_cash_flow
+from .snapshots import balance_as_of, fill_snapshots, last_complete_month_end
+from .summary import build_summary
+from .reports import build_comparative_income_statement
+from .budgets import budget_vs_actual, refresh_budget_actuals
+from .forecast import build_forecast
+from .recurring import FREQUENCY_STEPS, materialize_recurring_expenses, occurrence_dates
+from .reconciliation import find_duplicate_pairs, normalize_party
+from .categories import category_tree_totals
+from .benchmark import ENDPOINTS, WRITE_ONLY_ENDPOINTS, finance_url_names, load_query_budget, over_budget, run_benchmarks, seed_ledger
+from . import audit
+from .cache import bump_data_version, data_version, get_cache
+from . import jobs
+from .jobs import claim_next_job, execute_job
+from .dashboard import build_dashboard
+
+
+class LedgerPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for day in range(1, 11):
+            Income.objects.create(
+                source=f'Client {day}',
+                amount=Decimal(day * 100),
+                date=date(2024, 1, day),
+                category='sales' if day % 2 else 'services'
+            )
+        # Two rows on the same day exercise the id tie-breaker
+        Income.objects.create(source='Client 10b', amount=Decimal('50.00'), date=date(2024, 1, 10), category='sales')
+
+    def test_unpaginated_list_is_unchanged(self):
+        response = self.client.get('/api/finance/incomes/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 11)
+
+    def test_cursor_walks_every_row_once(self):
+        seen = []
+        params = {'limit': 4}
+        while True:
+            response = self.client.get('/api/finance/incomes/', params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(row['id'] for row in response.data['results'])
+            if not response.data['next_cursor']:
+                break
+            params = {'limit': 4, 'cursor': response.data['next_cursor']}
+
+        expected = list(Income.objects.order_by('-date', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_filters(self):
+        response = self.client.get('/api/finance/incomes/', {
+            'start_date': '2024-01-03',
+            'end_date': '2024-01-08',
+            'category': 'sales',
+            'min_amount': '400'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['source'] for row in response.data], ['Client 7', 'Client 5'])
+
+    def test_payee_filter_and_invalid_cursor(self):
+        Expense.objects.create(payee='Acme Rentals', amount=Decimal('10.00'), date=date(2024, 1, 1), category='rent')
+        Expense.objects.create(payee='Power Co', amount=Decimal('20.00'), date=date(2024, 1, 2), category='utilities')
+
+        response = self.client.get('/api/finance/expenses/', {'payee': 'acme'})
+        self.assertEqual(len(response.data), 1)
+
+        response = self.client.get('/api/finance/expenses/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DailyRollupTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def rollup(self, kind, day, category):
+        return DailyFinanceRollup.objects.filter(kind=kind, day=day, category_ref__slug=category).first()
+
+    def test_rollup_follows_create_update_delete(self):
+        income = Income.objects.create(source='A', amount=Decimal('100.00'), date=date(2024, 3, 1), category='sales')
+        Income.objects.create(source='B', amount=Decimal('25.50'), date=date(2024, 3, 1), category='sales')
+        row = self.rollup('income', date(2024, 3, 1), 'sales')
+        self.assertEqual(row.total, Decimal('125.50'))
+        self.assertEqual(row.entry_count, 2)
+
+        income.date = date(2024, 3, 2)
+        income.amount = Decimal('80.00')
+        income.save()
+        self.assertEqual(self.rollup('income', date(2024, 3, 1), 'sales').total, Decimal('25.50'))
+        self.assertEqual(self.rollup('income', date(2024, 3, 2), 'sales').total, Decimal('80.00'))
+
+        income.delete()
+        self.assertIsNone(self.rollup('income', date(2024, 3, 2), 'sales'))
+
+    def test_rebuild_matches_incremental(self):
+        Expense.objects.create(payee='X', amount=Decimal('10.00'), date=date(2024, 3, 1), category='rent')
+        Expense.objects.create(payee='Y', amount=Decimal('5.00'), date=date(2024, 3, 1), category='rent')
+        before = list(DailyFinanceRollup.objects.values_list('kind', 'day', 'category_ref', 'total', 'entry_count'))
+        self.assertEqual(rebuild_rollups(), 1)
+        after = list(DailyFinanceRollup.objects.values_list('kind', 'day', 'category_ref', 'total', 'entry_count'))
+        self.assertEqual(before, after)
+
+    def test_bulk_deltas_update_rows_in_place(self):
+        first = Income.objects.create(source='A', amount=Decimal('10.00'), date=date(2024, 3, 1), category='sales')
+        row = self.rollup('income', date(2024, 3, 1), 'sales')
+        entries = [
+            rollups.entry_key(Income, date(2024, 3, 1) + timedelta(days=offset), first.category_ref_id, Decimal('1.00'))
+            for offset in range(rollups.BULK_DELTA_THRESHOLD + 1)
+        ]
+        rollups.apply_deltas('income', rollups.collect_deltas(entries))
+        updated = self.rollup('income', date(2024, 3, 1), 'sales')
+        self.assertEqual((updated.pk, updated.total, updated.entry_count), (row.pk, Decimal('11.00'), 2))
+
+    def test_rows_without_a_category_share_one_rollup_row(self):
+        for amount in ('10.00', '5.00'):
+            Expense.objects.create(payee='X', amount=Decimal(amount), date=date(2024, 3, 1), category='')
+        entries = [
+            rollups.entry_key(Expense, date(2024, 3, 1) + timedelta(days=offset), None, Decimal('1.00'))
+            for offset in range(rollups.BULK_DELTA_THRESHOLD + 1)
+        ]
+        rollups.apply_deltas('expense', rollups.collect_deltas(entries))
+        row = DailyFinanceRollup.objects.get(kind='expense', day=date(2024, 3, 1))
+        self.assertEqual((row.total, row.entry_count), (Decimal('16.00'), 3))
+        self.assertEqual(row.category_ref_id, FinanceCategory.objects.uncategorized_id('expense'))
+
+    def test_reports_read_rollups(self):
+        Income.objects.create(source='A', amount=Decimal('300.00'), date=date(2024, 3, 5), category='sales')
+        Expense.objects.create(payee='X', amount=Decimal('120.00'), date=date(2024, 3, 6), category='rent')
+        response = self.client.get('/api/finance/reports/', {'start_date': '2024-03-01', 'end_date': '2024-03-31'})
+        self.assertEqual(response.data['netIncome'], Decimal('180.00'))
+
+        response = self.client.get('/api/finance/balance-sheet/', {'as_of_date': '2024-03-31'})
+        self.assertEqual(response.data['equity']['total'], Decimal('180.00'))
+
+
+class CashFlowEngineTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        Income.objects.create(source='A', amount=Decimal('500.00'), date=date(2024, 1, 15), category='sales')
+        Expense.objects.create(payee='X', amount=Decimal('200.00'), date=date(2024, 1, 20), category='rent')
+        Expense.objects.create(payee='Y', amount=Decimal('75.00'), date=date(2024, 3, 2), category='rent')
+
+    def test_monthly_series_is_zero_filled(self):
+        with self.assertNumQueries(1):
+            data = build_cash_flow('monthly', date(2024, 1, 1), date(2024, 4, 30))
+        self.assertEqual(data['labels'], ['Jan 2024', 'Feb 2024', 'Mar 2024', 'Apr 2024'])
+        self.assertEqual(data['incomeData'], [500.0, 0.0, 0.0, 0.0])
+        self.assertEqual(data['expensesData'], [200.0, 0.0, 75.0, 0.0])
+        self.assertEqual(data['netData'], [300.0, 0.0, -75.0, 0.0])
+
+    def test_weekly_buckets_start_on_monday(self):
+        data = build_cash_flow('weekly', date(2024, 1, 14), date(2024, 1, 28))
+        self.assertEqual(data['bucketStarts'], ['2024-01-08', '2024-01-15', '2024-01-22'])
+        self.assertEqual(data['incomeData'], [0.0, 500.0, 0.0])
+        self.assertEqual(data['expensesData'], [0.0, 200.0, 0.0])
+
+    def test_endpoint_accepts_explicit_range(self):
+        response = self.client.get('/api/finance/cash-flow/', {
+            'period': 'quarterly', 'start_date': '2024-01-01', 'end_date': '2024-06-30'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['labels'], ['Q1 2024', 'Q2 2024'])
+        self.assertEqual(response.data['netData'], [225.0, 0.0])
+
+        response = self.client.get('/api/finance/cash-flow/', {'period': 'hourly'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BalanceSnapshotTest(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Income.objects.create(source='A', amount=Decimal('1000.00'), date=date(2023, 11, 10), category='sales')
+            Expense.objects.create(payee='X', amount=Decimal('300.00'), date=date(2024, 1, 5), category='rent')
+            Income.objects.create(source='B', amount=Decimal('50.00'), date=date(2024, 2, 14), category='sales')
+
+    def test_as_of_uses_snapshot_plus_partial_month(self):
+        # The nearest snapshot, then the days after it
+        with self.assertNumQueries(2):
+            self.assertEqual(balance_as_of(date(2024, 2, 20)), (Decimal('1050.00'), Decimal('300.00')))
+        periods = list(BalanceSnapshot.objects.order_by('period_end').values_list('period_end', flat=True))
+        self.assertEqual(periods[:3], [date(2023, 11, 30), date(2023, 12, 31), date(2024, 1, 31)])
+        self.assertEqual(periods[-1], last_complete_month_end(date.today()))
+        january = BalanceSnapshot.objects.get(period_end=date(2024, 1, 31))
+        self.assertEqual((january.total_income, january.total_expenses), (Decimal('1000.00'), Decimal('300.00')))
+
+    def test_back_dated_write_refills_later_snapshots(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Expense.objects.create(payee='Y', amount=Decimal('20.00'), date=date(2023, 12, 15), category='rent')
+        january = BalanceSnapshot.objects.get(period_end=date(2024, 1, 31))
+        self.assertEqual(january.total_expenses, Decimal('320.00'))
+        self.assertEqual(balance_as_of(date(2024, 2, 20)), (Decimal('1050.00'), Decimal('320.00')))
+
+    def test_refill_overwrites_stale_snapshots(self):
+        # As left by a fill that read the ledger before a back-dated write
+        BalanceSnapshot.objects.filter(period_end__gte=date(2024, 1, 1)).update(total_expenses=0)
+        fill_snapshots(date(2024, 1, 1))
+        january = BalanceSnapshot.objects.get(period_end=date(2024, 1, 31))
+        self.assertEqual(january.total_expenses, Decimal('300.00'))
+
+    def test_reads_never_write_snapshots(self):
+        BalanceSnapshot.objects.all().delete()
+        self.assertEqual(balance_as_of(date(2024, 2, 20)), (Decimal('1050.00'), Decimal('300.00')))
+        response = APIClient().get('/api/finance/balance-sheet/', {'as_of_date': '2999-12-31'})
+        self.assertEqual(response.data['equity']['total'], Decimal('750.00'))
+        self.assertFalse(BalanceSnapshot.objects.exists())
+
+
+class FinancialSummaryTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        # Previous period: January, current period: February
+        Income.objects.create(source='A', amount=Decimal('0.10'), date=date(2024, 1, 10), category='sales')
+        Income.objects.create(source='A', amount=Decimal('0.20'), date=date(2024, 1, 11), category='sales')
+        Expense.objects.create(payee='X', amount=Decimal('0.30'), date=date(2024, 1, 12), category='rent')
+        Income.objects.create(source='B', amount=Decimal('0.10'), date=date(2024, 2, 5), category='sales')
+        Income.objects.create(source='C', amount=Decimal('0.35'), date=date(2024, 2, 6), category='services')
+        Expense.objects.create(payee='X', amount=Decimal('0.15'), date=date(2024, 2, 7), category='rent')
+
+    def test_single_query_exact_decimals(self):
+        # The grouped rollup query, then the slugs of the categories it returned
+        with self.assertNumQueries(2):
+            data = build_summary(date(2024, 2, 1), date(2024, 2, 29), date(2024, 1, 1), date(2024, 1, 31))
+        self.assertEqual(data['totalIncome'], Decimal('0.45'))
+        self.assertEqual(data['totalExpenses'], Decimal('0.15'))
+        self.assertEqual(data['netIncome'], Decimal('0.30'))
+        self.assertEqual(
+            data['incomeByCategory'],
+            [{'category': 'services', 'amount': Decimal('0.35')}, {'category': 'sales', 'amount': Decimal('0.10')}]
+        )
+        comparison = data['comparisonToPreviousPeriod']
+        self.assertEqual(comparison['income'], Decimal('50.00'))
+        self.assertEqual(comparison['expenses'], Decimal('-50.00'))
+        # Previous profit was exactly zero (0.30 - 0.30), so no change is reported
+        self.assertEqual(comparison['profit'], Decimal('0.00'))
+
+    def test_post_keeps_string_amount_exact(self):
+        response = self.client.post(
+            '/api/finance/incomes/',
+            {'source': 'D', 'amount': '1234567.89', 'date': '2024-02-10', 'category': 'sales'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Income.objects.get(source='D').amount, Decimal('1234567.89'))
+
+        response = self.client.post('/api/finance/incomes/', {'amount': 'abc', 'date': '2024-02-10'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ComparativeReportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        Income.objects.create(source='A', amount=Decimal('100.00'), date=date(2024, 1, 5), category='sales')
+        Income.objects.create(source='A', amount=Decimal('150.00'), date=date(2024, 2, 5), category='sales')
+        Income.objects.create(source='B', amount=Decimal('40.00'), date=date(2024, 3, 9), category='services')
+        Expense.objects.create(payee='X', amount=Decimal('60.00'), date=date(2024, 2, 1), category='rent')
+
+    def test_monthly_matrix_in_one_query(self):
+        # Plus the category slug lookup
+        with self.assertNumQueries(2):
+            data = build_comparative_income_statement(date(2024, 1, 1), date(2024, 3, 31), 'monthly')
+        self.assertEqual([p['label'] for p in data['periods']], ['Jan 2024', 'Feb 2024', 'Mar 2024'])
+        sales = data['revenues'][0]
+        self.assertEqual(sales['category'], 'sales')
+        self.assertEqual(sales['amounts'], [Decimal('100.00'), Decimal('150.00'), Decimal('0.00')])
+        self.assertEqual(sales['total'], Decimal('250.00'))
+        self.assertEqual(sales['variance'], [None, Decimal('50.00'), Decimal('-150.00')])
+        self.assertEqual(sales['variancePercent'][1], Decimal('50.00'))
+        self.assertEqual(data['totals']['netIncome'], [Decimal('100.00'), Decimal('90.00'), Decimal('40.00')])
+        self.assertEqual(data['netIncome'], Decimal('230.00'))
+
+    def test_explicit_periods_via_endpoint(self):
+        response = self.client.get('/api/finance/reports/', {
+            'type': 'comparative_income_statement',
+            'periods': '2024-03-01:2024-03-31,2024-01-01:2024-01-31',
+            'variance': 'false',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['granularity'], 'custom')
+        self.assertEqual([p['startDate'] for p in response.data['periods']], ['2024-03-01', '2024-01-01'])
+        sales = next(line for line in response.data['revenues'] if line['category'] == 'sales')
+        self.assertEqual(sales['amounts'], [Decimal('0.00'), Decimal('100.00')])
+        self.assertNotIn('variance', sales)
+
+        response = self.client.get('/api/finance/reports/', {
+            'type': 'comparative_income_statement',
+            'periods': '2024-01-01:2024-02-15,2024-02-01:2024-02-29',
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BudgetTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        Expense.objects.create(payee='Landlord', amount=Decimal('900.00'), date=date(2024, 1, 3), category='rent')
+
+    def test_actuals_follow_expense_writes(self):
+        response = self.client.post(
+            '/api/finance/budgets/',
+            {'category': 'rent', 'period': '2024-01-15', 'amount': '1000.00'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['period'], '2024-01-01')
+        budget = Budget.objects.get()
+        self.assertEqual(budget.actual_amount, Decimal('900.00'))
+
+        expense = Expense.objects.create(payee='Landlord', amount=Decimal('250.00'), date=date(2024, 1, 20), category='rent')
+        Expense.objects.create(payee='Power Co', amount=Decimal('80.00'), date=date(2024, 1, 20), category='utilities')
+        budget.refresh_from_db()
+        self.assertEqual(budget.actual_amount, Decimal('1150.00'))
+
+        expense.date = date(2024, 2, 1)
+        expense.save()
+        budget.refresh_from_db()
+        self.assertEqual(budget.actual_amount, Decimal('900.00'))
+
+        Budget.objects.filter(pk=budget.pk).update(actual_amount=0)
+        self.assertEqual(refresh_budget_actuals(), 1)
+        budget.refresh_from_db()
+        self.assertEqual(budget.actual_amount, Decimal('900.00'))
+
+    def test_category_spellings_share_one_budget(self):
+        first = self.client.post(
+            '/api/finance/budgets/',
+            {'category': 'office_supplies', 'period': '2024-01-01', 'amount': '100.00'},
+            format='json'
+        )
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        second = self.client.post(
+            '/api/finance/budgets/',
+            {'category': 'Office Supplies', 'period': '2024-01-31', 'amount': '200.00'},
+            format='json'
+        )
+        self.assertEqual(second.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_budget_vs_actual(self):
+        Budget.objects.create(category='rent', period=date(2024, 1, 1), amount=Decimal('1000.00'))
+        Budget.objects.create(category='rent', period=date(2024, 2, 1), amount=Decimal('1000.00'))
+        with self.assertNumQueries(1):
+            data = budget_vs_actual(date(2024, 1, 1), date(2024, 2, 29))
+        self.assertEqual(data['rows'][0]['variance'], Decimal('100.00'))
+        self.assertEqual(data['rows'][0]['utilization'], Decimal('90.00'))
+        self.assertEqual(data['categories'][0]['actual'], Decimal('900.00'))
+        self.assertEqual(data['totals']['budget'], Decimal('2000.00'))
+
+        response = self.client.get('/api/finance/budgets/vs-actual/', {'start_date': '2024-01-01', 'end_date': '2024-02-29'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['rows']), 2)
+
+
+class CashFlowForecastTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        # Twelve complete months before June 2025: sales grow 100 a month, rent is flat
+        for month in range(12):
+            day = date(2024, 6, 10) + relativedelta(months=month)
+            Income.objects.create(source='A', amount=Decimal(100 * (month + 1)), date=day, category='sales')
+            Expense.objects.create(payee='X', amount=Decimal('300.00'), date=day, category='rent')
+
+    def test_linear_trend_in_one_query(self):
+        # Plus the category slug lookup
+        with self.assertNumQueries(2):
+            data = build_forecast('linear', horizon=2, history_months=12, today=date(2025, 6, 15))
+        self.assertEqual(data['forecast']['monthStarts'], ['2025-06-01', '2025-07-01'])
+        self.assertEqual(data['forecast']['incomeData'], [1300.0, 1400.0])
+        self.assertEqual(data['forecast']['netData'], [1000.0, 1100.0])
+        self.assertEqual(data['expensesByCategory'], [{'category': 'rent', 'values': [300.0, 300.0]}])
+
+    def test_moving_average_and_seasonal_naive(self):
+        data = build_forecast('moving_average', horizon=1, history_months=12, window=3, today=date(2025, 6, 1))
+        self.assertEqual(data['forecast']['incomeData'], [1100.0])
+
+        data = build_forecast('seasonal_naive', horizon=2, history_months=12, today=date(2025, 6, 1))
+        self.assertEqual(data['forecast']['incomeData'], [100.0, 200.0])
+
+    def test_endpoint_validates_params(self):
+        response = self.client.get('/api/finance/cash-flow/forecast/', {'method': 'seasonal_naive', 'history': 6})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/finance/cash-flow/forecast/', {'horizon': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/finance/cash-flow/forecast/', {'method': 'moving_average'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['forecast']['labels']), 6)
+
+
+class RecurringExpenseTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.rent = RecurringExpense.objects.create(
+            payee='Landlord', amount=Decimal('1000.00'), category='rent',
+            frequency='monthly', start_date=date(2024, 1, 31)
+        )
+
+    def test_catch_up_is_idempotent(self):
+        result = materialize_recurring_expenses(as_of=date(2024, 4, 30))
+        self.assertEqual(result['created'], 4)
+        self.assertEqual(
+            list(Expense.objects.order_by('date').values_list('date', flat=True)),
+            [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)]
+        )
+        self.assertEqual(DailyFinanceRollup.objects.filter(kind='expense').count(), 4)
+
+        # Re-running, even after the watermark is lost, creates nothing new
+        RecurringExpense.objects.update(materialized_through=None)
+        self.assertEqual(materialize_recurring_expenses(as_of=date(2024, 4, 30))['created'], 0)
+        self.assertEqual(materialize_recurring_expenses(as_of=date(2024, 5, 31))['created'], 1)
+
+    def test_catch_up_uses_one_insert(self):
+        RecurringExpense.objects.create(
+            payee='Cloud', amount=Decimal('5.00'), category='software',
+            frequency='daily', start_date=date(2023, 1, 1), end_date=date(2024, 12, 31)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            result = materialize_recurring_expenses(as_of=date(2024, 12, 31))
+        self.assertEqual(result['created'], 731 + 12)
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "finance_app_expense"')]
+        # Batched (SQLite caps rows per INSERT by its parameter limit), never row by row
+        self.assertLess(len(inserts), 20)
+        self.assertEqual(Expense.objects.filter(category='software').count(), 731)
+
+    def test_occurrences_start_near_the_watermark(self):
+        def every_occurrence(template, after_date, through_date):
+            dates, index = [], 0
+            while (day := template.start_date + FREQUENCY_STEPS[template.frequency](index * template.interval)) <= through_date:
+                if after_date is None or day > after_date:
+                    dates.append(day)
+                index += 1
+            return dates
+
+        schedules = [
+            ('daily', 1, date(2020, 1, 1)), ('weekly', 2, date(2020, 1, 3)), ('monthly', 1, date(2020, 1, 31)),
+            ('monthly', 5, date(2020, 8, 30)), ('quarterly', 1, date(2020, 11, 30)), ('yearly', 1, date(2020, 2, 29)),
+        ]
+        for frequency, interval, start_date in schedules:
+            template = RecurringExpense(frequency=frequency, interval=interval, start_date=start_date)
+            for after_date in [None, date(2019, 6, 1), start_date, date(2021, 2, 28), date(2023, 3, 30), date(2024, 2, 29)]:
+                self.assertEqual(
+                    occurrence_dates(template, after_date, date(2025, 12, 31)),
+                    every_occurrence(template, after_date, date(2025, 12, 31)),
+                    (frequency, interval, start_date, after_date)
+                )
+
+        # Years after the start, only the last few occurrences are computed
+        steps = []
+        daily = RecurringExpense(frequency='daily', interval=1, start_date=date(2000, 1, 1))
+        with mock.patch.dict(FREQUENCY_STEPS, daily=lambda n: steps.append(n) or timedelta(days=n)):
+            self.assertEqual(occurrence_dates(daily, date(2024, 3, 30), date(2024, 3, 31)), [date(2024, 3, 31)])
+        self.assertLess(len(steps), 5)
+
+    def test_endpoints(self):
+        response = self.client.post('/api/finance/recurring-expenses/', {
+            'payee': 'SaaS', 'amount': '20.00', 'category': 'software',
+            'frequency': 'weekly', 'start_date': '2024-01-01', 'end_date': '2023-12-01'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post('/api/finance/recurring-expenses/materialize/', {'as_of': '2024-02-29'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        expense = Expense.objects.order_by('date').first()
+        self.assertEqual(self.client.get(f'/api/finance/expenses/{expense.pk}/').data['recurring_template'], self.rent.pk)
+
+
+class ReconciliationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.manual = Expense.objects.create(payee='ACME, Inc.', amount=Decimal('120.00'), date=date(2024, 5, 2), category='supplies')
+        self.imported = Expense.objects.create(payee='acme inc', amount=Decimal('120.00'), date=date(2024, 5, 4), category='supplies')
+        # Same payee but a different amount, and a matching amount outside the window
+        Expense.objects.create(payee='Acme', amount=Decimal('121.00'), date=date(2024, 5, 2), category='supplies')
+        Expense.objects.create(payee='Acme', amount=Decimal('120.00'), date=date(2024, 5, 20), category='supplies')
+
+    def test_normalize_party(self):
+        self.assertEqual(normalize_party('The ACME, Co.'), 'acme')
+        self.assertEqual(normalize_party('Acme  Widgets LLC'), 'acme widgets')
+
+    def test_matches_within_window(self):
+        pairs, candidates = find_duplicate_pairs('expense', date(2024, 5, 1), date(2024, 5, 31), window_days=3)
+        self.assertEqual(candidates, 4)
+        self.assertEqual(pairs, [(self.manual.pk, self.imported.pk, 'amount_party_date', 2)])
+
+    def test_reference_match_via_endpoint(self):
+        Income.objects.create(source='Client Ltd', amount=Decimal('500.00'), date=date(2024, 5, 3), category='sales', reference_number='INV-001')
+        Income.objects.create(source='CLIENT PAYMENT 8841', amount=Decimal('500.00'), date=date(2024, 5, 4), category='sales', reference_number='inv 001')
+        response = self.client.get('/api/finance/reconciliation/', {
+            'kind': 'income', 'start_date': '2024-05-01', 'end_date': '2024-05-31'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['totalPairs'], 1)
+        self.assertEqual(response.data['pairs'][0]['match'], 'reference')
+        self.assertEqual(response.data['pairs'][0]['first']['source'], 'Client Ltd')
+
+        response = self.client.get('/api/finance/reconciliation/', {'kind': 'payroll'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_naive_created_since_is_read_in_the_current_timezone(self):
+        response = self.client.get('/api/finance/reconciliation/?kind=income&created_since=2020-01-01T00:00:00')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get('/api/finance/reconciliation/?kind=income&created_since=2020-13-01T00:00:00')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FinanceAuditLogTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_put_and_delete_leave_a_trace(self):
+        response = self.client.post(
+            '/api/finance/expenses/',
+            {'payee': 'Power Co', 'amount': '80.00', 'date': '2024-04-01', 'category': 'utilities'},
+            format='json'
+        )
+        pk = response.data['id']
+        self.client.put(
+            f'/api/finance/expenses/{pk}/',
+            {'payee': 'Power Co', 'amount': '95.00', 'date': '2024-04-01', 'category': 'utilities'},
+            format='json'
+        )
+        self.client.delete(f'/api/finance/expenses/{pk}/')
+
+        response = self.client.get(f'/api/finance/expenses/{pk}/history/', {'limit': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        delete, update = response.data['results']
+        self.assertEqual(delete['action'], 'delete')
+        self.assertEqual(delete['changes']['amount'], '95.00')
+        self.assertEqual(update['action'], 'update')
+        # Only the changed field is recorded
+        self.assertEqual(update['changes'], {'amount': ['80.00', '95.00']})
+
+        response = self.client.get(f'/api/finance/expenses/{pk}/history/', {'cursor': response.data['next_cursor']})
+        self.assertEqual([entry['action'] for entry in response.data['results']], ['create'])
+        self.assertIsNone(response.data['next_cursor'])
+
+    def test_noop_and_suspended_writes_are_not_logged(self):
+        income = Income.objects.create(source='A', amount=Decimal('10.00'), date=date(2024, 4, 1), category='sales')
+        with CaptureQueriesContext(connection) as queries:
+            income.save()
+        self.assertFalse(any('finance_app_financeauditlog' in q['sql'] for q in queries))
+        self.assertEqual(FinanceAuditLog.objects.filter(entity='income', entity_id=income.pk).count(), 1)
+
+        with audit.suspended():
+            income.delete()
+        self.assertEqual(FinanceAuditLog.objects.count(), 1)
+
+    def test_entries_are_append_only(self):
+        Income.objects.create(source='A', amount=Decimal('10.00'), date=date(2024, 4, 1), category='sales')
+        entry = FinanceAuditLog.objects.get()
+        with self.assertRaises(TypeError):
+            entry.save()
+        with self.assertRaises(TypeError):
+            FinanceAuditLog.objects.all().delete()
+
+    def test_bulk_writes_are_logged_without_bulk_returned_ids(self):
+        # MySQL doesn't return ids from a multi-row INSERT
+        RecurringExpense.objects.create(
+            payee='Landlord', amount=Decimal('1000.00'), category='rent',
+            frequency='monthly', start_date=date(2024, 1, 1)
+        )
+        body = "source,amount,date,category\nClient A,100.00,2024-05-01,sales\nClient B,50.00,2024-05-02,sales\n"
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post('/api/finance/incomes/import/', body, content_type='text/csv')
+            materialize_recurring_expenses(as_of=date(2024, 3, 31))
+        # The batch is still one INSERT, with the ids read back in one SELECT
+        income_table = Income._meta.db_table
+        self.assertEqual(sum(q['sql'].startswith(f'INSERT INTO "{income_table}"') for q in queries.captured_queries), 1)
+
+        for model, entity in ((Income, 'income'), (Expense, 'expense')):
+            ids = set(model.objects.values_list('id', flat=True))
+            logged = set(FinanceAuditLog.objects.filter(entity=entity, action='create').values_list('entity_id', flat=True))
+            self.assertEqual(len(ids), 2 if model is Income else 3)
+            self.assertEqual(logged, ids)
+        self.assertEqual(
+            FinanceAuditLog.objects.get(entity='income', entity_id=Income.objects.get(source='Client B').pk).changes['amount'],
+            '50.00'
+        )
+
+
+class FinanceDashboardTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        get_cache().clear()
+        today = date.today()
+        Income.objects.create(source='A', amount=Decimal('400.00'), date=today - timedelta(days=5), category='sales')
+        Expense.objects.create(payee='X', amount=Decimal('150.00'), date=today - timedelta(days=3), category='rent')
+
+    def test_matches_individual_endpoints(self):
+        params = {'timeRange': '30days'}
+        response = self.client.get('/api/finance/dashboard/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data
+        self.assertEqual(data['summary'], self.client.get('/api/finance/summary/', params).data)
+        self.assertEqual(data['cashFlow'], self.client.get('/api/finance/cash-flow/', params).data)
+        self.assertEqual(data['balanceSheet'], self.client.get('/api/finance/balance-sheet/').data)
+        self.assertEqual(data['summary']['netIncome'], Decimal('250.00'))
+
+    def test_summary_and_cash_flow_share_one_rollup_query(self):
+        Expense.objects.create(payee='Y', amount=Decimal('25.00'), date=date.today() - timedelta(days=40), category='rent')
+        params = {'timeRange': '3months', 'period': 'weekly'}
+        # The grouped rollup query, category slugs, then the balance snapshot and its delta
+        with self.assertNumQueries(4):
+            data = build_dashboard(params)
+        self.assertEqual(data['summary'], self.client.get('/api/finance/summary/', params).data)
+        self.assertEqual(data['cashFlow'], self.client.get('/api/finance/cash-flow/', params).data)
+
+    def test_cached_until_ledger_changes(self):
+        self.client.get('/api/finance/dashboard/')
+        with self.assertNumQueries(0):
+            self.client.get('/api/finance/dashboard/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Income.objects.create(source='B', amount=Decimal('1.00'), date=date.today(), category='sales')
+        response = self.client.get('/api/finance/dashboard/')
+        self.assertEqual(response.data['balanceSheet']['assets']['total'], Decimal('401.00'))
+
+
+class FinanceCategoryTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        get_cache().clear()
+
+    def test_spelling_variants_share_one_category(self):
+        first = Expense.objects.create(payee='A', amount=Decimal('10.00'), date=date(2024, 3, 1), category='Office Supplies')
+        second = Expense.objects.create(payee='B', amount=Decimal('5.00'), date=date(2024, 3, 2), category='office-supplies ')
+        self.assertEqual(first.category, 'office_supplies')
+        self.assertEqual(first.category_ref_id, second.category_ref_id)
+        self.assertEqual(FinanceCategory.objects.filter(kind='expense').exclude(slug='').count(), 1)
+        rollup = DailyFinanceRollup.objects.get(kind='expense', day=date(2024, 3, 1))
+        self.assertEqual(rollup.category_ref_id, first.category_ref_id)
+
+    def test_second_spelling_of_a_category_is_rejected(self):
+        first = self.client.post('/api/finance/categories/', {'kind': 'expense', 'name': 'Office Supplies'}, format='json')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(first.data['slug'], 'office_supplies')
+        second = self.client.post('/api/finance/categories/', {'kind': 'expense', 'name': 'office supplies'}, format='json')
+        self.assertEqual(second.status_code, status.HTTP_400_BAD_REQUEST)
+        income = self.client.post('/api/finance/categories/', {'kind': 'income', 'name': 'office supplies'}, format='json')
+        self.assertEqual(income.status_code, status.HTTP_201_CREATED)
+
+    def test_closure_follows_reparenting(self):
+        ops = FinanceCategory.objects.create(kind='expense', name='Operations')
+        office = FinanceCategory.objects.create(kind='expense', name='Office', parent=ops)
+        supplies = FinanceCategory.objects.create(kind='expense', name='Supplies', parent=office)
+        self.assertEqual(
+            set(FinanceCategoryClosure.objects.filter(descendant=supplies).values_list('ancestor__slug', 'depth')),
+            {('supplies', 0), ('office', 1), ('operations', 2)}
+        )
+
+        office.parent = None
+        office.save()
+        self.assertEqual(
+            set(FinanceCategoryClosure.objects.filter(descendant=supplies).values_list('ancestor__slug', 'depth')),
+            {('supplies', 0), ('office', 1)}
+        )
+
+        ops.parent = supplies
+        ops.save()
+        with self.assertRaises(ValueError):
+            office.parent = ops
+            office.save()
+
+    def test_hierarchy_rollup_in_one_query(self):
+        ops = FinanceCategory.objects.create(kind='expense', name='Operations')
+        office = FinanceCategory.objects.create(kind='expense', name='Office', parent=ops)
+        FinanceCategory.objects.create(kind='expense', name='Supplies', parent=office)
+        Expense.objects.create(payee='A', amount=Decimal('10.00'), date=date(2024, 3, 1), category='supplies')
+        Expense.objects.create(payee='B', amount=Decimal('20.00'), date=date(2024, 3, 2), category='office')
+        Expense.objects.create(payee='C', amount=Decimal('40.00'), date=date(2024, 3, 3), category='operations')
+        Expense.objects.create(payee='D', amount=Decimal('80.00'), date=date(2024, 3, 4), category='rent')
+
+        with CaptureQueriesContext(connection) as queries:
+            data = category_tree_totals('expense', date(2024, 3, 1), date(2024, 3, 31))
+        self.assertEqual(len([q for q in queries if 'rollup' in q['sql']]), 1)
+        self.assertEqual(data['total'], Decimal('150.00'))
+        roots = {node['slug']: node for node in data['categories']}
+        self.assertEqual(roots['operations']['total'], Decimal('70.00'))
+        self.assertEqual(roots['operations']['ownTotal'], Decimal('40.00'))
+        office_node = roots['operations']['children'][0]
+        self.assertEqual((office_node['total'], office_node['ownTotal']), (Decimal('30.00'), Decimal('20.00')))
+        self.assertEqual(office_node['children'][0]['total'], Decimal('10.00'))
+
+    def test_api_rejects_cross_kind_parent_and_protected_delete(self):
+        Expense.objects.create(payee='A', amount=Decimal('10.00'), date=date(2024, 3, 1), category='rent')
+        income_parent = FinanceCategory.objects.create(kind='income', name='Sales')
+        response = self.client.post(
+            '/api/finance/categories/', {'kind': 'expense', 'name': 'Travel', 'parent': income_parent.pk}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        rent = FinanceCategory.objects.get(kind='expense', slug='rent')
+        response = self.client.delete(f'/api/finance/categories/{rent.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get('/api/finance/categories/rollup/', {'kind': 'expense', 'start_date': '2024-03-01', 'end_date': '2024-03-31'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], Decimal('10.00'))
+
+
+class FinanceQueryBudgetTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+
+    def test_budget_covers_every_route(self):
+        self.assertEqual(finance_url_names(), set(ENDPOINTS) | WRITE_ONLY_ENDPOINTS)
+        self.assertEqual(set(load_query_budget()), set(ENDPOINTS))
+
+    def test_query_counts_within_budget_at_any_size(self):
+        small = run_benchmarks(seed_ledger(300, seed=1), repeat=1)
+        self.assertEqual(over_budget(small, load_query_budget()), [])
+
+        larger = run_benchmarks(seed_ledger(1200, seed=2), repeat=1)
+        self.assertEqual(
+            {name: result['queries'] for name, result in larger.items()},
+            {name: result['queries'] for name, result in small.items()}
+        )
+
+
+class AnalyticsCacheTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        get_cache().clear()
+        Income.objects.create(source='A', amount=Decimal('100.00'), date=date.today(), category='sales')
+
+    def test_repeat_requests_hit_cache_until_ledger_changes(self):
+        first = self.client.get('/api/finance/summary/', {'timeRange': '30days'})
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/finance/summary/', {'timeRange': '30days'})
+        self.assertEqual(first.data, second.data)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Income.objects.create(source='B', amount=Decimal('50.00'), date=date.today(), category='sales')
+        third = self.client.get('/api/finance/summary/', {'timeRange': '30days'})
+        self.assertEqual(third.data['totalIncome'], Decimal('150.00'))
+
+        stats = self.client.get('/api/finance/cache-stats/').data
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    def test_version_bumps_only_after_commit(self):
+        self.client.get('/api/finance/summary/', {'timeRange': '30days'})
+        version = data_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Income.objects.create(source='B', amount=Decimal('50.00'), date=date.today(), category='sales')
+                self.assertEqual(data_version(), version)
+                # A read racing the uncommitted write is still answered from the old entry
+                with self.assertNumQueries(0):
+                    self.client.get('/api/finance/summary/', {'timeRange': '30days'})
+            self.assertEqual(data_version(), version)
+        self.assertGreater(data_version(), version)
+
+    def test_param_order_does_not_split_entries(self):
+        self.client.get('/api/finance/cash-flow/?period=monthly&timeRange=1year')
+        self.client.get('/api/finance/cash-flow/?timeRange=1year&period=monthly')
+        self.assertEqual(self.client.get('/api/finance/cache-stats/').data['hits'], 1)
+
+    def test_a_failed_build_is_not_cached(self):
+        from finance_app import views
+        real = views.build_balance_sheet
+        with mock.patch.object(views, 'build_balance_sheet', side_effect=[RuntimeError('boom'), real(date.today())]):
+            failed = self.client.get('/api/finance/balance-sheet/')
+            retried = self.client.get('/api/finance/balance-sheet/')
+        self.assertEqual(failed.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(retried.status_code, status.HTTP_200_OK)
+        self.assertIn('assets', retried.data)
+
+    def test_bad_as_of_date_is_rejected(self):
+        for _ in range(2):
+            response = self.client.get('/api/finance/balance-sheet/', {'as_of_date': 'garbage'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/finance/cache-stats/').data['hits'], 0)
+
+
+class LedgerImportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_csv_import_reports_bad_rows_and_keeps_good_ones(self):
+        body = (
+            "source,amount,date,category,reference_number\n"
+            "Client A,100.00,2024-05-01,sales,INV-1\n"
+            "Client B,not-a-number,2024-05-02,sales,INV-2\n"
+            "Client C,250.50,2024-05-01,sales,\n"
+        )
+        response = self.client.post('/api/finance/incomes/import/?batch_size=1', body, content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['failed'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 2)
+        self.assertIn('amount', response.data['errors'][0]['errors'])
+
+        rollup = DailyFinanceRollup.objects.get(kind='income', day=date(2024, 5, 1), category_ref__slug='sales')
+        self.assertEqual((rollup.total, rollup.entry_count), (Decimal('350.50'), 2))
+
+    def test_ndjson_import(self):
+        body = (
+            '{"payee": "Landlord", "amount": "1200", "date": "2024-05-01", "category": "rent"}\n'
+            '\n'
+            '{"payee": "Power Co", "amount": "80.25", "date": "2024-05-03"}\n'
+            'not json\n'
+        )
+        response = self.client.post('/api/finance/expenses/import/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['errors'], [{'row': 3, 'errors': {'non_field_errors': ['Invalid JSON']}}])
+        self.assertEqual(Expense.objects.get(payee='Power Co').category, 'operational_expenses')
+
+
+class LedgerExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        Expense.objects.create(payee='Landlord', amount=Decimal('1200.00'), date=date(2024, 5, 1), category='rent')
+        Expense.objects.create(payee='Power, Inc', amount=Decimal('80.25'), date=date(2024, 5, 3), category='utilities')
+
+    def test_csv_export_streams_filtered_rows(self):
+        response = self.client.get('/api/finance/expenses/export/', {'category': 'utilities'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'payee', 'amount'])
+        self.assertEqual(len(lines), 2)
+        self.assertIn('"Power, Inc",80.25,2024-05-03,utilities', lines[1])
+
+    def test_ndjson_export(self):
+        response = self.client.get('/api/finance/expenses/export/', {'file_format': 'ndjson'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['payee'] for row in rows], ['Power, Inc', 'Landlord'])
+        self.assertEqual(rows[1]['amount'], '1200.00')
+
+
+@override_settings(FINANCE_REPORT_JOBS_IN_PROCESS=False)
+class ReportJobTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        Income.objects.create(source='A', amount=Decimal('400.00'), date=date(2024, 2, 5), category='sales')
+        Expense.objects.create(payee='X', amount=Decimal('150.00'), date=date(2024, 2, 6), category='rent')
+
+    def test_job_lifecycle(self):
+        response = self.client.post('/api/finance/report-jobs/', {
+            'report_type': 'income_statement',
+            'start_date': '2024-02-01',
+            'end_date': '2024-02-29',
+            'report_name': 'February'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'queued')
+        job_id = response.data['id']
+
+        self.assertEqual(claim_next_job(), job_id)
+        self.assertIsNone(claim_next_job())
+        execute_job(job_id)
+
+        job = self.client.get(f'/api/finance/report-jobs/{job_id}/').data
+        self.assertEqual(job['status'], 'completed')
+        report = ReportHistory.objects.get(pk=job['report'])
+        self.assertEqual(report.report_name, 'February')
+        self.assertEqual(Decimal(report.report_data['netIncome']), Decimal('250.00'))
+
+    def test_jobs_left_by_a_dead_process_are_picked_up_again(self):
+        now = timezone.now()
+        stuck = ReportJob.objects.create(
+            start_date=date(2024, 2, 1), end_date=date(2024, 2, 29),
+            status=ReportJob.STATUS_RUNNING, started_at=now - timedelta(hours=2)
+        )
+        ReportJob.objects.create(
+            start_date=date(2024, 2, 1), end_date=date(2024, 2, 29),
+            status=ReportJob.STATUS_RUNNING, started_at=now - timedelta(minutes=1)
+        )
+        queued = ReportJob.objects.create(start_date=date(2024, 2, 1), end_date=date(2024, 2, 29))
+        ReportJob.objects.filter(pk=queued.pk).update(created_at=now + timedelta(seconds=1))
+
+        # The recently started job is still owned by a live worker
+        self.assertEqual(claim_next_job(), stuck.pk)
+        self.assertEqual(claim_next_job(), queued.pk)
+        self.assertIsNone(claim_next_job())
+
+    @override_settings(FINANCE_REPORT_JOB_TIMEOUT=0.03)
+    def test_long_reports_keep_their_claim(self):
+        job = ReportJob.objects.create(report_type='income_statement', start_date=date(2024, 2, 1), end_date=date(2024, 2, 29))
+        self.assertEqual(claim_next_job(), job.pk)
+
+        def slow_build(start_date, end_date):
+            time.sleep(0.1)
+            return {}
+
+        with mock.patch.dict(jobs.REPORT_BUILDERS, income_statement=slow_build):
+            with mock.patch.object(jobs, 'touch_job') as touch_job:
+                execute_job(job.pk)
+        touch_job.assert_called_with(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ReportJob.STATUS_COMPLETED)
+        ReportJob.objects.filter(pk=job.pk).update(status=ReportJob.STATUS_RUNNING, started_at=timezone.now() - timedelta(hours=1))
+        jobs.touch_job(job.pk)
+        self.assertFalse(jobs.claimable_jobs().filter(pk=job.pk).exists())
+
+    def test_invalid_report_type(self):
+        response = self.client.post('/api/finance/report-jobs/', {
+            'report_type': 'cash_forecast', 'start_date': '2024-02-01', 'end_date': '2024-02-29'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ReportHistoryStorageTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.payload = {'revenues': [{'category': 'sales', 'amount': 100}] * 50, 'netIncome': 100}
+
+    def create_report(self, name):
+        return self.client.post('/api/finance/report-history/', {
+            'report_name': name,
+            'report_type': 'income_statement',
+            'start_date': '2024-01-01',
+            'end_date': '2024-01-31',
+            'report_data': self.payload
+        }, format='json')
+
+    def test_identical_payloads_are_stored_once_compressed(self):
+        first = self.create_report('January')
+        self.create_report('January (copy)')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(ReportPayload.objects.count(), 1)
+        payload = ReportPayload.objects.get()
+        self.assertLess(len(payload.data), payload.size)
+
+        detail = self.client.get(f"/api/finance/report-history/{first.data['id']}/")
+        self.assertEqual(detail.data['report_data'], self.payload)
+
+    def test_listings_omit_payloads_unless_asked(self):
+        for month in range(3):
+            self.create_report(f'Report {month}')
+        with self.assertNumQueries(1):
+            listing = self.client.get('/api/finance/report-history/')
+        self.assertEqual(len(listing.data), 3)
+        self.assertNotIn('report_data', listing.data[0])
+        self.assertEqual(listing.data[0]['report_name'], 'Report 2')
+
+        with self.assertNumQueries(1):
+            listing = self.client.get('/api/finance/report-history/', {'include': 'report_data'})
+        self.assertEqual(listing.data[0]['report_data'], self.payload)
+        self.assertEqual(self.client.get('/api/finance/report-history/', {'include': 'payload'}).status_code, 400)
+
+        page = self.client.get('/api/finance/report-history/', {'limit': 2})
+        self.assertNotIn('report_data', page.data['results'][0])
+        self.assertEqual([row['report_name'] for row in page.data['results']], ['Report 2', 'Report 1'])
+        rest = self.client.get('/api/finance/report-history/', {'limit': 2, 'cursor': page.data['next_cursor']})
+        self.assertEqual([row['report_name'] for row in rest.data['results']], ['Report 0'])
+
+    def test_deleting_last_reference_drops_payload(self):
+        first = self.create_report('A')
+        second = self.create_report('B')
+        self.client.delete(f"/api/finance/report-history/{first.data['id']}/")
+        self.assertEqual(ReportPayload.objects.count(), 1)
+        self.client.delete(f"/api/finance/report-history/{second.data['id']}/")
+        self.assertEqual(ReportPayload.objects.count(), 0)
+
+
+class LedgerQueryPlanTest(TestCase):
+    """
+    Guards the queries the finance views issue against regressing to full
+    table scans once the planner sees realistic volumes. The SQL is captured
+    from real requests, so the checks follow the views when they change.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        if connection.vendor not in ('sqlite', 'mysql'):
+            return
+        today = date.today()
+        income_categories = ['sales', 'services', 'investments', 'other_income']
+        expense_categories = ['rent', 'payroll', 'utilities', 'travel', 'software', 'marketing']
+        incomes = [
+            Income(
+                source=f'Client {i}',
+                amount=Decimal(i % 500),
+                date=today - timedelta(days=i % 1500),
+                category=income_categories[i % len(income_categories)]
+            )
+            for i in range(6000)
+        ]
+        expenses = [
+            Expense(
+                payee=f'Vendor {i}',
+                amount=Decimal(i % 300),
+                date=today - timedelta(days=i % 1500),
+                category=expense_categories[i % len(expense_categories)]
+            )
+            for i in range(6000)
+        ]
+        FinanceCategory.objects.assign('income', incomes)
+        FinanceCategory.objects.assign('expense', expenses)
+        Income.objects.bulk_create(incomes, batch_size=1000)
+        Expense.objects.bulk_create(expenses, batch_size=1000)
+        rebuild_rollups()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+            else:
+                cursor.execute('ANALYZE TABLE finance_app_income, finance_app_expense, finance_app_dailyfinancerollup')
+
+    def setUp(self):
+        if connection.vendor not in ('sqlite', 'mysql'):
+            self.skipTest(f"No plan expectations for {connection.vendor}")
+        self.client = APIClient()
+        # Analytics responses are cached; every request must reach the database
+        bump_data_version()
+
+    def view_queries(self, path, params, table):
+        """The SQL a GET to path runs against table."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statements = [q['sql'] for q in queries if f'FROM "{table}"' in q['sql'] or f'FROM `{table}`' in q['sql']]
+        self.assertTrue(statements, f"GET {path} did not query {table}")
+        return statements
+
+    def assertIndexRangeScan(self, sql, table, index_prefix, ordered_by_index=False):
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = '\n'.join(row[-1] for row in cursor.fetchall())
+            self.assertRegex(plan, rf'SEARCH {table} USING (COVERING )?INDEX {index_prefix}', plan)
+            self.assertNotRegex(plan, rf'SCAN {table}\b', plan)
+            if ordered_by_index:
+                self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan)
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN {sql}')
+            columns = [col[0] for col in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        for row in rows:
+            if row['table'] == table:
+                self.assertNotEqual(row['type'], 'ALL')
+                self.assertTrue((row['key'] or '').startswith(index_prefix))
+
+    def test_keyset_page(self):
+        first = self.client.get('/api/finance/incomes/', {'limit': 50, 'start_date': '2000-01-01'})
+        params = {'limit': 50, 'start_date': '2000-01-01', 'cursor': first.data['next_cursor']}
+        sql, = self.view_queries('/api/finance/incomes/', params, 'finance_app_income')
+        self.assertIndexRangeScan(sql, 'finance_app_income', 'fin_income_date_id_idx', ordered_by_index=True)
+
+    def test_category_filtered_keyset_page(self):
+        first = self.client.get('/api/finance/expenses/', {'limit': 50, 'category': 'rent'})
+        params = {'limit': 50, 'category': 'rent', 'cursor': first.data['next_cursor']}
+        sql, = self.view_queries('/api/finance/expenses/', params, 'finance_app_expense')
+        self.assertIndexRangeScan(sql, 'finance_app_expense', 'fin_expense_cat_date_idx', ordered_by_index=True)
+
+    def test_rollup_by_kind_day_range_and_category(self):
+        # Income statement: one kind over a day range, grouped on category_ref
+        params = {'type': 'income_statement', 'start_date': (date.today() - timedelta(days=90)).isoformat()}
+        for sql in self.view_queries('/api/finance/reports/', params, 'finance_app_dailyfinancerollup'):
+            self.assertIndexRangeScan(sql, 'finance_app_dailyfinancerollup', 'finance_app_dailyfinancerollup_kind_day_')
+
+    def test_rollup_day_range_queries(self):
+        # Summary and cash flow cover both kinds over a day range
+        for path in ('/api/finance/summary/', '/api/finance/cash-flow/'):
+            for sql in self.view_queries(path, {'timeRange': '30days'}, 'finance_app_dailyfinancerollup'):
+                self.assertIndexRangeScan(sql, 'finance_app_dailyfinancerollup', 'fin_rollup_day_idx')
@@ -3,14 +3,37 @@ from . import views
 
 urlpatterns = [
     path('incomes/', views.income_list_create, name='income-list-create'),
+    path('incomes/export/', views.income_export, name='income-export'),
+    path('incomes/import/', views.income_import, name='income-import'),
     path('incomes/<int:pk>/', views.income_detail, name='income-detail'),
+    path('incomes/<int:pk>/history/', views.audit_history, {'entity': 'income'}, name='income-history'),
     path('expenses/', views.expense_list_create, name='expense-list-create'),
+    path('expenses/export/', views.expense_export, name='expense-export'),
+    path('expenses/import/', views.expense_import, name='expense-import'),
     path('expenses/<int:pk>/', views.expense_detail, name='expense-detail'),
+    path('expenses/<int:pk>/history/', views.audit_history, {'entity': 'expense'}, name='expense-history'),
     path('summary/', views.financial_summary, name='financial-summary'),
+    path('dashboard/', views.finance_dashboard, name='finance-dashboard'),
     path('cash-flow/', views.cash_flow, name='cash-flow'),
+    path('cash-flow/forecast/', views.cash_flow_forecast, name='cash-flow-forecast'),
     path('balance-sheet/', views.balance_sheet, name='balance-sheet'),
     path('reports/', views.financial_reports, name='financial-reports'),
     path('report-history/', views.report_history, name='report-history'),
     path('report-history/<int:pk>/', views.report_history_detail, name='report-history-detail'),
+    path('report-jobs/', views.report_jobs, name='report-jobs'),
+    path('report-jobs/<int:pk>/', views.report_job_detail, name='report-job-detail'),
+    path('categories/', views.category_list_create, name='category-list-create'),
+    path('categories/rollup/', views.category_rollup, name='category-rollup'),
+    path('categories/<int:pk>/', views.category_detail, name='category-detail'),
+    path('budgets/', views.budget_list_create, name='budget-list-create'),
+    path('budgets/vs-actual/', views.budget_vs_actual_report, name='budget-vs-actual'),
+    path('budgets/<int:pk>/', views.budget_detail, name='budget-detail'),
+    path('budgets/<int:pk>/history/', views.audit_history, {'entity': 'budget'}, name='budget-history'),
+    path('recurring-expenses/', views.recurring_expense_list_create, name='recurring-expense-list-create'),
+    path('recurring-expenses/materialize/', views.recurring_expense_materialize, name='recurring-expense-materialize'),
+    path('recurring-expenses/<int:pk>/', views.recurring_expense_detail, name='recurring-expense-detail'),
+    path('recurring-expenses/<int:pk>/history/', views.audit_history, {'entity': 'recurring_expense'}, name='recurring-expense-history'),
+    path('reconciliation/', views.reconciliation_matches, name='reconciliation-matches'),
+    path('cache-stats/', views.finance_cache_stats, name='finance-cache-stats'),
     path('test/', views.test_api, name='test-api'),
 ]
\ No newline at end of file
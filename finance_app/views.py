@@ -1,23 +1,55 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import ProtectedError
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from datetime import date, timedelta, datetime
+from decimal import Decimal, InvalidOperation
 from dateutil.relativedelta import relativedelta
-from django.db.models.functions import TruncMonth, TruncQuarter, TruncYear
-from django.utils.dateparse import parse_date
+from django.utils.dateparse import parse_date, parse_datetime
 import traceback
 
-from .models import Income, Expense, ReportHistory
-from .serializers import IncomeSerializer, ExpenseSerializer, ReportHistorySerializer
+from .models import Income, Expense, Budget, RecurringExpense, FinanceAuditLog, FinanceCategory, ReportHistory, ReportJob, UNCATEGORIZED_SLUG
+from .serializers import IncomeSerializer, ExpenseSerializer, BudgetSerializer, RecurringExpenseSerializer, FinanceAuditLogSerializer, FinanceCategorySerializer, ReportHistorySerializer, ReportHistorySummarySerializer, ReportJobSerializer
+from .pagination import InvalidQuery, filter_ledger, paginate_keyset, parse_date_param, wants_page
+from .summary import build_period_summary
+from .budgets import budget_vs_actual
+from .recurring import materialize_recurring_expenses
+from .reconciliation import DEFAULT_WINDOW_DAYS, MAX_WINDOW_DAYS, find_duplicate_pairs
+from .reports import REPORT_BUILDERS, REPORT_OPTIONS
+from .jobs import enqueue_report
+from .cashflow import build_cash_flow, resolve_date_range
+from .forecast import DEFAULT_HISTORY, DEFAULT_HORIZON, DEFAULT_WINDOW, build_forecast
+from .snapshots import build_balance_sheet
+from .dashboard import build_dashboard
+from .categories import category_tree_totals
+from .cache import cached_response, cache_stats
+from .importer import DEFAULT_BATCH_SIZE, FORMATS, decode_lines, detect_format, import_ledger, read_rows
+from .exporter import CONTENT_TYPES, stream_ledger
+from .rollups import LEDGER_MODELS
+
+
+def _ledger_page_response(queryset, params, serializer_class):
+    rows, next_cursor, limit = paginate_keyset(queryset, params)
+    return Response({
+        'results': serializer_class(rows, many=True).data,
+        'next_cursor': next_cursor,
+        'limit': limit
+    })
 
 @api_view(['GET', 'POST'])
 def income_list_create(request):
     if request.method == 'GET':
         try:
-            incomes = Income.objects.all().order_by('-date')
-            serializer = IncomeSerializer(incomes, many=True)
+            incomes = filter_ledger(Income.objects.all(), request.query_params, 'source')
+            if wants_page(request.query_params):
+                return _ledger_page_response(incomes, request.query_params, IncomeSerializer)
+            serializer = IncomeSerializer(incomes.order_by('-date', '-id'), many=True)
             return Response(serializer.data)
+        except InvalidQuery as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             print(f"Error fetching incomes: {str(e)}")
             return Response([])
@@ -41,17 +73,19 @@ def income_list_create(request):
                 return Response({"error": "Date is required"}, status=status.HTTP_400_BAD_REQUEST)
             
             try:
-                # Convert amount to float if it's a string
+                # Parse string amounts as Decimal so cents survive exactly
                 if isinstance(income_data['amount'], str):
-                    income_data['amount'] = float(income_data['amount'])
-            except ValueError:
+                    income_data['amount'] = Decimal(income_data['amount'].strip())
+            except (InvalidOperation, ValueError):
                 return Response({"error": "Amount must be a valid number"}, status=status.HTTP_400_BAD_REQUEST)
             
             # Create serializer
             serializer = IncomeSerializer(data=income_data)
             
             if serializer.is_valid():
-                serializer.save()
+                # The row, its derived tables and its audit entry commit together
+                with transaction.atomic():
+                    serializer.save()
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             
             print(f"Validation errors: {serializer.errors}")
@@ -63,6 +97,68 @@ def income_list_create(request):
             traceback.print_exc()
             return Response({"error": error_msg}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def _import_ledger_request(request, kind):
+    try:
+        if request.content_type.startswith('multipart/'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({"error": "Upload the data as a file field named 'file'"}, status=status.HTTP_400_BAD_REQUEST)
+            lines = decode_lines(upload)
+            default_format = detect_format(upload.name)
+        else:
+            if request.stream is None:
+                return Response({"error": "Request body is empty"}, status=status.HTTP_400_BAD_REQUEST)
+            lines = decode_lines(request.stream)
+            default_format = detect_format(request.content_type)
+
+        file_format = request.query_params.get('file_format', default_format)
+        if file_format not in FORMATS:
+            return Response({"error": f"file_format must be one of {', '.join(FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            batch_size = max(1, int(request.query_params.get('batch_size', DEFAULT_BATCH_SIZE)))
+        except ValueError:
+            return Response({"error": "batch_size must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = import_ledger(kind, read_rows(lines, file_format), batch_size=batch_size)
+        return Response(result)
+    except UnicodeDecodeError:
+        return Response({"error": "Data must be UTF-8 encoded; rows before the bad line were imported"}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        error_msg = f"Error importing {kind} rows: {str(e)}"
+        print(error_msg)
+        traceback.print_exc()
+        return Response({"error": error_msg}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+def _export_ledger_request(request, kind, party_field):
+    file_format = request.query_params.get('file_format', 'csv')
+    if file_format not in CONTENT_TYPES:
+        return Response({"error": f"file_format must be one of {', '.join(CONTENT_TYPES)}"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        queryset = filter_ledger(LEDGER_MODELS[kind].objects.all(), request.query_params, party_field)
+    except InvalidQuery as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(
+        stream_ledger(queryset.order_by('-date', '-id'), kind, file_format),
+        content_type=CONTENT_TYPES[file_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{kind}s.{file_format}"'
+    return response
+
+@api_view(['GET'])
+def income_export(request):
+    """
+    Stream every income matching the list filters as CSV or NDJSON.
+    """
+    return _export_ledger_request(request, 'income', 'source')
+
+@api_view(['POST'])
+def income_import(request):
+    """
+    Bulk-load incomes from a CSV or NDJSON body (or a multipart 'file').
+    """
+    return _import_ledger_request(request, 'income')
+
 @api_view(['GET', 'PUT', 'DELETE'])
 def income_detail(request, pk):
     try:
@@ -87,7 +183,8 @@ def income_detail(request, pk):
                 
             serializer = IncomeSerializer(income, data=update_data)
             if serializer.is_valid():
-                serializer.save()
+                with transaction.atomic():
+                    serializer.save()
                 return Response(serializer.data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
@@ -96,7 +193,8 @@ def income_detail(request, pk):
 
     elif request.method == 'DELETE':
         try:
-            income.delete()
+            with transaction.atomic():
+                income.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Exception as e:
             print(f"Error deleting income: {str(e)}")
@@ -106,9 +204,13 @@ def income_detail(request, pk):
 def expense_list_create(request):
     if request.method == 'GET':
         try:
-            expenses = Expense.objects.all().order_by('-date')
-            serializer = ExpenseSerializer(expenses, many=True)
+            expenses = filter_ledger(Expense.objects.all(), request.query_params, 'payee')
+            if wants_page(request.query_params):
+                return _ledger_page_response(expenses, request.query_params, ExpenseSerializer)
+            serializer = ExpenseSerializer(expenses.order_by('-date', '-id'), many=True)
             return Response(serializer.data)
+        except InvalidQuery as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             print(f"Error fetching expenses: {str(e)}")
             return Response([])
@@ -133,17 +235,18 @@ def expense_list_create(request):
                 return Response({"error": "Date is required"}, status=status.HTTP_400_BAD_REQUEST)
             
             try:
-                # Convert amount to float if it's a string
+                # Parse string amounts as Decimal so cents survive exactly
                 if isinstance(expense_data['amount'], str):
-                    expense_data['amount'] = float(expense_data['amount'])
-            except ValueError:
+                    expense_data['amount'] = Decimal(expense_data['amount'].strip())
+            except (InvalidOperation, ValueError):
                 return Response({"error": "Amount must be a valid number"}, status=status.HTTP_400_BAD_REQUEST)
             
             # Create serializer
             serializer = ExpenseSerializer(data=expense_data)
             
             if serializer.is_valid():
-                serializer.save()
+                with transaction.atomic():
+                    serializer.save()
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             
             print(f"Validation errors: {serializer.errors}")
@@ -155,6 +258,20 @@ def expense_list_create(request):
             traceback.print_exc()
             return Response({"error": error_msg}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+def expense_export(request):
+    """
+    Stream every expense matching the list filters as CSV or NDJSON.
+    """
+    return _export_ledger_request(request, 'expense', 'payee')
+
+@api_view(['POST'])
+def expense_import(request):
+    """
+    Bulk-load expenses from a CSV or NDJSON body (or a multipart 'file').
+    """
+    return _import_ledger_request(request, 'expense')
+
 @api_view(['GET', 'PUT', 'DELETE'])
 def expense_detail(request, pk):
     try:
@@ -181,7 +298,8 @@ def expense_detail(request, pk):
                 
             serializer = ExpenseSerializer(expense, data=update_data)
             if serializer.is_valid():
-                serializer.save()
+                with transaction.atomic():
+                    serializer.save()
                 return Response(serializer.data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
@@ -190,365 +308,106 @@ def expense_detail(request, pk):
 
     elif request.method == 'DELETE':
         try:
-            expense.delete()
+            with transaction.atomic():
+                expense.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Exception as e:
             print(f"Error deleting expense: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
+@cached_response('summary')
 def financial_summary(request):
     try:
         # Get time range from query params
         time_range = request.query_params.get('timeRange', '3months')
-        
-        # Calculate date ranges based on time_range
-        today = date.today()
-        if time_range == '30days':
-            start_date = today - timedelta(days=30)
-        elif time_range == '3months':
-            start_date = today - timedelta(days=90)
-        elif time_range == '6months':
-            start_date = today - timedelta(days=180)
-        elif time_range == '1year':
-            start_date = today - timedelta(days=365)
-        else:
-            # Default to current month
-            start_date = today.replace(day=1)
-        
-        end_date = today
-        
-        # Get previous period for comparison
-        period_length = (end_date - start_date).days
-        prev_start_date = start_date - timedelta(days=period_length)
-        prev_end_date = start_date - timedelta(days=1)
-        
-        # Calculate current period totals
-        total_income = Income.objects.filter(date__range=[start_date, end_date]).aggregate(total=Sum('amount'))['total'] or 0
-        total_expenses = Expense.objects.filter(date__range=[start_date, end_date]).aggregate(total=Sum('amount'))['total'] or 0
-        net_income = total_income - total_expenses
-        
-        # Calculate previous period totals for comparison
-        prev_income = Income.objects.filter(date__range=[prev_start_date, prev_end_date]).aggregate(total=Sum('amount'))['total'] or 0
-        prev_expenses = Expense.objects.filter(date__range=[prev_start_date, prev_end_date]).aggregate(total=Sum('amount'))['total'] or 0
-        prev_profit = prev_income - prev_expenses
-        
-        # Calculate percent changes
-        income_change = ((total_income - prev_income) / prev_income * 100) if prev_income else 0
-        expense_change = ((total_expenses - prev_expenses) / prev_expenses * 100) if prev_expenses else 0
-        profit_change = ((net_income - prev_profit) / prev_profit * 100) if prev_profit else 0
-        
-        # Get income by category
-        income_by_category = []
-        income_categories = Income.objects.filter(date__range=[start_date, end_date]).values('category').annotate(total=Sum('amount'))
-        for category in income_categories:
-            income_by_category.append({
-                'category': category['category'],
-                'amount': category['total']
-            })
-        
-        # Get expenses by category
-        expenses_by_category = []
-        expense_categories = Expense.objects.filter(date__range=[start_date, end_date]).values('category').annotate(total=Sum('amount'))
-        for category in expense_categories:
-            expenses_by_category.append({
-                'category': category['category'],
-                'amount': category['total']
-            })
-        
-        data = {
-            'totalIncome': total_income,
-            'totalExpenses': total_expenses,
-            'netIncome': net_income,
-            'incomeByCategory': income_by_category,
-            'expensesByCategory': expenses_by_category,
-            'comparisonToPreviousPeriod': {
-                'income': income_change,
-                'expenses': expense_change,
-                'profit': profit_change
-            },
-            'timeRange': time_range,
-            'startDate': start_date.isoformat(),
-            'endDate': end_date.isoformat()
-        }
-        
-        return Response(data)
+        return Response(build_period_summary(time_range))
     except Exception as e:
         print(f"Error in financial_summary: {str(e)}")
         traceback.print_exc()
-        # Return empty data structure
-        return Response({
-            'totalIncome': 0,
-            'totalExpenses': 0,
-            'netIncome': 0,
-            'incomeByCategory': [],
-            'expensesByCategory': [],
-            'comparisonToPreviousPeriod': {
-                'income': 0,
-                'expenses': 0,
-                'profit': 0
-            },
-            'timeRange': request.query_params.get('timeRange', '3months'),
-            'startDate': (date.today() - timedelta(days=90)).isoformat(),
-            'endDate': date.today().isoformat()
-        })
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
+@cached_response('cash-flow')
 def cash_flow(request):
+    period = request.query_params.get('period', 'monthly')
+    time_range = request.query_params.get('timeRange', '3months')
     try:
-        period = request.query_params.get('period', 'monthly')
-        time_range = request.query_params.get('timeRange', '3months')
-        
-        # Determine time frame based on period and time_range
-        today = date.today()
-        if time_range == '30days':
-            start_date = today - timedelta(days=30)
-        elif time_range == '3months':
-            start_date = today - timedelta(days=90)
-        elif time_range == '6months':
-            start_date = today - timedelta(days=180)
-        elif time_range == '1year':
-            start_date = today - timedelta(days=365)
-        else:
-            start_date = today - timedelta(days=90)  # Default to 3 months
-        
-        if period == 'monthly':
-            # Group by month
-            income_data = (
-                Income.objects.filter(date__gte=start_date, date__lte=today)
-                .annotate(month=TruncMonth('date'))
-                .values('month')
-                .annotate(total=Sum('amount'))
-                .order_by('month')
-            )
-            
-            expense_data = (
-                Expense.objects.filter(date__gte=start_date, date__lte=today)
-                .annotate(month=TruncMonth('date'))
-                .values('month')
-                .annotate(total=Sum('amount'))
-                .order_by('month')
-            )
-            
-            # Create a merged dataset
-            merged_data = {}
-            
-            # Process income data
-            for entry in income_data:
-                month_str = entry['month'].strftime('%b %Y')
-                if month_str not in merged_data:
-                    merged_data[month_str] = {'income': 0, 'expenses': 0, 'net': 0}
-                merged_data[month_str]['income'] = float(entry['total'])
-            
-            # Process expense data
-            for entry in expense_data:
-                month_str = entry['month'].strftime('%b %Y')
-                if month_str not in merged_data:
-                    merged_data[month_str] = {'income': 0, 'expenses': 0, 'net': 0}
-                merged_data[month_str]['expenses'] = float(entry['total'])
-            
-            # Calculate net for each month
-            for month in merged_data:
-                merged_data[month]['net'] = merged_data[month]['income'] - merged_data[month]['expenses']
-            
-            # Convert to lists for chart data
-            labels = list(merged_data.keys())
-            income_values = [entry['income'] for entry in merged_data.values()]
-            expense_values = [entry['expenses'] for entry in merged_data.values()]
-            net_values = [entry['net'] for entry in merged_data.values()]
-            
-            data = {
-                'labels': labels,
-                'incomeData': income_values,
-                'expensesData': expense_values,
-                'netData': net_values,
-                'period': period,
-                'timeRange': time_range
-            }
-            
-            return Response(data)
-        
-        elif period == 'quarterly':
-            # Group by quarter
-            income_data = (
-                Income.objects.filter(date__gte=start_date, date__lte=today)
-                .annotate(quarter=TruncQuarter('date'))
-                .values('quarter')
-                .annotate(total=Sum('amount'))
-                .order_by('quarter')
-            )
-            
-            expense_data = (
-                Expense.objects.filter(date__gte=start_date, date__lte=today)
-                .annotate(quarter=TruncQuarter('date'))
-                .values('quarter')
-                .annotate(total=Sum('amount'))
-                .order_by('quarter')
-            )
-            
-            # Create a merged dataset
-            merged_data = {}
-            
-            # Process income data
-            for entry in income_data:
-                quarter_str = f"Q{(entry['quarter'].month-1)//3+1} {entry['quarter'].year}"
-                if quarter_str not in merged_data:
-                    merged_data[quarter_str] = {'income': 0, 'expenses': 0, 'net': 0}
-                merged_data[quarter_str]['income'] = float(entry['total'])
-            
-            # Process expense data
-            for entry in expense_data:
-                quarter_str = f"Q{(entry['quarter'].month-1)//3+1} {entry['quarter'].year}"
-                if quarter_str not in merged_data:
-                    merged_data[quarter_str] = {'income': 0, 'expenses': 0, 'net': 0}
-                merged_data[quarter_str]['expenses'] = float(entry['total'])
-            
-            # Calculate net for each quarter
-            for quarter in merged_data:
-                merged_data[quarter]['net'] = merged_data[quarter]['income'] - merged_data[quarter]['expenses']
-            
-            # Convert to lists for chart data
-            labels = list(merged_data.keys())
-            income_values = [entry['income'] for entry in merged_data.values()]
-            expense_values = [entry['expenses'] for entry in merged_data.values()]
-            net_values = [entry['net'] for entry in merged_data.values()]
-            
-            data = {
-                'labels': labels,
-                'incomeData': income_values,
-                'expensesData': expense_values,
-                'netData': net_values,
-                'period': period,
-                'timeRange': time_range
-            }
-            
-            return Response(data)
-            
-        elif period == 'yearly':
-            # Group by year
-            income_data = (
-                Income.objects.filter(date__gte=start_date, date__lte=today)
-                .annotate(year=TruncYear('date'))
-                .values('year')
-                .annotate(total=Sum('amount'))
-                .order_by('year')
-            )
-            
-            expense_data = (
-                Expense.objects.filter(date__gte=start_date, date__lte=today)
-                .annotate(year=TruncYear('date'))
-                .values('year')
-                .annotate(total=Sum('amount'))
-                .order_by('year')
-            )
-            
-            # Create a merged dataset
-            merged_data = {}
-            
-            # Process income data
-            for entry in income_data:
-                year_str = str(entry['year'].year)
-                if year_str not in merged_data:
-                    merged_data[year_str] = {'income': 0, 'expenses': 0, 'net': 0}
-                merged_data[year_str]['income'] = float(entry['total'])
-            
-            # Process expense data
-            for entry in expense_data:
-                year_str = str(entry['year'].year)
-                if year_str not in merged_data:
-                    merged_data[year_str] = {'income': 0, 'expenses': 0, 'net': 0}
-                merged_data[year_str]['expenses'] = float(entry['total'])
-            
-            # Calculate net for each year
-            for year in merged_data:
-                merged_data[year]['net'] = merged_data[year]['income'] - merged_data[year]['expenses']
-            
-            # Convert to lists for chart data
-            labels = list(merged_data.keys())
-            income_values = [entry['income'] for entry in merged_data.values()]
-            expense_values = [entry['expenses'] for entry in merged_data.values()]
-            net_values = [entry['net'] for entry in merged_data.values()]
-            
-            data = {
-                'labels': labels,
-                'incomeData': income_values,
-                'expensesData': expense_values,
-                'netData': net_values,
-                'period': period,
-                'timeRange': time_range
-            }
-            
-            return Response(data)
-            
-        else:
-            return Response({"error": "Invalid period parameter"}, status=status.HTTP_400_BAD_REQUEST)
-            
+        start_date, end_date = resolve_date_range(request.query_params)
+        data = build_cash_flow(period, start_date, end_date)
+        data['period'] = period
+        data['timeRange'] = time_range
+        return Response(data)
+    except InvalidQuery as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         print(f"Error in cash_flow: {str(e)}")
         traceback.print_exc()
-        return Response({
-            'labels': [],
-            'incomeData': [],
-            'expensesData': [],
-            'netData': [],
-            'period': period,
-            'timeRange': time_range
-        })
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+def _int_param(params, name, default):
+    value = params.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise InvalidQuery(f"{name} must be an integer")
 
 @api_view(['GET'])
+@cached_response('cash-flow-forecast')
+def cash_flow_forecast(request):
+    """
+    Project income, expenses and net for the next `horizon` months using
+    moving_average, linear or seasonal_naive over the monthly history.
+    """
+    try:
+        data = build_forecast(
+            method=request.query_params.get('method', 'linear'),
+            horizon=_int_param(request.query_params, 'horizon', DEFAULT_HORIZON),
+            history_months=_int_param(request.query_params, 'history', DEFAULT_HISTORY),
+            window=_int_param(request.query_params, 'window', DEFAULT_WINDOW)
+        )
+        return Response(data)
+    except InvalidQuery as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        print(f"Error in cash_flow_forecast: {str(e)}")
+        traceback.print_exc()
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@cached_response('balance-sheet')
 def balance_sheet(request):
     try:
         # Get the balance sheet as of a specific date
-        as_of_date_str = request.query_params.get('as_of_date')
-        
-        if as_of_date_str:
-            as_of_date = parse_date(as_of_date_str)
-        else:
-            as_of_date = date.today()
-        
-        # Assets (all income)
-        total_assets = Income.objects.filter(date__lte=as_of_date).aggregate(total=Sum('amount'))['total'] or 0
-        
-        # Liabilities (all expenses)
-        total_liabilities = Expense.objects.filter(date__lte=as_of_date).aggregate(total=Sum('amount'))['total'] or 0
-        
-        # Equity (assets - liabilities)
-        total_equity = total_assets - total_liabilities
-        
-        data = {
-            'assets': {
-                'total': total_assets,
-                'breakdown': [
-                    {'category': 'Cash & Equivalents', 'amount': total_assets}
-                ]
-            },
-            'liabilities': {
-                'total': total_liabilities,
-                'breakdown': [
-                    {'category': 'Accounts Payable', 'amount': total_liabilities}
-                ]
-            },
-            'equity': {
-                'total': total_equity,
-                'breakdown': [
-                    {'category': 'Retained Earnings', 'amount': total_equity}
-                ]
-            },
-            'asOfDate': as_of_date.isoformat()
-        }
-        
-        return Response(data)
+        as_of_date = parse_date_param(request.query_params, 'as_of_date') or date.today()
+        return Response(build_balance_sheet(as_of_date))
+    except InvalidQuery as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         print(f"Error in balance_sheet: {str(e)}")
         traceback.print_exc()
-        return Response({
-            'assets': {'total': 0, 'breakdown': []},
-            'liabilities': {'total': 0, 'breakdown': []},
-            'equity': {'total': 0, 'breakdown': []},
-            'asOfDate': date.today().isoformat()
-        })
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
+@cached_response('dashboard')
+def finance_dashboard(request):
+    """
+    summary, cash-flow and balance-sheet in one response, for the dashboard's
+    first load. Accepts the same timeRange (and period) parameters.
+    """
+    try:
+        return Response(build_dashboard(request.query_params))
+    except InvalidQuery as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        print(f"Error in finance_dashboard: {str(e)}")
+        traceback.print_exc()
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@cached_response('reports')
 def financial_reports(request):
     try:
         report_type = request.query_params.get('type', 'income_statement')
@@ -569,59 +428,17 @@ def financial_reports(request):
         else:
             end_date = today
         
-        if report_type == 'income_statement':
-            # Get revenue breakdown
-            revenues = Income.objects.filter(
-                date__gte=start_date, 
-                date__lte=end_date
-            ).values('category').annotate(
-                total=Sum('amount')
-            ).order_by('-total')
-            
-            revenue_list = []
-            for item in revenues:
-                revenue_list.append({
-                    'category': item['category'],
-                    'amount': item['total']
-                })
-            
-            # Get expense breakdown
-            expenses = Expense.objects.filter(
-                date__gte=start_date, 
-                date__lte=end_date
-            ).values('category').annotate(
-                total=Sum('amount')
-            ).order_by('-total')
-            
-            expense_list = []
-            for item in expenses:
-                expense_list.append({
-                    'category': item['category'],
-                    'amount': item['total']
-                })
-            
-            # Calculate totals
-            total_revenue = sum(item['amount'] for item in revenue_list)
-            total_expenses = sum(item['amount'] for item in expense_list)
-            net_income = total_revenue - total_expenses
-            
-            report_data = {
-                'reportType': 'Income Statement',
-                'startDate': start_date.isoformat(),
-                'endDate': end_date.isoformat(),
-                'revenues': revenue_list,
-                'expenses': expense_list,
-                'totalRevenue': total_revenue,
-                'totalExpenses': total_expenses,
-                'netIncome': net_income,
-                'generatedAt': datetime.now().isoformat()
-            }
-            
-            return Response(report_data)
-        
-        else:
+        builder = REPORT_BUILDERS.get(report_type)
+        if builder is None:
             return Response({"error": "Invalid report type"}, status=status.HTTP_400_BAD_REQUEST)
+
+        options = REPORT_OPTIONS.get(report_type)
+        if options is not None:
+            return Response(builder(start_date, end_date, **options(request.query_params)))
+        return Response(builder(start_date, end_date))
             
+    except InvalidQuery as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         print(f"Error in financial_reports: {str(e)}")
         traceback.print_exc()
@@ -633,13 +450,32 @@ def financial_reports(request):
 @api_view(['GET', 'POST'])
 def report_history(request):
     """
-    Get all report history or create a new report entry.
+    List report history or create a new report entry. Listings (paginated
+    with limit/cursor or not) carry names, dates and summaries only; the
+    payload is on the detail endpoint, or in the unpaginated list with
+    ?include=report_data.
     """
     if request.method == 'GET':
         try:
-            reports = ReportHistory.objects.all().order_by('-created_at')
-            serializer = ReportHistorySerializer(reports, many=True)
+            include = request.query_params.get('include')
+            if include not in (None, '', 'report_data'):
+                raise InvalidQuery("include must be report_data")
+            reports = ReportHistory.objects.only(*ReportHistorySummarySerializer.Meta.fields)
+            if wants_page(request.query_params):
+                rows, next_cursor, limit = paginate_keyset(reports, request.query_params, order_field='created_at')
+                return Response({
+                    'results': ReportHistorySummarySerializer(rows, many=True).data,
+                    'next_cursor': next_cursor,
+                    'limit': limit
+                })
+            if include == 'report_data':
+                reports = ReportHistory.objects.select_related('payload')
+                serializer = ReportHistorySerializer(reports.order_by('-created_at', '-id'), many=True)
+            else:
+                serializer = ReportHistorySummarySerializer(reports.order_by('-created_at', '-id'), many=True)
             return Response(serializer.data)
+        except InvalidQuery as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             print(f"Error retrieving report history: {str(e)}")
             traceback.print_exc()
@@ -647,7 +483,8 @@ def report_history(request):
     
     elif request.method == 'POST':
         try:
-            print(f"Received report history data: {request.data}")
+            # Payloads can be megabytes; log the name rather than the whole body
+            print(f"Received report history entry: {request.data.get('report_name')}")
             
             # Create a complete data object
             report_data = {
@@ -704,6 +541,379 @@ def report_history_detail(request, pk):
             print(f"Error deleting report: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+def report_jobs(request):
+    """
+    Queue a report for background generation. Poll report-jobs/<id>/ until
+    the status is completed, then fetch the result from report-history.
+    """
+    try:
+        report_type = request.data.get('report_type', 'income_statement')
+        if report_type not in REPORT_BUILDERS:
+            return Response({"error": "Invalid report type"}, status=status.HTTP_400_BAD_REQUEST)
+
+        start_date = parse_date(str(request.data.get('start_date', '')))
+        end_date = parse_date(str(request.data.get('end_date', '')))
+        if not start_date or not end_date:
+            return Response({"error": "start_date and end_date are required (YYYY-MM-DD)"}, status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date:
+            return Response({"error": "start_date must be on or before end_date"}, status=status.HTTP_400_BAD_REQUEST)
+
+        job = enqueue_report(report_type, start_date, end_date, request.data.get('report_name', ''))
+        return Response(ReportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    except ValueError:
+        return Response({"error": "start_date and end_date must be valid dates"}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        error_msg = f"Error queueing report: {str(e)}"
+        print(error_msg)
+        traceback.print_exc()
+        return Response({"error": error_msg}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+def report_job_detail(request, pk):
+    """
+    Status of a queued report job.
+    """
+    try:
+        job = ReportJob.objects.get(pk=pk)
+    except ReportJob.DoesNotExist:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+    return Response(ReportJobSerializer(job).data)
+
+@api_view(['GET', 'POST'])
+def budget_list_create(request):
+    """
+    List monthly budgets (optionally filtered by start_date, end_date and a
+    comma-separated category list) or create one.
+    """
+    if request.method == 'GET':
+        try:
+            budgets = Budget.objects.all()
+            start_date = parse_date_param(request.query_params, 'start_date')
+            end_date = parse_date_param(request.query_params, 'end_date')
+            if start_date:
+                budgets = budgets.filter(period__gte=start_date.replace(day=1))
+            if end_date:
+                budgets = budgets.filter(period__lte=end_date)
+            categories = [c for c in request.query_params.get('category', '').split(',') if c]
+            if categories:
+                budgets = budgets.filter(category__in=categories)
+            return Response(BudgetSerializer(budgets, many=True).data)
+        except InvalidQuery as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            print(f"Error fetching budgets: {str(e)}")
+            traceback.print_exc()
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    elif request.method == 'POST':
+        try:
+            serializer = BudgetSerializer(data=request.data)
+            if serializer.is_valid():
+                with transaction.atomic():
+                    serializer.save()
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            print(f"Error creating budget: {str(e)}")
+            traceback.print_exc()
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET', 'PUT', 'DELETE'])
+def budget_detail(request, pk):
+    try:
+        budget = Budget.objects.get(pk=pk)
+    except Budget.DoesNotExist:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == 'GET':
+        return Response(BudgetSerializer(budget).data)
+
+    elif request.method == 'PUT':
+        try:
+            serializer = BudgetSerializer(budget, data=request.data, partial=True)
+            if serializer.is_valid():
+                with transaction.atomic():
+                    serializer.save()
+                return Response(serializer.data)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            print(f"Error updating budget: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    elif request.method == 'DELETE':
+        try:
+            with transaction.atomic():
+                budget.delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        except Exception as e:
+            print(f"Error deleting budget: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@cached_response('budget-vs-actual')
+def budget_vs_actual_report(request):
+    """
+    Budget against actual expenses per category and month. Defaults to the
+    last 12 months; accepts start_date, end_date and category.
+    """
+    try:
+        today = date.today()
+        start_date = parse_date_param(request.query_params, 'start_date') or (today.replace(day=1) - relativedelta(months=11))
+        end_date = parse_date_param(request.query_params, 'end_date') or today
+        if start_date > end_date:
+            raise InvalidQuery("start_date must be on or before end_date")
+        categories = [c for c in request.query_params.get('category', '').split(',') if c]
+        return Response(budget_vs_actual(start_date, end_date, categories))
+    except InvalidQuery as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        print(f"Error in budget_vs_actual: {str(e)}")
+        traceback.print_exc()
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET', 'POST'])
+def recurring_expense_list_create(request):
+    """
+    List or create recurring expense templates (rent, payroll, subscriptions).
+    """
+    if request.method == 'GET':
+        templates = RecurringExpense.objects.all()
+        return Response(RecurringExpenseSerializer(templates, many=True).data)
+
+    elif request.method == 'POST':
+        try:
+            serializer = RecurringExpenseSerializer(data=request.data)
+            if serializer.is_valid():
+                with transaction.atomic():
+                    serializer.save()
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            print(f"Error creating recurring expense: {str(e)}")
+            traceback.print_exc()
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET', 'PUT', 'DELETE'])
+def recurring_expense_detail(request, pk):
+    try:
+        template = RecurringExpense.objects.get(pk=pk)
+    except RecurringExpense.DoesNotExist:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == 'GET':
+        return Response(RecurringExpenseSerializer(template).data)
+
+    elif request.method == 'PUT':
+        try:
+            serializer = RecurringExpenseSerializer(template, data=request.data, partial=True)
+            if serializer.is_valid():
+                with transaction.atomic():
+                    serializer.save()
+                return Response(serializer.data)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            print(f"Error updating recurring expense: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    elif request.method == 'DELETE':
+        try:
+            # Expenses already created from the template are kept
+            with transaction.atomic():
+                template.delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        except Exception as e:
+            print(f"Error deleting recurring expense: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['POST'])
+def recurring_expense_materialize(request):
+    """
+    Create all due occurrences up to as_of (default today). Safe to repeat.
+    """
+    try:
+        as_of = parse_date_param(request.data, 'as_of')
+        return Response(materialize_recurring_expenses(as_of))
+    except InvalidQuery as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        print(f"Error materializing recurring expenses: {str(e)}")
+        traceback.print_exc()
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+RECONCILIATION_SERIALIZERS = {
+    'income': IncomeSerializer,
+    'expense': ExpenseSerializer,
+}
+
+@api_view(['GET'])
+def reconciliation_matches(request):
+    """
+    Likely duplicate pairs for review, e.g. bank-imported lines that were
+    already keyed in by hand. Params: kind (income|expense), start_date,
+    end_date (default last 90 days), window_days, created_since (ISO
+    datetime, to check only a recent import) and limit.
+    """
+    try:
+        kind = request.query_params.get('kind', 'expense')
+        if kind not in RECONCILIATION_SERIALIZERS:
+            raise InvalidQuery("kind must be income or expense")
+        start_date, end_date = resolve_date_range(request.query_params)
+        window_days = _int_param(request.query_params, 'window_days', DEFAULT_WINDOW_DAYS)
+        if not 0 <= window_days <= MAX_WINDOW_DAYS:
+            raise InvalidQuery(f"window_days must be between 0 and {MAX_WINDOW_DAYS}")
+        limit = min(max(_int_param(request.query_params, 'limit', 100), 1), 1000)
+        created_since = None
+        if request.query_params.get('created_since'):
+            try:
+                created_since = parse_datetime(request.query_params['created_since'])
+            except ValueError:
+                created_since = None
+            if created_since is None:
+                raise InvalidQuery("created_since must be an ISO 8601 datetime")
+            if timezone.is_naive(created_since):
+                created_since = timezone.make_aware(created_since)
+
+        pairs, candidates = find_duplicate_pairs(kind, start_date, end_date, window_days, created_since)
+        shown = pairs[:limit]
+        model = LEDGER_MODELS[kind]
+        serializer_class = RECONCILIATION_SERIALIZERS[kind]
+        records = model.objects.in_bulk({pk for first, second, _, _ in shown for pk in (first, second)})
+        return Response({
+            'kind': kind,
+            'startDate': start_date.isoformat(),
+            'endDate': end_date.isoformat(),
+            'windowDays': window_days,
+            'candidates': candidates,
+            'totalPairs': len(pairs),
+            'truncated': len(pairs) > len(shown),
+            'pairs': [
+                {
+                    'match': match,
+                    'dayDifference': days,
+                    'first': serializer_class(records[first]).data,
+                    'second': serializer_class(records[second]).data,
+                }
+                for first, second, match, days in shown
+            ]
+        })
+    except InvalidQuery as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        print(f"Error in reconciliation_matches: {str(e)}")
+        traceback.print_exc()
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET', 'POST'])
+def category_list_create(request):
+    """
+    List finance categories (optionally ?kind=income|expense) or create one,
+    optionally under a parent category.
+    """
+    if request.method == 'GET':
+        # The uncategorized bucket rollups use is not a category to pick
+        categories = FinanceCategory.objects.exclude(slug=UNCATEGORIZED_SLUG)
+        if request.query_params.get('kind'):
+            categories = categories.filter(kind=request.query_params['kind'])
+        return Response(FinanceCategorySerializer(categories, many=True).data)
+
+    elif request.method == 'POST':
+        try:
+            serializer = FinanceCategorySerializer(data=request.data)
+            if serializer.is_valid():
+                serializer.save()
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            print(f"Error creating category: {str(e)}")
+            traceback.print_exc()
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET', 'PUT', 'DELETE'])
+def category_detail(request, pk):
+    try:
+        category = FinanceCategory.objects.get(pk=pk)
+    except FinanceCategory.DoesNotExist:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == 'GET':
+        return Response(FinanceCategorySerializer(category).data)
+
+    elif request.method == 'PUT':
+        try:
+            serializer = FinanceCategorySerializer(category, data=request.data, partial=True)
+            if serializer.is_valid():
+                serializer.save()
+                return Response(serializer.data)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            # Moving a category under one of its own subcategories
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            print(f"Error updating category: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    elif request.method == 'DELETE':
+        try:
+            category.delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        except ProtectedError:
+            return Response(
+                {"error": "Category is still used by transactions or has subcategories"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            print(f"Error deleting category: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@cached_response('category-rollup')
+def category_rollup(request):
+    """
+    Income or expense totals per category with subcategories rolled up into
+    their parents. Accepts kind, timeRange or start_date/end_date.
+    """
+    try:
+        kind = request.query_params.get('kind', 'expense')
+        if kind not in LEDGER_MODELS:
+            raise InvalidQuery("kind must be income or expense")
+        start_date, end_date = resolve_date_range(request.query_params)
+        return Response(category_tree_totals(kind, start_date, end_date))
+    except InvalidQuery as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        print(f"Error in category_rollup: {str(e)}")
+        traceback.print_exc()
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+def audit_history(request, entity, pk):
+    """
+    Change history of one finance record, newest first, including after it
+    was deleted. Keyset-paginated with limit and cursor.
+    """
+    try:
+        entries = FinanceAuditLog.objects.filter(entity=entity, entity_id=pk)
+        rows, next_cursor, limit = paginate_keyset(entries, request.query_params, order_field='timestamp')
+        return Response({
+            'results': FinanceAuditLogSerializer(rows, many=True).data,
+            'next_cursor': next_cursor,
+            'limit': limit
+        })
+    except InvalidQuery as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        print(f"Error retrieving audit history: {str(e)}")
+        traceback.print_exc()
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+def finance_cache_stats(request):
+    """Hit/miss counters for the analytics response cache"""
+    return Response(cache_stats())
+
 @api_view(['GET'])
 def test_api(request):
     """Simple endpoint to test API connectivity"""
@@ -0,0 +1,80 @@
+from django.db import connection, transaction
+
+from . import summaries
+from .models import Attendance, Employee
+from .serializers import AttendanceBulkRowSerializer
+
+MAX_BULK_ROWS = 5000
+BATCH_SIZE = 1000
+
+OUTCOME_CREATED = 'created'
+OUTCOME_UPDATED = 'updated'
+OUTCOME_SKIPPED = 'skipped'
+OUTCOME_ERROR = 'error'
+
+
+def upsert_attendance(rows):
+    """
+    Create or update one attendance record per (employee, date) for a batch
+    of clock-ins. Employees are resolved with one in_bulk query and the
+    writes are a single bulk upsert, so the query count doesn't grow with
+    the batch. Returns one outcome dict per input row, in order: created,
+    updated, skipped (a later row has the same employee and date) or error.
+    """
+    outcomes = []
+    valid = {}
+    for index, row in enumerate(rows):
+        serializer = AttendanceBulkRowSerializer(data=row)
+        if not serializer.is_valid():
+            outcomes.append({'index': index, 'outcome': OUTCOME_ERROR, 'errors': serializer.errors})
+            continue
+        data = serializer.validated_data
+        outcomes.append({'index': index, 'employee': data['employee'], 'date': data['date']})
+        valid[index] = data
+
+    employees = Employee.objects.in_bulk({data['employee'] for data in valid.values()})
+    latest = {}
+    for index, data in valid.items():
+        if data['employee'] not in employees:
+            outcomes[index].update(outcome=OUTCOME_ERROR, errors={'employee': ["Employee not found"]})
+            continue
+        key = (data['employee'], data['date'])
+        if key in latest:
+            outcomes[latest[key]].update(outcome=OUTCOME_SKIPPED, errors={'non_field_errors': [f"Superseded by row {index}"]})
+        latest[key] = index
+
+    if not latest:
+        return outcomes
+
+    employee_ids = {employee_id for employee_id, _ in latest}
+    dates = {day for _, day in latest}
+    records = [
+        Attendance(employee_id=valid[index]['employee'], date=valid[index]['date'],
+                   status=valid[index]['status'], time=valid[index]['time'])
+        for index in latest.values()
+    ]
+    # MySQL upserts on any unique key and rejects an explicit conflict target
+    unique_fields = ['employee', 'date'] if connection.features.supports_update_conflicts_with_target else None
+    with transaction.atomic():
+        existing = {
+            (employee_id, day): status
+            for employee_id, day, status in Attendance.objects.select_for_update()
+            .filter(employee_id__in=employee_ids, date__in=dates)
+            .values_list('employee_id', 'date', 'status')
+        }
+        Attendance.objects.bulk_create(
+            records, batch_size=BATCH_SIZE, update_conflicts=True,
+            unique_fields=unique_fields, update_fields=['status', 'time']
+        )
+        # bulk_create sends no signals, so the monthly summaries are updated here
+        deltas = summaries.collect_deltas(
+            (record.employee_id, record.date, record.status) for record in records
+        )
+        summaries.collect_deltas(
+            ((employee_id, day, status) for (employee_id, day), status in existing.items()), sign=-1, deltas=deltas
+        )
+        summaries.apply_deltas(deltas)
+
+    for key, index in latest.items():
+        outcomes[index]['outcome'] = OUTCOME_UPDATED if key in existing else OUTCOME_CREATED
+    return outcomes
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from hr_app.summaries import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly attendance summary table from the raw attendance records"
+
+    def handle(self, *args, **options):
+        created = rebuild_summaries()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} monthly attendance summaries"))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from hr_app.models import PayrollRun
+from hr_app.payroll import BATCH_SIZE, run_payroll, unfinished_runs
+
+
+class Command(BaseCommand):
+    help = "Generate payslips for a pay period, or finish every pending, failed or stale running payroll run"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period-start', help="First day of the pay period (YYYY-MM-DD)")
+        parser.add_argument('--period-end', help="Last day of the pay period (YYYY-MM-DD)")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['period_start'] or options['period_end']:
+            period_start = parse_date(options['period_start'] or '')
+            period_end = parse_date(options['period_end'] or '')
+            if period_start is None or period_end is None:
+                raise CommandError("--period-start and --period-end must both be dates in YYYY-MM-DD format")
+            run, _ = PayrollRun.objects.get_or_create(period_start=period_start, period_end=period_end)
+            runs = [run]
+        else:
+            runs = list(unfinished_runs())
+
+        def progress(processed, total):
+            self.stdout.write(f"  {processed}/{total} payslips")
+
+        for run in runs:
+            self.stdout.write(f"Running payroll {run.period_start} to {run.period_end}")
+            run = run_payroll(run.pk, max(1, options['batch_size']), progress)
+            if run.status == PayrollRun.STATUS_FAILED:
+                raise CommandError(f"Payroll run {run.pk} failed: {run.error}")
+            self.stdout.write(self.style.SUCCESS(
+                f"Payroll run {run.pk} {run.status}: {run.processed_employees} payslips, net {run.total_net}"
+            ))
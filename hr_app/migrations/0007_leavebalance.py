@@ -0,0 +1,46 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_leave_balances(apps, schema_editor):
+    Leave = apps.get_model('hr_app', 'Leave')
+    LeaveBalance = apps.get_model('hr_app', 'LeaveBalance')
+    counts = (
+        Leave.objects.values('employee_id', 'date__year', 'leave_type')
+        .annotate(used=Count('id'))
+        .order_by()
+    )
+    LeaveBalance.objects.bulk_create(
+        [
+            LeaveBalance(employee_id=row['employee_id'], year=row['date__year'], leave_type=row['leave_type'], used=row['used'])
+            for row in counts
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr_app', '0006_candidate_employee_evaluated_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('leave_type', models.CharField(choices=[('Sick', 'Sick Leave'), ('Vacation', 'Vacation Leave'), ('Emergency', 'Emergency Leave')], max_length=20)),
+                ('used', models.PositiveIntegerField(default=0)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_balances', to='hr_app.employee')),
+            ],
+            options={
+                'unique_together': {('employee', 'year', 'leave_type')},
+            },
+        ),
+        migrations.RunPython(populate_leave_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:17
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count
+
+# Conflicts listed in the error before it is cut short
+MAX_LISTED = 50
+
+
+def check_duplicate_attendance(apps, schema_editor):
+    # Which of a day's entries is right is a decision for HR, not the migration
+    Attendance = apps.get_model('hr_app', 'Attendance')
+    duplicates = list(
+        Attendance.objects.values('employee_id', 'date')
+        .annotate(entries=Count('id'))
+        .filter(entries__gt=1)
+        .order_by('employee_id', 'date')
+    )
+    if not duplicates:
+        return
+    lines = []
+    for row in duplicates[:MAX_LISTED]:
+        entries = Attendance.objects.filter(employee_id=row['employee_id'], date=row['date']).order_by('id')
+        lines.append(f"  employee {row['employee_id']} on {row['date']}: " + ', '.join(
+            f"id {entry.id} ({entry.status} at {entry.time})" for entry in entries
+        ))
+    if len(duplicates) > MAX_LISTED:
+        lines.append(f"  ... and {len(duplicates) - MAX_LISTED} more")
+    raise RuntimeError(
+        f"{len(duplicates)} employee/day pairs have more than one attendance record. Delete the extra "
+        "records, then run the migration again:\n" + '\n'.join(lines)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr_app', '0008_payrollrun'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendance',
+            name='date',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.RunPython(check_duplicate_attendance, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('employee', 'date'), name='hr_attendance_employee_date_uniq'),
+        ),
+    ]
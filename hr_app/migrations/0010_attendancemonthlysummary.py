@@ -0,0 +1,51 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+
+
+def populate_attendance_summaries(apps, schema_editor):
+    Attendance = apps.get_model('hr_app', 'Attendance')
+    AttendanceMonthlySummary = apps.get_model('hr_app', 'AttendanceMonthlySummary')
+    rows = (
+        Attendance.objects.annotate(month=TruncMonth('date'))
+        .values('employee_id', 'month')
+        .annotate(
+            present=Count('id', filter=Q(status='Present')),
+            late=Count('id', filter=Q(status='Late')),
+            absent=Count('id', filter=Q(status='Absent')),
+        )
+        .order_by()
+    )
+    AttendanceMonthlySummary.objects.bulk_create(
+        [AttendanceMonthlySummary(**row) for row in rows.iterator()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr_app', '0009_attendance_unique_day'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='hr_app.employee')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month', 'employee'], name='hr_att_summary_month_idx')],
+                'unique_together': {('employee', 'month')},
+            },
+        ),
+        migrations.RunPython(populate_attendance_summaries, migrations.RunPython.noop),
+    ]
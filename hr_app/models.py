@@ -1,7 +1,13 @@
 from django.utils import timezone
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from datetime import time
 
+# Leaves per employee per calendar year; types without an entry are unlimited
+LEAVE_ALLOWANCES = {
+    'Sick': 20,
+}
+
 class Employee(models.Model):
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
@@ -34,6 +40,60 @@ class Payroll(models.Model):  # ✅ Keeping payroll unchanged
     def __str__(self):
         return f"Payroll for {self.employee.first_name} {self.employee.last_name}"
     
+class PayrollRun(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    period_start = models.DateField()
+    period_end = models.DateField()
+    pay_date = models.DateField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    total_employees = models.PositiveIntegerField(default=0)
+    processed_employees = models.PositiveIntegerField(default=0)
+    total_gross = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    total_net = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-period_start']
+        # One run per pay period; retrying a period resumes the same run
+        unique_together = ('period_start', 'period_end')
+
+    @property
+    def progress(self):
+        if not self.total_employees:
+            return 100 if self.status == self.STATUS_COMPLETED else 0
+        return round(self.processed_employees * 100 / self.total_employees)
+
+    def __str__(self):
+        return f"Payroll run {self.period_start} to {self.period_end} ({self.status})"
+
+class Payslip(models.Model):
+    run = models.ForeignKey(PayrollRun, on_delete=models.CASCADE, related_name='payslips')
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='payslips')
+    basic_salary = models.DecimalField(max_digits=10, decimal_places=2)
+    bonuses = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    deductions = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    net_salary = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('run', 'employee')
+
+    def __str__(self):
+        return f"Payslip for employee {self.employee_id} ({self.run_id})"
+    
 class Attendance(models.Model):
     STATUS_CHOICES = [
         ('Present', 'Present'),
@@ -46,7 +106,7 @@ class Attendance(models.Model):
         on_delete=models.CASCADE, 
         related_name='attendance_records'
     )
-    date = models.DateField(auto_now_add=True)
+    date = models.DateField(default=timezone.localdate)
     status = models.CharField(
         max_length=10, 
         choices=STATUS_CHOICES, 
@@ -54,9 +114,32 @@ class Attendance(models.Model):
     )
     time = models.TimeField(default=time(9, 0))  # Default to 09:00 AM
 
+    class Meta:
+        constraints = [
+            # One record per employee per day; clock-ins for the same day update it
+            models.UniqueConstraint(fields=['employee', 'date'], name='hr_attendance_employee_date_uniq'),
+        ]
+
     def __str__(self):
         return f"{self.employee.first_name} {self.employee.last_name} - {self.date} - {self.status} - {self.time}"
     
+class AttendanceMonthlySummary(models.Model):
+    """Present/Late/Absent counts per employee and month, kept in step with Attendance."""
+    employee = models.ForeignKey('Employee', on_delete=models.CASCADE, related_name='attendance_summaries')
+    month = models.DateField()  # First day of the month
+    present = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('employee', 'month')
+        indexes = [
+            models.Index(fields=['month', 'employee'], name='hr_att_summary_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.month:%Y-%m}: {self.present} present, {self.late} late, {self.absent} absent"
+    
 class Leave(models.Model):
     LEAVE_TYPES = [
         ('Sick', 'Sick Leave'),
@@ -70,18 +153,72 @@ class Leave(models.Model):
     leave_type = models.CharField(max_length=20, choices=LEAVE_TYPES, default='Sick')
     remaining_leaves = models.IntegerField(default=20)  # Stores remaining sick leaves
 
+    def _balance_key(self):
+        return (self.employee_id, self.date.year, self.leave_type)
+
     def save(self, *args, **kwargs):
-        if self.leave_type == 'Sick':
-            used_leaves = Leave.objects.filter(employee=self.employee, leave_type='Sick').count()
-            self.remaining_leaves = max(20 - used_leaves, 0)  # Store remaining leaves
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = Leave.objects.filter(pk=self.pk).values_list('employee_id', 'date__year', 'leave_type').first()
+            key = self._balance_key()
+            if previous != key:
+                used = LeaveBalance.objects.consume(*key)
+                if previous:
+                    LeaveBalance.objects.release(*previous)
+            else:
+                used = LeaveBalance.objects.used(*key)
 
-            if used_leaves >= 20:
-                raise ValueError("Cannot take more than 20 sick leaves.")
+            if self.leave_type in LEAVE_ALLOWANCES:
+                self.remaining_leaves = max(LEAVE_ALLOWANCES[self.leave_type] - used, 0)  # Store remaining leaves
 
-        super().save(*args, **kwargs)
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.employee.first_name} {self.employee.last_name} - {self.date} - {self.leave_type} (Remaining: {self.remaining_leaves})"
+
+
+class LeaveBalanceManager(models.Manager):
+    def used(self, employee_id, year, leave_type):
+        return self.filter(employee_id=employee_id, year=year, leave_type=leave_type).values_list('used', flat=True).first() or 0
+
+    def consume(self, employee_id, year, leave_type):
+        """
+        Count one more leave against the balance, refusing it once the yearly
+        allowance is used up. The balance row is locked for the check, so two
+        concurrent requests can't both take the last day. Returns the new
+        used count.
+        """
+        balance, _ = self.select_for_update().get_or_create(employee_id=employee_id, year=year, leave_type=leave_type)
+        allowance = LEAVE_ALLOWANCES.get(leave_type)
+        if allowance is not None and balance.used >= allowance:
+            raise ValueError(f"Cannot take more than {allowance} {leave_type.lower()} leaves.")
+        self.filter(pk=balance.pk).update(used=F('used') + 1)
+        return balance.used + 1
+
+    def release(self, employee_id, year, leave_type):
+        self.filter(employee_id=employee_id, year=year, leave_type=leave_type, used__gt=0).update(used=F('used') - 1)
+
+
+class LeaveBalance(models.Model):
+    """Leaves taken per employee, year and type, kept in step by Leave.save() and signals.leave_deleted."""
+    employee = models.ForeignKey('Employee', on_delete=models.CASCADE, related_name='leave_balances')
+    year = models.PositiveSmallIntegerField()
+    leave_type = models.CharField(max_length=20, choices=Leave.LEAVE_TYPES)
+    used = models.PositiveIntegerField(default=0)
+
+    objects = LeaveBalanceManager()
+
+    class Meta:
+        unique_together = ('employee', 'year', 'leave_type')
+
+    @property
+    def remaining(self):
+        allowance = LEAVE_ALLOWANCES.get(self.leave_type)
+        return None if allowance is None else max(allowance - self.used, 0)
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.year} - {self.leave_type}: {self.used} used"
     
 class Candidate(models.Model):
     STATUS_CHOICES = [
@@ -0,0 +1,148 @@
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.utils import timezone
+
+from .models import Employee, PayrollRun, Payslip
+
+BATCH_SIZE = 2000
+ZERO = Decimal('0.00')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='hr-payroll')
+        return _executor
+
+
+def claimable_runs():
+    """
+    Pending and failed runs, plus running ones started longer than
+    HR_PAYROLL_RUN_TIMEOUT seconds ago, whose process died mid-run.
+    """
+    stale_before = timezone.now() - timedelta(seconds=getattr(settings, 'HR_PAYROLL_RUN_TIMEOUT', 3600))
+    return PayrollRun.objects.filter(
+        Q(status__in=[PayrollRun.STATUS_PENDING, PayrollRun.STATUS_FAILED]) |
+        Q(status=PayrollRun.STATUS_RUNNING, started_at__lt=stale_before)
+    )
+
+
+def claim_run(run_id):
+    """Move a claimable run to running; only one caller wins."""
+    return claimable_runs().filter(pk=run_id).update(
+        status=PayrollRun.STATUS_RUNNING, started_at=timezone.now(), error=None
+    ) == 1
+
+
+def _payslip(run, row):
+    employee_id, salary, basic_salary, bonuses, deductions = row
+    # Employees without a Payroll record are paid their salary as is
+    basic_salary = salary if basic_salary is None else basic_salary
+    bonuses = bonuses or ZERO
+    deductions = deductions or ZERO
+    return Payslip(
+        run=run,
+        employee_id=employee_id,
+        basic_salary=basic_salary,
+        bonuses=bonuses,
+        deductions=deductions,
+        net_salary=basic_salary + bonuses - deductions
+    )
+
+
+def execute_run(run_id, batch_size=BATCH_SIZE, progress=None):
+    """
+    Generate the payslips of a claimed run: every employee hired by the end
+    of the period who has no payslip in it yet, a batch of ids at a time
+    with one bulk_create per batch. Progress is saved after each batch and
+    passed to progress(processed, total). Payslips are unique per run and
+    employee, so re-running a failed run only fills in what is missing.
+    """
+    run = PayrollRun.objects.get(pk=run_id)
+    try:
+        eligible = Employee.objects.filter(date_hired__lte=run.period_end)
+        total = eligible.count()
+        processed = Payslip.objects.filter(run=run).count()
+        PayrollRun.objects.filter(pk=run.pk).update(total_employees=total, processed_employees=processed)
+
+        rows = (
+            eligible.exclude(payslips__run=run)
+            .order_by('id')
+            .values_list('id', 'salary', 'payroll__basic_salary', 'payroll__bonuses', 'payroll__deductions')
+        )
+        last_id = 0
+        while True:
+            batch = list(rows.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            with transaction.atomic():
+                Payslip.objects.bulk_create([_payslip(run, row) for row in batch], ignore_conflicts=True)
+                PayrollRun.objects.filter(pk=run.pk).update(processed_employees=F('processed_employees') + len(batch))
+            processed += len(batch)
+            if progress:
+                progress(processed, total)
+
+        totals = Payslip.objects.filter(run=run).aggregate(
+            count=Count('id'),
+            gross=Sum(F('basic_salary') + F('bonuses'), output_field=DecimalField(max_digits=15, decimal_places=2)),
+            net=Sum('net_salary')
+        )
+        PayrollRun.objects.filter(pk=run.pk).update(
+            status=PayrollRun.STATUS_COMPLETED,
+            processed_employees=totals['count'],
+            total_gross=totals['gross'] or ZERO,
+            total_net=totals['net'] or ZERO,
+            finished_at=timezone.now()
+        )
+    except Exception as e:
+        traceback.print_exc()
+        PayrollRun.objects.filter(pk=run.pk).update(
+            status=PayrollRun.STATUS_FAILED, error=str(e), finished_at=timezone.now()
+        )
+    return PayrollRun.objects.get(pk=run.pk)
+
+
+def run_payroll(run_id, batch_size=BATCH_SIZE, progress=None):
+    if claim_run(run_id):
+        return execute_run(run_id, batch_size, progress)
+    return PayrollRun.objects.get(pk=run_id)
+
+
+def _run_in_worker(run_id):
+    close_old_connections()
+    try:
+        run_payroll(run_id)
+    finally:
+        close_old_connections()
+
+
+def start_payroll_run(period_start, period_end, pay_date=None):
+    """
+    The run for a pay period, created on first request. Pending, failed or
+    stale running runs are handed to a background thread once the row is
+    committed; a
+    completed run is returned unchanged, so posting the same period twice
+    never pays anyone twice.
+    """
+    run, _ = PayrollRun.objects.get_or_create(
+        period_start=period_start, period_end=period_end, defaults={'pay_date': pay_date}
+    )
+    if getattr(settings, 'HR_PAYROLL_RUNS_IN_PROCESS', True) and claimable_runs().filter(pk=run.pk).exists():
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_worker, run.pk))
+    return run
+
+
+def unfinished_runs():
+    return claimable_runs().order_by('period_start')
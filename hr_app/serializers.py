@@ -1,5 +1,10 @@
+from datetime import time
+
+from django.db.models import IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, ExtractYear
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Candidate, Employee, Leave, Payroll  # ✅ Fixed import
+from .models import LEAVE_ALLOWANCES, Candidate, Employee, Leave, LeaveBalance, Payroll, PayrollRun, Payslip  # ✅ Fixed import
 from rest_framework import serializers
 from .models import Attendance
 
@@ -15,6 +20,34 @@ class PayrollSerializer(serializers.ModelSerializer):
         model = Payroll
         fields = "__all__"
 
+class PayrollRunSerializer(serializers.ModelSerializer):
+    progress = serializers.ReadOnlyField()
+
+    class Meta:
+        model = PayrollRun
+        fields = [
+            'id', 'period_start', 'period_end', 'pay_date', 'status', 'total_employees', 'processed_employees',
+            'progress', 'total_gross', 'total_net', 'error', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = [
+            'status', 'total_employees', 'processed_employees', 'total_gross', 'total_net', 'error',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        # Posting an existing period returns that run instead of failing
+        validators = []
+
+    def validate(self, data):
+        if data['period_start'] > data['period_end']:
+            raise serializers.ValidationError("period_start must be on or before period_end")
+        return data
+
+class PayslipSerializer(serializers.ModelSerializer):
+    employee_name = serializers.ReadOnlyField(source="employee.__str__")
+
+    class Meta:
+        model = Payslip
+        fields = ['id', 'run', 'employee', 'employee_name', 'basic_salary', 'bonuses', 'deductions', 'net_salary']
+
 class AttendanceSerializer(serializers.ModelSerializer):
     employee_name = serializers.CharField(source='employee.first_name', read_only=True)
 
@@ -22,6 +55,32 @@ class AttendanceSerializer(serializers.ModelSerializer):
         model = Attendance
         fields = ['id', 'employee', 'employee_name', 'date', 'status', 'time']
 
+class AttendanceBulkRowSerializer(serializers.Serializer):
+    employee = serializers.IntegerField()
+    date = serializers.DateField(default=timezone.localdate)
+    status = serializers.ChoiceField(choices=Attendance.STATUS_CHOICES, default='Present')
+    time = serializers.TimeField(default=time(9, 0))
+
+def with_employee_name(queryset):
+    """
+    Join the employee in the same query, loading only the name columns the
+    employee_name fields read, so listing N rows doesn't cost N extra queries.
+    """
+    fields = [field.name for field in queryset.model._meta.concrete_fields]
+    return queryset.select_related('employee').only(*fields, 'employee__first_name', 'employee__last_name')
+
+def with_sick_leaves_used(queryset):
+    """
+    Annotate each leave with the sick leaves its employee has used that year,
+    read from LeaveBalance in the same query as the page.
+    """
+    used = LeaveBalance.objects.filter(
+        employee=OuterRef('employee'), year=ExtractYear(OuterRef('date')), leave_type='Sick'
+    ).values('used')[:1]
+    return queryset.annotate(
+        sick_leaves_used=Coalesce(Subquery(used, output_field=IntegerField()), Value(0))
+    )
+
 class LeaveSerializer(serializers.ModelSerializer):
     employee_name = serializers.SerializerMethodField()
     remaining_leaves = serializers.SerializerMethodField()
@@ -34,8 +93,10 @@ class LeaveSerializer(serializers.ModelSerializer):
         return f"{obj.employee.first_name} {obj.employee.last_name}"
 
     def get_remaining_leaves(self, obj):
-        used_leaves = Leave.objects.filter(employee=obj.employee, leave_type='Sick').count()
-        return max(20 - used_leaves, 0)
+        used_leaves = getattr(obj, 'sick_leaves_used', None)
+        if used_leaves is None:
+            used_leaves = LeaveBalance.objects.used(obj.employee_id, obj.date.year, 'Sick')
+        return max(LEAVE_ALLOWANCES['Sick'] - used_leaves, 0)
 
 class CandidateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import summaries
+from .models import Attendance, Leave, LeaveBalance
+
+
+@receiver(pre_save, sender=Attendance)
+def remember_stored_attendance(sender, instance, **kwargs):
+    instance._stored_attendance = (
+        Attendance.objects.filter(pk=instance.pk).values_list('employee_id', 'date', 'status').first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Attendance)
+def attendance_saved(sender, instance, **kwargs):
+    day = sender._meta.get_field('date').to_python(instance.date)
+    deltas = summaries.collect_deltas([(instance.employee_id, day, instance.status)])
+    previous = getattr(instance, '_stored_attendance', None)
+    if previous:
+        summaries.collect_deltas([previous], sign=-1, deltas=deltas)
+    summaries.apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Attendance)
+def attendance_deleted(sender, instance, **kwargs):
+    summaries.apply_deltas(summaries.collect_deltas([(instance.employee_id, instance.date, instance.status)], sign=-1))
+
+
+# A receiver rather than Leave.delete(), so queryset, admin bulk and
+# Employee cascade deletes release the day too
+@receiver(post_delete, sender=Leave)
+def leave_deleted(sender, instance, **kwargs):
+    LeaveBalance.objects.release(*instance._balance_key())
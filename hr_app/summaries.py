@@ -0,0 +1,162 @@
+from collections import defaultdict
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import Attendance, AttendanceMonthlySummary
+
+# Attendance.status -> AttendanceMonthlySummary count column
+STATUS_FIELDS = {
+    'Present': 'present',
+    'Late': 'late',
+    'Absent': 'absent',
+}
+COUNT_FIELDS = list(STATUS_FIELDS.values())
+
+# Above this many (employee, month) keys a write is applied set-based
+BULK_DELTA_THRESHOLD = 20
+
+GROUP_BY_FIELDS = {
+    'department': 'employee__department',
+    'employee': 'employee',
+}
+MAX_MONTHS = 120
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def collect_deltas(entries, sign=1, deltas=None):
+    """Fold (employee_id, date, status) entries into {(employee_id, month): {field: count}}."""
+    if deltas is None:
+        deltas = defaultdict(lambda: dict.fromkeys(COUNT_FIELDS, 0))
+    for employee_id, day, status in entries:
+        field = STATUS_FIELDS.get(status)
+        if field:
+            deltas[(employee_id, month_start(day))][field] += sign
+    return deltas
+
+
+def _apply_delta(employee_id, month, counts):
+    lookup = {'employee_id': employee_id, 'month': month}
+    changes = {field: F(field) + count for field, count in counts.items() if count}
+    if AttendanceMonthlySummary.objects.filter(**lookup).update(**changes):
+        return
+    if any(count < 0 for count in counts.values()):
+        # The summary row is already gone (e.g. the employee is being deleted)
+        return
+    try:
+        with transaction.atomic():
+            AttendanceMonthlySummary.objects.create(**lookup, **counts)
+    except IntegrityError:
+        # Another writer created the row first
+        AttendanceMonthlySummary.objects.filter(**lookup).update(**changes)
+
+
+def _apply_deltas_in_bulk(deltas):
+    employee_ids = {employee_id for employee_id, _ in deltas}
+    months = {month for _, month in deltas}
+    existing = {
+        (row.employee_id, row.month): row
+        for row in AttendanceMonthlySummary.objects.select_for_update().filter(
+            employee_id__in=employee_ids, month__in=months
+        )
+    }
+    rows = []
+    for (employee_id, month), counts in deltas.items():
+        row = existing.get((employee_id, month)) or AttendanceMonthlySummary(employee_id=employee_id, month=month)
+        for field, count in counts.items():
+            setattr(row, field, max(getattr(row, field) + count, 0))
+        rows.append(row)
+    # MySQL upserts on any unique key and rejects an explicit conflict target
+    unique_fields = ['employee', 'month'] if connection.features.supports_update_conflicts_with_target else None
+    AttendanceMonthlySummary.objects.bulk_create(
+        rows, batch_size=500, update_conflicts=True, unique_fields=unique_fields, update_fields=COUNT_FIELDS
+    )
+
+
+def apply_deltas(deltas):
+    deltas = {key: counts for key, counts in deltas.items() if any(counts.values())}
+    with transaction.atomic():
+        if len(deltas) > BULK_DELTA_THRESHOLD:
+            _apply_deltas_in_bulk(deltas)
+            return
+        for (employee_id, month), counts in sorted(deltas.items()):
+            _apply_delta(employee_id, month, counts)
+
+
+def rebuild_summaries():
+    """Recompute the whole summary table from the raw Attendance rows."""
+    rows = (
+        Attendance.objects.annotate(month=TruncMonth('date'))
+        .values('employee_id', 'month')
+        .annotate(**{
+            field: Count('id', filter=Q(status=status))
+            for status, field in STATUS_FIELDS.items()
+        })
+        .order_by()
+    )
+    with transaction.atomic():
+        AttendanceMonthlySummary.objects.all().delete()
+        summaries = [
+            AttendanceMonthlySummary(
+                employee_id=row['employee_id'], month=row['month'],
+                **{field: row[field] for field in COUNT_FIELDS}
+            )
+            for row in rows.iterator()
+        ]
+        AttendanceMonthlySummary.objects.bulk_create(summaries, batch_size=1000)
+    return len(summaries)
+
+
+def attendance_summary(group_by='department', months=12, department=None, employee=None, today=None):
+    """
+    Monthly Present/Late/Absent counts for the last `months` months
+    (including the current one), per department or per employee, read from
+    the summary table only.
+    """
+    if group_by not in GROUP_BY_FIELDS:
+        raise ValueError("group_by must be department or employee")
+    if not 1 <= months <= MAX_MONTHS:
+        raise ValueError(f"months must be between 1 and {MAX_MONTHS}")
+
+    end_month = month_start(today or date.today())
+    start_month = end_month - relativedelta(months=months - 1)
+    summaries = AttendanceMonthlySummary.objects.filter(month__gte=start_month, month__lte=end_month)
+    if department:
+        summaries = summaries.filter(employee__department=department)
+    if employee:
+        summaries = summaries.filter(employee_id=employee)
+
+    key = GROUP_BY_FIELDS[group_by]
+    fields = [key, 'month']
+    if group_by == 'employee':
+        fields += ['employee__first_name', 'employee__last_name']
+    rows = (
+        summaries.values(*fields)
+        .annotate(**{f'{field}_count': Sum(field) for field in COUNT_FIELDS})
+        .order_by(key, 'month')
+    )
+
+    groups = {}
+    for row in rows:
+        group = groups.get(row[key])
+        if group is None:
+            group = groups[row[key]] = {group_by: row[key], 'totals': dict.fromkeys(COUNT_FIELDS, 0), 'months': []}
+            if group_by == 'employee':
+                group['employee_name'] = f"{row['employee__first_name']} {row['employee__last_name']}"
+        counts = {field: row[f'{field}_count'] for field in COUNT_FIELDS}
+        for field, count in counts.items():
+            group['totals'][field] += count
+        group['months'].append({'month': row['month'].isoformat(), **counts})
+
+    return {
+        'group_by': group_by,
+        'start_month': start_month.isoformat(),
+        'end_month': end_month.isoformat(),
+        'results': list(groups.values()),
+    }
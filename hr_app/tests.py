@@ -1,3 +1,305 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .models import Attendance, AttendanceMonthlySummary, Candidate, Employee, Leave, LeaveBalance, Payroll, PayrollRun, Payslip
+from .payroll import run_payroll, unfinished_runs
+from .summaries import attendance_summary, rebuild_summaries
+
+
+def make_employee(index=0, department='Engineering'):
+    return Employee.objects.create(
+        first_name=f'First{index}', last_name=f'Last{index}', email=f'employee{index}@example.com',
+        position='Staff', department=department, date_hired=date(2020, 1, 1), salary=Decimal('50000.00')
+    )
+
+
+class LeaveBalanceTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.employee = make_employee()
+
+    def test_balance_follows_create_update_delete(self):
+        leave = Leave.objects.create(employee=self.employee, date=date(2024, 3, 1), reason='Flu', leave_type='Sick')
+        Leave.objects.create(employee=self.employee, date=date(2024, 3, 2), reason='Flu', leave_type='Sick')
+        self.assertEqual(LeaveBalance.objects.used(self.employee.pk, 2024, 'Sick'), 2)
+
+        leave.leave_type = 'Vacation'
+        leave.save()
+        self.assertEqual(LeaveBalance.objects.used(self.employee.pk, 2024, 'Sick'), 1)
+        self.assertEqual(LeaveBalance.objects.used(self.employee.pk, 2024, 'Vacation'), 1)
+
+        leave.date = date(2025, 1, 5)
+        leave.save()
+        self.assertEqual(LeaveBalance.objects.used(self.employee.pk, 2024, 'Vacation'), 0)
+        self.assertEqual(LeaveBalance.objects.used(self.employee.pk, 2025, 'Vacation'), 1)
+
+        leave.delete()
+        self.assertEqual(LeaveBalance.objects.used(self.employee.pk, 2025, 'Vacation'), 0)
+
+    def test_bulk_deletes_release_the_balance(self):
+        for day in range(1, 4):
+            Leave.objects.create(employee=self.employee, date=date(2024, 3, day), reason='Flu', leave_type='Sick')
+        Leave.objects.filter(date__lte=date(2024, 3, 2)).delete()
+        self.assertEqual(LeaveBalance.objects.used(self.employee.pk, 2024, 'Sick'), 1)
+
+        # The balance row goes with the employee; the cascade must not trip over it
+        self.employee.delete()
+        self.assertFalse(LeaveBalance.objects.exists())
+
+    def test_sick_allowance_is_enforced_per_year(self):
+        for day in range(1, 21):
+            Leave.objects.create(employee=self.employee, date=date(2024, 4, day), reason='Sick', leave_type='Sick')
+        response = self.client.post('/hr/api/leave/', {
+            'employee': self.employee.pk, 'date': '2024-05-01', 'reason': 'Sick', 'leave_type': 'Sick'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(LeaveBalance.objects.used(self.employee.pk, 2024, 'Sick'), 20)
+
+        leave = Leave.objects.create(employee=self.employee, date=date(2025, 1, 2), reason='Sick', leave_type='Sick')
+        self.assertEqual(leave.remaining_leaves, 19)
+
+    def test_listing_reads_balances_in_one_query(self):
+        for index in range(1, 6):
+            employee = make_employee(index)
+            for day in range(1, index + 1):
+                Leave.objects.create(employee=employee, date=date(2024, 6, day), reason='Sick', leave_type='Sick')
+        with self.assertNumQueries(1):
+            response = self.client.get('/hr/api/leave/')
+        remaining = {row['employee']: row['remaining_leaves'] for row in response.data}
+        self.assertEqual(sorted(remaining.values()), [15, 16, 17, 18, 19])
+
+
+class PayrollRunTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.employees = [make_employee(index) for index in range(5)]
+        Payroll.objects.create(
+            employee=self.employees[0], basic_salary=Decimal('3000.00'),
+            bonuses=Decimal('200.00'), deductions=Decimal('150.50')
+        )
+        self.run = PayrollRun.objects.create(period_start=date(2024, 5, 1), period_end=date(2024, 5, 31))
+
+    def test_generates_one_payslip_per_employee_in_batches(self):
+        seen = []
+        with CaptureQueriesContext(connection) as queries:
+            run = run_payroll(self.run.pk, batch_size=2, progress=lambda done, total: seen.append((done, total)))
+        self.assertEqual(run.status, PayrollRun.STATUS_COMPLETED)
+        self.assertEqual(seen, [(2, 5), (4, 5), (5, 5)])
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('INSERT')]), 3)
+
+        payslip = Payslip.objects.get(run=run, employee=self.employees[0])
+        self.assertEqual(payslip.net_salary, Decimal('3049.50'))
+        self.assertEqual(Payslip.objects.get(run=run, employee=self.employees[1]).net_salary, Decimal('50000.00'))
+        self.assertEqual(run.total_net, Decimal('203049.50'))
+        self.assertEqual(run.progress, 100)
+
+    def test_retry_only_fills_in_missing_payslips(self):
+        Payslip.objects.create(
+            run=self.run, employee=self.employees[2], basic_salary=Decimal('1.00'), net_salary=Decimal('1.00')
+        )
+        PayrollRun.objects.filter(pk=self.run.pk).update(status=PayrollRun.STATUS_FAILED)
+        run = run_payroll(self.run.pk)
+        self.assertEqual(run.status, PayrollRun.STATUS_COMPLETED)
+        self.assertEqual(Payslip.objects.filter(run=run).count(), 5)
+        self.assertEqual(Payslip.objects.get(run=run, employee=self.employees[2]).net_salary, Decimal('1.00'))
+
+        # A completed run is not processed again
+        self.assertEqual(run_payroll(self.run.pk).processed_employees, 5)
+        self.assertEqual(Payslip.objects.filter(run=run).count(), 5)
+
+    def test_runs_stuck_in_running_are_reclaimed(self):
+        PayrollRun.objects.filter(pk=self.run.pk).update(
+            status=PayrollRun.STATUS_RUNNING, started_at=timezone.now() - timedelta(minutes=5)
+        )
+        # Still owned by a live worker
+        self.assertEqual(list(unfinished_runs()), [])
+        self.assertEqual(run_payroll(self.run.pk).status, PayrollRun.STATUS_RUNNING)
+
+        PayrollRun.objects.filter(pk=self.run.pk).update(started_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(list(unfinished_runs()), [self.run])
+        run = run_payroll(self.run.pk)
+        self.assertEqual(run.status, PayrollRun.STATUS_COMPLETED)
+        self.assertEqual(Payslip.objects.filter(run=run).count(), 5)
+
+    def test_posting_a_period_twice_returns_the_same_run(self):
+        payload = {'period_start': '2024-06-01', 'period_end': '2024-06-30'}
+        first = self.client.post('/hr/api/payroll-runs/', payload, format='json')
+        second = self.client.post('/hr/api/payroll-runs/', payload, format='json')
+        self.assertEqual(first.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(first.data['id'], second.data['id'])
+        self.assertEqual(PayrollRun.objects.filter(period_start=date(2024, 6, 1)).count(), 1)
+
+
+class BulkAttendanceTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.employees = [make_employee(index) for index in range(50)]
+
+    def test_upserts_a_shift_with_constant_queries(self):
+        Attendance.objects.create(employee=self.employees[0], date=date(2024, 5, 6), status='Absent')
+        records = [
+            {'employee': employee.pk, 'date': '2024-05-06', 'status': 'Present', 'time': '08:55'}
+            for employee in self.employees
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/hr/api/attendance/bulk/', records, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLess(len(queries), 12)
+        self.assertEqual(response.data['counts'], {'updated': 1, 'created': 49})
+        self.assertEqual(response.data['results'][0]['outcome'], 'updated')
+        self.assertEqual(Attendance.objects.filter(date=date(2024, 5, 6)).count(), 50)
+        self.assertEqual(Attendance.objects.get(employee=self.employees[0]).status, 'Present')
+
+    def test_reports_per_row_errors_and_duplicates(self):
+        records = [
+            {'employee': self.employees[0].pk, 'date': '2024-05-06', 'status': 'Late'},
+            {'employee': 999999, 'date': '2024-05-06'},
+            {'employee': self.employees[1].pk, 'status': 'Sleeping'},
+            {'employee': self.employees[0].pk, 'date': '2024-05-06', 'status': 'Present'},
+        ]
+        response = self.client.post('/hr/api/attendance/bulk/', {'records': records}, format='json')
+        outcomes = [row['outcome'] for row in response.data['results']]
+        self.assertEqual(outcomes, ['skipped', 'error', 'error', 'created'])
+        self.assertEqual(Attendance.objects.get().status, 'Present')
+
+    def test_single_clock_in_rejects_a_second_record_for_the_day(self):
+        payload = {'employee': self.employees[0].pk, 'status': 'Late', 'time': '09:30:00'}
+        first = self.client.post('/hr/api/attendance/', payload, format='json')
+        second = self.client.post('/hr/api/attendance/', dict(payload, status='Present'), format='json')
+        self.assertEqual((first.status_code, second.status_code), (status.HTTP_201_CREATED, status.HTTP_400_BAD_REQUEST))
+        self.assertIn('error', second.data)
+        self.assertEqual(Attendance.objects.get().status, 'Late')
+
+    def test_single_clock_in_rejects_a_malformed_date(self):
+        payload = {'employee': self.employees[0].pk, 'date': 'garbage'}
+        response = self.client.post('/hr/api/attendance/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('date', response.data)
+        self.assertFalse(Attendance.objects.exists())
+
+
+class AttendanceSummaryTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.alice = make_employee(1, department='Engineering')
+        self.bob = make_employee(2, department='Engineering')
+        self.carol = make_employee(3, department='Sales')
+
+    def counts(self, employee, month):
+        summary = AttendanceMonthlySummary.objects.get(employee=employee, month=month)
+        return summary.present, summary.late, summary.absent
+
+    def test_single_writes_keep_summaries_in_step(self):
+        record = Attendance.objects.create(employee=self.alice, date=date(2024, 5, 6), status='Late')
+        Attendance.objects.create(employee=self.alice, date=date(2024, 5, 7), status='Present')
+        self.assertEqual(self.counts(self.alice, date(2024, 5, 1)), (1, 1, 0))
+
+        record.status = 'Absent'
+        record.save()
+        self.assertEqual(self.counts(self.alice, date(2024, 5, 1)), (1, 0, 1))
+
+        record.date = date(2024, 6, 3)
+        record.save()
+        self.assertEqual(self.counts(self.alice, date(2024, 5, 1)), (1, 0, 0))
+        self.assertEqual(self.counts(self.alice, date(2024, 6, 1)), (0, 0, 1))
+
+        record.delete()
+        self.assertEqual(self.counts(self.alice, date(2024, 6, 1)), (0, 0, 0))
+
+    def test_bulk_upsert_matches_a_rebuild(self):
+        Attendance.objects.create(employee=self.bob, date=date(2024, 5, 6), status='Absent')
+        records = [
+            {'employee': employee.pk, 'date': f'2024-05-{day:02d}', 'status': 'Late' if day % 5 == 0 else 'Present'}
+            for employee in (self.alice, self.bob, self.carol)
+            for day in range(1, 29)
+        ]
+        self.client.post('/hr/api/attendance/bulk/', records, format='json')
+        self.assertEqual(self.counts(self.bob, date(2024, 5, 1)), (23, 5, 0))
+
+        incremental = set(AttendanceMonthlySummary.objects.values_list('employee', 'month', 'present', 'late', 'absent'))
+        rebuild_summaries()
+        rebuilt = set(AttendanceMonthlySummary.objects.values_list('employee', 'month', 'present', 'late', 'absent'))
+        self.assertEqual(incremental, rebuilt)
+
+    def test_department_report_reads_only_summaries(self):
+        Attendance.objects.create(employee=self.alice, date=date(2024, 4, 2), status='Present')
+        Attendance.objects.create(employee=self.bob, date=date(2024, 5, 2), status='Late')
+        Attendance.objects.create(employee=self.carol, date=date(2024, 5, 2), status='Absent')
+        Attendance.objects.create(employee=self.alice, date=date(2023, 1, 2), status='Present')
+
+        with CaptureQueriesContext(connection) as queries:
+            data = attendance_summary('department', months=3, today=date(2024, 6, 15))
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('hr_app_attendance"', queries[0]['sql'])
+        engineering = next(group for group in data['results'] if group['department'] == 'Engineering')
+        self.assertEqual(engineering['totals'], {'present': 1, 'late': 1, 'absent': 0})
+        self.assertEqual([row['month'] for row in engineering['months']], ['2024-04-01', '2024-05-01'])
+
+        response = self.client.get('/hr/api/attendance/summary/', {'group_by': 'employee', 'department': 'Sales', 'months': 1200})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class HrListQueryCountTest(TestCase):
+    """Every hr list endpoint costs the same queries for 2 rows as for 20."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.regular = make_employee(0)
+        self.run = PayrollRun.objects.create(period_start=date(2024, 5, 1), period_end=date(2024, 5, 31))
+        self.rows = 0
+
+    def add_rows(self, count):
+        for _ in range(count):
+            self.rows += 1
+            index = self.rows
+            employee = make_employee(index)
+            if index % 2:
+                employee.evaluated, employee.performance_score = True, 80
+                employee.save()
+            Payroll.objects.create(employee=employee, basic_salary=Decimal('3000.00'), bonuses=Decimal('0.00'), deductions=Decimal('0.00'))
+            Payslip.objects.create(run=self.run, employee=employee, basic_salary=Decimal('3000.00'), net_salary=Decimal('3000.00'))
+            Attendance.objects.create(employee=employee, date=date(2024, 5, 2), status='Present')
+            Attendance.objects.create(employee=self.regular, date=date(2024, 1, 1) + timedelta(days=index), status='Late')
+            Leave.objects.create(employee=employee, date=date(2024, 5, 3), reason='Flu', leave_type='Sick')
+            Candidate.objects.create(
+                first_name='Cand', last_name=str(index), email=f'candidate{index}@example.com',
+                phone='555', position_applied='Staff'
+            )
+
+    def list_urls(self):
+        return [
+            '/hr/api/employees/',
+            '/hr/api/unevaluated-employees/',
+            '/hr/api/evaluated-employees/',
+            '/hr/api/payroll/',
+            '/hr/api/payroll-runs/',
+            f'/hr/api/payroll-runs/{self.run.pk}/payslips/',
+            '/hr/api/attendance/',
+            f'/hr/api/attendance/employee/{self.regular.pk}/',
+            '/hr/api/leave/',
+            '/hr/api/candidates/',
+        ]
+
+    def query_counts(self):
+        counts = {}
+        for url in self.list_urls():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            counts[url] = len(queries)
+        return counts
 
-# Create your tests here.
+    def test_list_queries_do_not_grow_with_rows(self):
+        self.add_rows(2)
+        few = self.query_counts()
+        self.add_rows(18)
+        many = self.query_counts()
+        self.assertEqual(many, few)
+        self.assertEqual(set(many.values()), {1})
@@ -1,13 +1,16 @@
 from django.urls import path
 from .views import AttendanceDetailView, AttendanceListCreateView, CandidateDetailView, CandidateListCreateView, EmployeeListCreateView, EmployeeDetailView, LeaveDetailView, LeaveListCreateView, edit_attendance, edit_performance_score, get_employee_attendance, reset_employee_evaluation
-from .views import PayrollListCreateView, PayrollDetailView
-from .views import get_unevaluated_employees, get_evaluated_employees, evaluate_employee
+from .views import PayrollListCreateView, PayrollDetailView, PayrollRunListCreateView, PayrollRunDetailView, PayslipListView
+from .views import get_unevaluated_employees, get_evaluated_employees, evaluate_employee, bulk_attendance, get_attendance_summary
 
 urlpatterns = [
     path("api/employees/", EmployeeListCreateView.as_view(), name="employee-list-create"),
     path("api/employees/<int:pk>/", EmployeeDetailView.as_view(), name="employee-detail"),
     path("api/payroll/", PayrollListCreateView.as_view(), name="payroll-list-create"),
     path("api/payroll/<int:pk>/", PayrollDetailView.as_view(), name="payroll-detail"),
+    path("api/payroll-runs/", PayrollRunListCreateView.as_view(), name="payroll-run-list-create"),
+    path("api/payroll-runs/<int:pk>/", PayrollRunDetailView.as_view(), name="payroll-run-detail"),
+    path("api/payroll-runs/<int:pk>/payslips/", PayslipListView.as_view(), name="payroll-run-payslips"),
     path('api/unevaluated-employees/', get_unevaluated_employees, name='unevaluated-employees'),
     path('api/evaluated-employees/', get_evaluated_employees, name='evaluated-employees'),
     path('api/evaluate-employee/<int:employee_id>/', evaluate_employee, name='evaluate-employee'),
@@ -15,6 +18,8 @@ urlpatterns = [
     path('api/reset-evaluation/<int:employee_id>/', reset_employee_evaluation, name='reset-evaluation'),
     
     path("api/attendance/", AttendanceListCreateView.as_view(), name="attendance-list-create"),
+    path("api/attendance/bulk/", bulk_attendance, name="attendance-bulk"),
+    path("api/attendance/summary/", get_attendance_summary, name="attendance-summary"),
     path("api/attendance/<int:pk>/", AttendanceDetailView.as_view(), name="attendance-detail"),
     path("api/attendance/employee/<int:employee_id>/", get_employee_attendance, name="employee-attendance"),
     path("api/attendance/edit/<int:attendance_id>/", edit_attendance, name="edit-attendance"),
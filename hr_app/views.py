@@ -1,9 +1,13 @@
-from rest_framework import generics, status
+from rest_framework import generics, serializers, status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from django.http import JsonResponse
-from .models import Attendance, Candidate, Employee, Leave, Payroll  # ✅ Fixed model reference
-from .serializers import AttendanceSerializer, CandidateSerializer, EmployeeSerializer, LeaveSerializer, PayrollSerializer
+from django.db import IntegrityError, transaction
+from .models import Attendance, Candidate, Employee, Leave, Payroll, PayrollRun, Payslip  # ✅ Fixed model reference
+from .serializers import AttendanceBulkRowSerializer, AttendanceSerializer, CandidateSerializer, EmployeeSerializer, LeaveSerializer, PayrollSerializer, PayrollRunSerializer, PayslipSerializer, with_employee_name, with_sick_leaves_used
+from .payroll import start_payroll_run
+from .attendance import MAX_BULK_ROWS, upsert_attendance
+from .summaries import attendance_summary
 from django.http import JsonResponse
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
@@ -33,14 +37,41 @@ class EmployeeDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 # ✅ List & Create Payroll Records
 class PayrollListCreateView(generics.ListCreateAPIView):
-    queryset = Payroll.objects.all()
+    queryset = with_employee_name(Payroll.objects.all())
     serializer_class = PayrollSerializer
 
 # ✅ Retrieve, Update, Delete Payroll Record
 class PayrollDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Payroll.objects.all()
+    queryset = with_employee_name(Payroll.objects.all())
     serializer_class = PayrollSerializer
 
+# ✅ List payroll runs & start one for a pay period
+class PayrollRunListCreateView(generics.ListCreateAPIView):
+    queryset = PayrollRun.objects.all()
+    serializer_class = PayrollRunSerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # Payslips are generated in the background; poll the run for progress
+        run = start_payroll_run(**serializer.validated_data)
+        return Response(PayrollRunSerializer(run).data, status=status.HTTP_202_ACCEPTED)
+
+# ✅ Status & progress of a payroll run
+class PayrollRunDetailView(generics.RetrieveAPIView):
+    queryset = PayrollRun.objects.all()
+    serializer_class = PayrollRunSerializer
+
+# ✅ Payslips generated by a payroll run
+class PayslipListView(generics.ListAPIView):
+    serializer_class = PayslipSerializer
+
+    def get_queryset(self):
+        payslips = with_employee_name(Payslip.objects.filter(run_id=self.kwargs['pk'])).order_by('employee_id')
+        if self.request.query_params.get('employee'):
+            payslips = payslips.filter(employee_id=self.request.query_params['employee'])
+        return payslips
+
 # Fetch all UNEVALUATED employees
 @api_view(['GET'])
 def get_unevaluated_employees(request):
@@ -101,35 +132,79 @@ def reset_employee_evaluation(request, employee_id):
 
 # ✅ List & Create Attendance Records
 class AttendanceListCreateView(generics.ListCreateAPIView):
-    queryset = Attendance.objects.all().order_by('-date')
+    queryset = with_employee_name(Attendance.objects.all()).order_by('-date')
     serializer_class = AttendanceSerializer
 
     def create(self, request, *args, **kwargs):
-        employee_id = request.data.get('employee')
-        status_value = request.data.get('status')
-        time_value = request.data.get('time', "09:00:00")  # Default if not provided
+        # Same parsing and defaults (today, Present, 09:00) as a bulk row, so
+        # a malformed date or time is a 400 rather than an error on save
+        row = AttendanceBulkRowSerializer(data={
+            field: value for field, value in request.data.items() if value not in (None, '')
+        })
+        if not row.is_valid():
+            return Response(row.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = row.validated_data
 
         try:
-            employee = Employee.objects.get(id=employee_id)
-            attendance = Attendance.objects.create(
-                employee=employee,
-                status=status_value,
-                time=time_value
-            )
+            employee = Employee.objects.get(id=data['employee'])
+            with transaction.atomic():
+                attendance = Attendance.objects.create(
+                    employee=employee,
+                    date=data['date'],
+                    status=data['status'],
+                    time=data['time']
+                )
             serializer = AttendanceSerializer(attendance)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except Employee.DoesNotExist:
             return Response({"error": "Employee not found"}, status=status.HTTP_404_NOT_FOUND)
+        except IntegrityError:
+            # Overwriting a day's record is left to the bulk endpoint
+            return Response(
+                {"error": "Attendance for this employee and date is already recorded; use api/attendance/bulk/ to update it"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+# ✅ Record a batch of clock-ins (e.g. a badge terminal syncing a shift)
+@api_view(['POST'])
+def bulk_attendance(request):
+    rows = request.data.get('records') if isinstance(request.data, dict) else request.data
+    if not isinstance(rows, list):
+        return Response({"error": "Send a list of {employee, date, status, time} records"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(rows) > MAX_BULK_ROWS:
+        return Response({"error": f"At most {MAX_BULK_ROWS} records per request"}, status=status.HTTP_400_BAD_REQUEST)
+
+    outcomes = upsert_attendance(rows)
+    counts = {}
+    for outcome in outcomes:
+        counts[outcome['outcome']] = counts.get(outcome['outcome'], 0) + 1
+    return Response({"counts": counts, "results": outcomes}, status=status.HTTP_200_OK)
+
+# ✅ Monthly Present/Late/Absent counts per department or employee
+@api_view(['GET'])
+def get_attendance_summary(request):
+    params = request.query_params
+    try:
+        months = int(params.get('months', 12))
+        data = attendance_summary(
+            group_by=params.get('group_by', 'department'),
+            months=months,
+            department=params.get('department'),
+            employee=params.get('employee')
+        )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(data)
 
 # ✅ Retrieve, Update, Delete a specific attendance record
 class AttendanceDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Attendance.objects.all()
+    queryset = with_employee_name(Attendance.objects.all())
     serializer_class = AttendanceSerializer
 
 # ✅ Fetch attendance records for a specific employee
 @api_view(['GET'])
 def get_employee_attendance(request, employee_id):
-    attendance_records = Attendance.objects.filter(employee_id=employee_id).order_by('-date')
+    attendance_records = with_employee_name(Attendance.objects.filter(employee_id=employee_id)).order_by('-date')
     serializer = AttendanceSerializer(attendance_records, many=True)
     return Response(serializer.data)
 
@@ -137,7 +212,7 @@ def get_employee_attendance(request, employee_id):
 @api_view(['PUT'])
 def edit_attendance(request, attendance_id):
     try:
-        attendance = Attendance.objects.get(id=attendance_id)
+        attendance = with_employee_name(Attendance.objects.all()).get(id=attendance_id)
     except Attendance.DoesNotExist:
         return Response({"error": "Attendance record not found"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -153,30 +228,29 @@ class LeaveListCreateView(generics.ListCreateAPIView):
     serializer_class = LeaveSerializer
 
     def get_queryset(self):
-        return Leave.objects.select_related('employee').all()
+        return with_sick_leaves_used(with_employee_name(Leave.objects.all()))
 
     def perform_create(self, serializer):
-        employee = serializer.validated_data['employee']
-        used_leaves = Leave.objects.filter(employee=employee, leave_type='Sick').count()
-        remaining_leaves = max(20 - used_leaves, 0)
-
-        # Don't pass `remaining_leaves` because it's not a model field
-        serializer.save()
+        # Leave.save() checks and updates the employee's LeaveBalance
+        try:
+            serializer.save()
+        except ValueError as e:
+            raise serializers.ValidationError({"leave_type": str(e)})
 
 
 class LeaveDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = LeaveSerializer
 
     def get_queryset(self):
-        return Leave.objects.select_related('employee').all()
+        return with_sick_leaves_used(with_employee_name(Leave.objects.all()))
 
     def perform_update(self, serializer):
-        leave = serializer.instance
-        employee = leave.employee
-        used_leaves = Leave.objects.filter(employee=employee, leave_type='Sick').exclude(id=leave.id).count()
-        remaining_leaves = max(20 - used_leaves, 0)
-
-        serializer.save(remaining_leaves=remaining_leaves)
+        try:
+            leave = serializer.save()
+        except ValueError as e:
+            raise serializers.ValidationError({"leave_type": str(e)})
+        # The balance annotated when the leave was loaded is stale now
+        leave.__dict__.pop('sick_leaves_used', None)
 
 
 class CandidateListCreateView(generics.ListCreateAPIView):